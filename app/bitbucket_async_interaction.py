@@ -0,0 +1,313 @@
+"""
+Asyncio based engine for the Bitbucket REST interaction
+* Provides the same checks as *bitbucket_rest_interaction* as coroutines, to run a whole check cycle on one event loop
+* Response parsing is shared with *bitbucket_rest_interaction*, so both engines resolve the same statuses
+* aiohttp is used for the requests if it is installed, otherwise the requests are run on the shared keep-alive session
+  in the default executor of the event loop
+* Requests are run on the executor while a cassette is recorded or replayed, so they pass through the cassette
+"""
+import asyncio
+import time
+import requests
+from app import bitbucket_rest_interaction, constants_def as constants, watcher_logging
+from app.exception_definitions.rate_limited_error import RateLimitedError
+from app.http_cache import HttpCache, HTTP_NOT_MODIFIED, HEADER_ETAG, HEADER_LAST_MODIFIED
+from app.rate_governor import RateGovernor
+from app.repo_info import RepoInfo
+from app.rest_cassette import RestCassette, MODE_OFF
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncBitbucketClient:
+    """
+    Async client for the Bitbucket REST API, the number of requests in flight is bounded by a semaphore
+    :param max_concurrency: Maximum number of requests in flight at the same time
+    """
+
+    def __init__(self, max_concurrency=constants.ASYNC_REQUEST_CONCURRENCY_PER_HOST):
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._http_session = None
+
+    async def open(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if aiohttp and not self._http_session and RestCassette.get_instance().mode == MODE_OFF:
+            connector = aiohttp.TCPConnector(limit_per_host=constants.HTTP_POOL_SIZE_PER_HOST)
+            timeout = aiohttp.ClientTimeout(sock_connect=constants.HTTP_CONNECT_TIMEOUT,
+                                            sock_read=constants.HTTP_READ_TIMEOUT)
+            self._http_session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def close(self):
+        if self._http_session:
+            await self._http_session.close()
+            self._http_session = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    """
+    Fetches the JSON content of the given url.
+    :raises requests.exceptions.RequestException: If the request fails, independent of the engine used
+    """
+    async def get_json(self, url, headers):
+        async with self._semaphore:
+            if not self._http_session:
+                loop = asyncio.get_running_loop()
+                # Executor threads do not inherit the context of the task, so the trace of the cycle is bound
+                get_json = watcher_logging.bind_trace(bitbucket_rest_interaction.get_json)
+                return await loop.run_in_executor(None, get_json, url, headers)
+            http_cache = HttpCache.get_instance()
+            cache_entry = http_cache.get_entry(url)
+            if cache_entry:
+                headers = dict(headers, **cache_entry.get_validator_headers())
+            await self._acquire_rate_token(url)
+            start_time = time.perf_counter()
+            status_code = None
+            body = b""
+            try:
+                async with self._http_session.get(url, headers=headers) as rsp:
+                    status_code = rsp.status
+                    body = await rsp.read()
+                    bitbucket_rest_interaction.check_rate_limit(rsp.status, rsp.headers, url)
+                    if cache_entry and rsp.status == HTTP_NOT_MODIFIED:
+                        return bitbucket_rest_interaction.get_cached_json(url, cache_entry)
+                    if rsp.status >= 400:
+                        raise requests.exceptions.HTTPError(str(rsp.status) + " Error for url: " + url)
+                    rsp_json = bitbucket_rest_interaction.parse_json_body(url, body)
+                    http_cache.store(url, rsp.headers.get(HEADER_ETAG), rsp.headers.get(HEADER_LAST_MODIFIED), body)
+                    return rsp_json
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # Raised as the errors of requests, so the paginator retries them the same way in both engines
+                raise requests.exceptions.ConnectionError(str(e))
+            except aiohttp.ClientError as e:
+                raise requests.exceptions.RequestException(str(e))
+            finally:
+                bitbucket_rest_interaction.record_request(url, start_time, status_code, len(body))
+
+    @staticmethod
+    async def _acquire_rate_token(url):
+        delay = RateGovernor.get_instance(bitbucket_rest_interaction.get_url_host(url)).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def post_json(self, url, headers, body):
+        async with self._semaphore:
+            if not self._http_session:
+                loop = asyncio.get_running_loop()
+                post_json = watcher_logging.bind_trace(bitbucket_rest_interaction.post_json)
+                return await loop.run_in_executor(None, post_json, url, headers, body)
+            await self._acquire_rate_token(url)
+            start_time = time.perf_counter()
+            status_code = None
+            rsp_body = b""
+            try:
+                async with self._http_session.post(url, headers=headers, json=body) as rsp:
+                    status_code = rsp.status
+                    rsp_body = await rsp.read()
+                    bitbucket_rest_interaction.check_rate_limit(rsp.status, rsp.headers, url)
+                    if rsp.status >= 400:
+                        raise requests.exceptions.HTTPError(str(rsp.status) + " Error for url: " + url)
+                    return bitbucket_rest_interaction.parse_json_body(url, rsp_body) if rsp_body.strip() else None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise requests.exceptions.RequestException(str(e))
+            finally:
+                bitbucket_rest_interaction.record_request(url, start_time, status_code, len(rsp_body))
+
+    """
+    Fetches the page at the cursor of the paginator, transient errors are retried as in the executor path.
+    :param paginator: *bitbucket_rest_interaction.Paginator* of the paged resource
+    :returns: List of the values of the page
+    """
+    async def fetch_next_page(self, paginator):
+        paginator.retry_cnt = 0
+        while True:
+            try:
+                return paginator.on_page(await self.get_json(paginator.get_next_page_url(), paginator.headers))
+            except requests.exceptions.RequestException as e:
+                if not paginator.can_retry(e):
+                    raise
+
+    """
+    Yields the values of a paged resource lazily, the pages are fetched as the values are consumed.
+    :param paginator: *bitbucket_rest_interaction.Paginator* of the paged resource, its cursor is advanced page by page
+    """
+    async def iter_values(self, paginator):
+        while not paginator.is_last_page_read:
+            for value in await self.fetch_next_page(paginator):
+                yield value
+
+    async def get_activities(self, pr_id, repo_ref=None):
+        if not pr_id:
+            return 0
+
+        repo_ref = bitbucket_rest_interaction.get_repo_ref(repo_ref)
+        if not RepoInfo.are_all_fields_set(repo_ref):
+            return 0
+
+        paginator = bitbucket_rest_interaction.Paginator(
+            bitbucket_rest_interaction.get_pr_activities_rest_url(pr_id, repo_ref),
+            bitbucket_rest_interaction.get_request_headers(repo_ref))
+        activity_cnt = 0
+        try:
+            async for _ in self.iter_values(paginator):
+                activity_cnt += 1
+        except (KeyError, TypeError):
+            return 0
+        except requests.exceptions.RequestException:
+            return 0
+
+        return activity_cnt
+
+    async def get_new_activities(self, pr_id, last_activity_id=None, repo_ref=None):
+        if not pr_id:
+            return [], last_activity_id
+
+        repo_ref = bitbucket_rest_interaction.get_repo_ref(repo_ref)
+        if not RepoInfo.are_all_fields_set(repo_ref):
+            return [], last_activity_id
+
+        paginator = bitbucket_rest_interaction.get_new_activities_paginator(pr_id, last_activity_id, repo_ref)
+        new_activities = []
+        try:
+            async for activity in self.iter_values(paginator):
+                if not bitbucket_rest_interaction.is_new_activity(activity, last_activity_id):
+                    break
+                new_activities.append(activity)
+                if last_activity_id is None:
+                    break
+        except (KeyError, TypeError):
+            return [], last_activity_id
+        except requests.exceptions.RequestException:
+            return [], last_activity_id
+
+        newest_activity_id = bitbucket_rest_interaction.get_newest_activity_id(new_activities, last_activity_id)
+        if last_activity_id is None:
+            return [], newest_activity_id
+        return new_activities, newest_activity_id
+
+    async def fetch_pr_snapshot(self, pr_id, repo_ref=None):
+        if not pr_id:
+            return None
+
+        repo_ref = bitbucket_rest_interaction.get_repo_ref(repo_ref)
+        if not RepoInfo.are_all_fields_set(repo_ref):
+            return None
+
+        headers = bitbucket_rest_interaction.get_request_headers(repo_ref)
+
+        pr_json = await self.get_json(bitbucket_rest_interaction.get_pr_rest_url(pr_id, repo_ref), headers)
+
+        pr_snapshot = bitbucket_rest_interaction.PrSnapshot(pr_id, pr_json, headers, merge_json={}, repo_ref=repo_ref)
+        if pr_snapshot.is_merged:
+            return pr_snapshot
+
+        throttled = False
+        try:
+            merge_json = await self.get_json(bitbucket_rest_interaction.get_pr_merge_rest_url(pr_id, repo_ref),
+                                             headers)
+        except RateLimitedError:
+            throttled = True
+            merge_json = {}
+        except requests.exceptions.RequestException:
+            merge_json = {}
+        pr_snapshot = bitbucket_rest_interaction.PrSnapshot(pr_id, pr_json, headers, merge_json=merge_json,
+                                                            repo_ref=repo_ref)
+        pr_snapshot.throttled = throttled
+        return pr_snapshot
+
+    async def get_pr_snapshot(self, pr_id, repo_ref=None):
+        try:
+            return await self.fetch_pr_snapshot(pr_id, repo_ref)
+        except requests.exceptions.RequestException:
+            return None
+
+    async def get_commit_status(self, commit_sha, repo_ref=None):
+        if not commit_sha:
+            return bitbucket_rest_interaction.PrStatus.NO_STATUS
+
+        repo_ref = bitbucket_rest_interaction.get_repo_ref(repo_ref)
+        if not RepoInfo.are_all_fields_set(repo_ref):
+            return bitbucket_rest_interaction.PrStatus.NO_STATUS
+
+        build_status_memo = bitbucket_rest_interaction.BuildStatusMemo.get_instance()
+        memo_status = build_status_memo.get(commit_sha)
+        if memo_status is not None:
+            return memo_status
+
+        target_status_url = bitbucket_rest_interaction.get_pr_status_rest_url(commit_sha, repo_ref)
+        headers = bitbucket_rest_interaction.get_request_headers(repo_ref)
+
+        try:
+            rsp_json = await self.get_json(target_status_url, headers)
+        except requests.exceptions.RequestException:
+            return bitbucket_rest_interaction.PrStatus.NO_STATUS
+
+        return build_status_memo.store(commit_sha, rsp_json)
+
+    async def get_commit_statuses(self, commit_shas, repo_ref=None):
+        repo_ref = bitbucket_rest_interaction.get_repo_ref(repo_ref)
+        if not RepoInfo.are_all_fields_set(repo_ref):
+            return {}
+
+        target_stats_url = bitbucket_rest_interaction.get_commits_stats_rest_url(repo_ref)
+        headers = bitbucket_rest_interaction.get_request_headers(repo_ref)
+
+        async def get_chunk_statuses(commit_chunk):
+            try:
+                rsp_json = await self.post_json(target_stats_url, headers, commit_chunk)
+            except RateLimitedError:
+                return {}
+            except requests.exceptions.RequestException:
+                rsp_json = None
+            return bitbucket_rest_interaction.get_statuses_from_batch_stats(commit_chunk, rsp_json)
+
+        statuses = bitbucket_rest_interaction.get_memoized_statuses(commit_shas)
+        chunks = bitbucket_rest_interaction.get_commit_chunks(
+            commit_sha for commit_sha in commit_shas if commit_sha not in statuses)
+        for chunk_statuses in await asyncio.gather(*[get_chunk_statuses(commit_chunk) for commit_chunk in chunks]):
+            statuses.update(chunk_statuses)
+        return statuses
+
+    async def get_pr_statuses(self, pr_snapshots):
+        pr_statuses = {}
+        for server_snapshots in bitbucket_rest_interaction.group_snapshots_by_server(pr_snapshots).values():
+            commit_statuses = await self.get_commit_statuses(
+                [pr_snapshot.latest_commit for pr_snapshot in server_snapshots], server_snapshots[0].repo_ref)
+            pr_statuses.update(bitbucket_rest_interaction.get_pr_statuses_from_commit_statuses(server_snapshots,
+                                                                                               commit_statuses))
+        return pr_statuses
+
+    async def is_pr_merged(self, pr_id, repo_ref=None):
+        pr_snapshot = await self.get_pr_snapshot(pr_id, repo_ref)
+        if not pr_snapshot:
+            return False
+        return pr_snapshot.is_merged
+
+    async def is_pr_conflicted(self, pr_id, repo_ref=None):
+        pr_snapshot = await self.get_pr_snapshot(pr_id, repo_ref)
+        if not pr_snapshot:
+            return False
+        return pr_snapshot.is_conflicted
+
+    async def is_ready_to_merge(self, pr_id, repo_ref=None):
+        pr_snapshot = await self.get_pr_snapshot(pr_id, repo_ref)
+        if not pr_snapshot:
+            return False
+        return pr_snapshot.can_merge
+
+    async def get_status(self, pr_id, repo_ref=None):
+        pr_snapshot = await self.get_pr_snapshot(pr_id, repo_ref)
+        if not pr_snapshot:
+            return bitbucket_rest_interaction.PrStatus.NO_STATUS
+        return await self.get_commit_status(pr_snapshot.latest_commit, pr_snapshot.repo_ref)
+
+    async def does_pr_exist(self, pr_id, repo_ref=None):
+        return await self.get_pr_snapshot(pr_id, repo_ref) is not None
@@ -1,269 +1,814 @@
-import requests
-import enum
-from app.repo_info import RepoInfo
-
-""" Request header related private constants """
-_HEADER_AUTH = "Authorization"
-_HEADER_BEARER = "Bearer"
-_CONTENT_TYPE = "Content-Type"
-_APP_JSON = "application/json"
-
-""" Request url related private constants """
-_HTTPS = "https://"
-_GIT_REST_API = "/git/rest/api/"
-_GIT_REST_BUILD_STATUS = "/git/rest/build-status/"
-_PROJECTS = "/projects/"
-_REPOS = "/repos/"
-_PULL_REQUESTS = "/pull-requests/"
-_COMMITS_STATS = "/commits/stats/"
-_ACTIVITIES = "/activities"
-_MERGE = "/merge"
-_QUERY_SIGN = "?"
-_START_QUERY = "start="
-
-""" Response JSON related private constants """
-_SIZE = "size"
-_IS_LAST_PAGE = "isLastPage"
-_NEXT_PAGE_START = "nextPageStart"
-_STATE = "state"
-_CONFLICTED = "conflicted"
-_CAN_MERGE = "canMerge"
-_FROM_REF = "fromRef"
-_LATEST_COMMIT = "latestCommit"
-_SUCCESSFUL = "successful"
-_IN_PROGRESS = "inProgress"
-_FAILED = "failed"
-
-""" Private constants for functionality """
-_MERGED_STR = "MERGED"
-
-""" dockstring """
-class PrStatus(enum.Enum):
-    FAILED = 1
-    IN_PROGRESS = 2
-    SUCCESS = 3
-    NO_STATUS = 4
-
-
-def get_pr_rest_url(pr_id):
-    repo_info = RepoInfo.get_instance()
-    return _HTTPS + repo_info.server_address + _GIT_REST_API + repo_info.api_version + _PROJECTS + \
-        repo_info.project_name + _REPOS + repo_info.repo_name + _PULL_REQUESTS + pr_id
-
-
-def get_pr_status_rest_url(commit_sha):
-    repo_info = RepoInfo.get_instance()
-    return _HTTPS + repo_info.server_address + _GIT_REST_BUILD_STATUS + repo_info.api_version + _COMMITS_STATS + \
-        commit_sha
-
-
-def get_request_headers():
-    repo_info = RepoInfo.get_instance()
-    return {_CONTENT_TYPE: _APP_JSON, _HEADER_AUTH: _HEADER_BEARER + " " + str(repo_info.access_token)}
-
-
-def get_activities(pr_id):
-    if not pr_id:
-        return 0
-
-    if not RepoInfo.are_all_fields_set():
-        return 0
-
-    pr_rest_target_url = get_pr_rest_url(pr_id)
-    activities_url = pr_rest_target_url + _ACTIVITIES
-    headers = get_request_headers()
-
-    try:
-        rsp = requests.get(activities_url, headers=headers)
-        rsp.raise_for_status()
-    except requests.exceptions.RequestException:
-        return 0
-    rsp_json = rsp.json()
-
-    try:
-        activity_cnt = rsp_json[_SIZE]
-        is_last_page = rsp_json[_IS_LAST_PAGE]
-    except ValueError:
-        return 0
-
-    while not is_last_page:
-        try:
-            next_start = rsp_json[_NEXT_PAGE_START]
-            next_url = activities_url + _QUERY_SIGN + _START_QUERY + str(next_start)
-            rsp = requests.get(next_url, headers=headers)
-            rsp.raise_for_status()
-            rsp_json = rsp.json()
-            activity_cnt += rsp_json[_SIZE]
-            is_last_page = rsp_json[_IS_LAST_PAGE]
-        except ValueError:
-            return 0
-        except requests.exceptions.RequestException:
-            return 0
-
-    print("Activity Cnt: " + str(activity_cnt))
-    return activity_cnt
-
-
-def is_pr_merged(pr_id):
-    if not pr_id:
-        return 0
-
-    if not RepoInfo.are_all_fields_set():
-        return 0
-
-    pr_rest_target_url = get_pr_rest_url(pr_id)
-    headers = get_request_headers()
-
-    try:
-        rsp = requests.get(pr_rest_target_url, headers=headers)
-        rsp.raise_for_status()
-    except requests.exceptions.RequestException:
-        return False
-    rsp_json = rsp.json()
-
-    try:
-        state = rsp_json[_STATE]
-    except ValueError:
-        return False
-
-    print("is_pr_merged: " + str(state))
-
-    return state == _MERGED_STR
-
-
-def is_pr_conflicted(pr_id):
-    if not pr_id:
-        return 0
-
-    if not RepoInfo.are_all_fields_set():
-        return 0
-
-    pr_rest_target_url = get_pr_rest_url(pr_id)
-    merge_url = pr_rest_target_url + _MERGE
-    headers = get_request_headers()
-
-    if is_pr_merged(pr_id):
-        return False
-
-    try:
-        rsp = requests.get(merge_url, headers=headers)
-        rsp.raise_for_status()
-    except requests.exceptions.RequestException:
-        return False
-    rsp_json = rsp.json()
-
-    try:
-        conflicted = rsp_json[_CONFLICTED]
-    except ValueError:
-        return False
-
-    print("is_pr_conflicted: " + str(conflicted))
-
-    return conflicted
-
-
-def is_ready_to_merge(pr_id):
-    if not pr_id:
-        return 0
-
-    if not RepoInfo.are_all_fields_set():
-        return 0
-
-    pr_rest_target_url = get_pr_rest_url(pr_id)
-    merge_url = pr_rest_target_url + _MERGE
-    headers = get_request_headers()
-
-    if is_pr_merged(pr_id):
-        return False
-
-    try:
-        rsp = requests.get(merge_url, headers=headers)
-        rsp.raise_for_status()
-    except requests.exceptions.RequestException:
-        return False
-    rsp_json = rsp.json()
-
-    try:
-        can_merge = rsp_json[_CAN_MERGE]
-    except ValueError:
-        return False
-
-    print("is_ready_to_merge: " + str(can_merge))
-
-    return can_merge
-
-
-def get_status(pr_id):
-    if not pr_id:
-        return 0
-
-    if not RepoInfo.are_all_fields_set():
-        return 0
-
-    pr_rest_target_url = get_pr_rest_url(pr_id)
-    headers = get_request_headers()
-
-    try:
-        rsp = requests.get(pr_rest_target_url, headers=headers)
-        rsp.raise_for_status()
-    except requests.exceptions.RequestException:
-        return PrStatus.NO_STATUS
-    rsp_json = rsp.json()
-
-    print("[get_status][" + pr_rest_target_url + "] " + str(rsp_json))
-
-    try:
-        commit_sha = rsp_json[_FROM_REF][_LATEST_COMMIT]
-    except ValueError:
-        return PrStatus.NO_STATUS
-
-    target_status_url = get_pr_status_rest_url(commit_sha)
-
-    try:
-        rsp = requests.get(target_status_url, headers=headers)
-        rsp.raise_for_status()
-    except requests.exceptions.RequestException:
-        return PrStatus.NO_STATUS
-    rsp_json = rsp.json()
-
-    print("[get_status][" + target_status_url + "] " + str(rsp_json))
-
-    try:
-        successful = rsp_json[_SUCCESSFUL]
-        in_progress = rsp_json[_IN_PROGRESS]
-        failed = rsp_json[_FAILED]
-    except ValueError:
-        return PrStatus.NO_STATUS
-
-    print("[get_status] SUCCESSFUL: " + str(successful) + ", IN_PROGRESS: " + str(in_progress) + ", FAILED: " + str(
-        failed))
-
-    if failed > 0:
-        return PrStatus.FAILED
-    elif in_progress > 0:
-        return PrStatus.IN_PROGRESS
-    elif successful > 0:
-        return PrStatus.SUCCESS
-    else:
-        return PrStatus.NO_STATUS
-
-
-def does_pr_exist(pr_id):
-    if not pr_id:
-        return 0
-
-    if not RepoInfo.are_all_fields_set():
-        return 0
-
-    pr_rest_target_url = get_pr_rest_url(pr_id)
-    headers = get_request_headers()
-
-    try:
-        rsp = requests.get(pr_rest_target_url, headers=headers)
-        rsp.raise_for_status()
-    except requests.exceptions.HTTPError:
-        return False
-    except requests.exceptions.RequestException:
-        return False
-
-    return True
+import requests
+import enum
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from app import constants_def as constants, watcher_logging
+from app.exception_definitions.invalid_response_error import InvalidResponseError
+from app.exception_definitions.rate_limited_error import RateLimitedError
+from app.http_cache import HttpCache, HTTP_NOT_MODIFIED, HEADER_ETAG, HEADER_LAST_MODIFIED
+from app.metrics import Metrics
+from app.rate_governor import RateGovernor, HTTP_TOO_MANY_REQUESTS, HEADER_RETRY_AFTER
+from app.repo_info import RepoInfo, RepoRef
+from app.rest_cassette import RestCassette
+from app.session_manager import SessionManager
+
+""" Request header related private constants """
+_HEADER_AUTH = "Authorization"
+_HEADER_BEARER = "Bearer"
+_CONTENT_TYPE = "Content-Type"
+_APP_JSON = "application/json"
+_ACCEPT_ENCODING = "Accept-Encoding"
+_GZIP = "gzip"
+_CONNECTION = "Connection"
+_KEEP_ALIVE = "keep-alive"
+_GET = "GET"
+_POST = "POST"
+
+""" Request url related private constants """
+_HTTPS = "https://"
+_GIT_REST_API = "/git/rest/api/"
+_GIT_REST_BUILD_STATUS = "/git/rest/build-status/"
+_GIT_PROJECTS = "/git/projects/"
+_PR_PREFIX = "PR-"
+_PROJECTS = "/projects/"
+_REPOS = "/repos/"
+_PULL_REQUESTS = "/pull-requests/"
+_COMMITS_STATS = "/commits/stats/"
+_COMMITS_STATS_BATCH = "/commits/stats"
+_ACTIVITIES = "/activities"
+_MERGE = "/merge"
+_QUERY_SIGN = "?"
+_START_QUERY = "start="
+_LIMIT_QUERY = "limit="
+_QUERY_SEPARATOR = "&"
+
+""" Paging related private constants """
+_TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+""" Response JSON related private constants """
+_IS_LAST_PAGE = "isLastPage"
+_NEXT_PAGE_START = "nextPageStart"
+_VALUES = "values"
+_ID = "id"
+_ACTION = "action"
+_USER = "user"
+_DISPLAY_NAME = "displayName"
+_STATE = "state"
+_CONFLICTED = "conflicted"
+_CAN_MERGE = "canMerge"
+_FROM_REF = "fromRef"
+_LATEST_COMMIT = "latestCommit"
+_PROPERTIES = "properties"
+_COMMENT_COUNT = "commentCount"
+_OPEN_TASK_COUNT = "openTaskCount"
+_VERSION = "version"
+_UPDATED_DATE = "updatedDate"
+_SUCCESSFUL = "successful"
+_IN_PROGRESS = "inProgress"
+_FAILED = "failed"
+
+_logger = watcher_logging.get_logger("bitbucket_rest_interaction")
+
+""" Endpoint names of the metrics """
+ENDPOINT_PULL_REQUEST = "pull_request"
+ENDPOINT_ACTIVITIES = "activities"
+ENDPOINT_MERGE = "merge"
+ENDPOINT_BUILD_STATUS = "build_status"
+ENDPOINT_BUILD_STATUS_BATCH = "build_status_batch"
+ENDPOINT_OTHER = "other"
+
+""" Private constants for functionality """
+_MERGED_STR = "MERGED"
+_PR_LINK_PATTERN = re.compile(r"^(?:https?://)?([^/\s]+)/(?:git/)?projects/([^/\s]+)/repos/([^/\s]+)/pull-requests/"
+                              r"(?:PR-)?(\d+)(?:[/?#].*)?$", re.IGNORECASE)
+_PR_ID_PATTERN = re.compile(r"^(?:PR-)?(\d+)$", re.IGNORECASE)
+
+""" Statuses of the PRs, integer coded so they can be stored compactly in the PR records """
+class PrStatus(enum.IntEnum):
+    FAILED = 1
+    IN_PROGRESS = 2
+    SUCCESS = 3
+    NO_STATUS = 4
+    CONFLICT = 5
+    MERGED = 6
+    READY_TO_MERGE = 7
+
+
+def get_repo_ref(repo_ref=None):
+    # Callers without a repository reference are served from the repository in the settings
+    return repo_ref if repo_ref is not None else RepoRef.get_default()
+
+
+def get_pr_rest_url(pr_id, repo_ref=None):
+    repo_ref = get_repo_ref(repo_ref)
+    return _HTTPS + repo_ref.server_address + _GIT_REST_API + RepoInfo.get_instance().api_version + _PROJECTS + \
+        repo_ref.project_name + _REPOS + repo_ref.repo_name + _PULL_REQUESTS + pr_id
+
+
+def get_pr_status_rest_url(commit_sha, repo_ref=None):
+    repo_ref = get_repo_ref(repo_ref)
+    return _HTTPS + repo_ref.server_address + _GIT_REST_BUILD_STATUS + RepoInfo.get_instance().api_version + \
+        _COMMITS_STATS + commit_sha
+
+
+def get_commits_stats_rest_url(repo_ref=None):
+    repo_ref = get_repo_ref(repo_ref)
+    return _HTTPS + repo_ref.server_address + _GIT_REST_BUILD_STATUS + RepoInfo.get_instance().api_version + \
+        _COMMITS_STATS_BATCH
+
+
+def get_pr_activities_rest_url(pr_id, repo_ref=None):
+    return get_pr_rest_url(pr_id, repo_ref) + _ACTIVITIES
+
+
+def get_pr_merge_rest_url(pr_id, repo_ref=None):
+    return get_pr_rest_url(pr_id, repo_ref) + _MERGE
+
+
+def get_page_rest_url(url, start, limit=None):
+    page_url = url + _QUERY_SIGN + _START_QUERY + str(start)
+    if limit:
+        page_url += _QUERY_SEPARATOR + _LIMIT_QUERY + str(limit)
+    return page_url
+
+
+def get_pr_web_url(pr_id, repo_ref=None):
+    repo_ref = get_repo_ref(repo_ref)
+    return _HTTPS + repo_ref.server_address + _GIT_PROJECTS + repo_ref.project_name + _REPOS + \
+        repo_ref.repo_name + _PULL_REQUESTS + _PR_PREFIX + str(pr_id)
+
+
+def get_server_url(repo_ref=None):
+    return _HTTPS + get_repo_ref(repo_ref).server_address
+
+
+def get_url_host(url):
+    return urlsplit(url).netloc
+
+
+def get_endpoint_name(url):
+    path = urlsplit(url).path
+    if _GIT_REST_BUILD_STATUS in path:
+        return ENDPOINT_BUILD_STATUS_BATCH if path.endswith(_COMMITS_STATS_BATCH) else ENDPOINT_BUILD_STATUS
+    if path.endswith(_ACTIVITIES):
+        return ENDPOINT_ACTIVITIES
+    if path.endswith(_MERGE):
+        return ENDPOINT_MERGE
+    if _PULL_REQUESTS in path:
+        return ENDPOINT_PULL_REQUEST
+    return ENDPOINT_OTHER
+
+
+def record_request(url, start_time, status_code=None, received_bytes=0):
+    """
+    Records the request in the metrics of its endpoint
+    :param url: String representation of the url of the request
+    :param start_time: Start of the request, as a value of time.perf_counter
+    :param status_code: Status code of the response, None if the request failed without a response
+    :param received_bytes: Size of the received body in bytes
+    """
+    duration = time.perf_counter() - start_time
+    endpoint = get_endpoint_name(url)
+    Metrics.get_instance().record_request(endpoint, status_code, duration, received_bytes)
+    watcher_logging.log_request(_logger, "[%s] %s %s in %.3fs, %d bytes", endpoint, url, status_code, duration,
+                                received_bytes)
+
+
+def parse_pr_link(pr_link):
+    """
+    Parses the link of a PR, or only the id of a PR in the repository of the settings
+    :param pr_link: String representation of the link (e.g. https://server/git/projects/P/repos/R/pull-requests/PR-1)
+    :returns: Tuple of the *RepoRef* and the string representation of the PR id, None if the link is not valid
+    """
+    pr_link = (pr_link or "").strip()
+    link_match = _PR_LINK_PATTERN.match(pr_link)
+    if link_match:
+        return RepoRef(link_match.group(1), link_match.group(2), link_match.group(3)), link_match.group(4)
+    id_match = _PR_ID_PATTERN.match(pr_link)
+    if id_match:
+        return RepoRef.get_default(), id_match.group(1)
+    return None
+
+
+def get_request_headers(repo_ref=None):
+    access_token = RepoInfo.get_instance().get_access_token(get_repo_ref(repo_ref).server_address)
+    return {_CONTENT_TYPE: _APP_JSON, _HEADER_AUTH: _HEADER_BEARER + " " + str(access_token),
+            _ACCEPT_ENCODING: _GZIP, _CONNECTION: _KEEP_ALIVE}
+
+
+def check_rate_limit(status_code, rsp_headers, url):
+    # Rate limits are kept per server, a throttled server does not hold back the requests to the others
+    rate_governor = RateGovernor.get_instance(get_url_host(url))
+    if status_code == HTTP_TOO_MANY_REQUESTS:
+        raise RateLimitedError(url, rate_governor.on_rate_limited(rsp_headers.get(HEADER_RETRY_AFTER)))
+    rate_governor.on_success()
+
+
+def send_request(method, url, headers, body=None, cached_content=None):
+    """
+    Sends the request on the keep-alive session of its host, or serves it from the cassette in the replay mode
+    :param method: Method of the request, GET or POST
+    :param url: String representation of the url
+    :param headers: Request headers to be sent
+    :param body: JSON body of the request, None if it has no body
+    :param cached_content: Cached body of the url, recorded with the 304 responses in the record mode
+    :returns: *requests.Response* object
+    :raises requests.exceptions.RequestException: If the request fails
+    """
+    rest_cassette = RestCassette.get_instance()
+    if rest_cassette.is_replaying:
+        start_time = time.perf_counter()
+        rsp = rest_cassette.replay(method, url, headers, body)
+        record_request(url, start_time, rsp.status_code, len(rsp.content))
+        return rsp
+
+    host = get_url_host(url)
+    RateGovernor.get_instance(host).acquire()
+    start_time = time.perf_counter()
+    try:
+        # A server that stops responding fails the request, instead of holding a worker of its lane
+        rsp = SessionManager.get_instance().get_session(host).request(method, url, headers=headers, json=body,
+                                                                      timeout=constants.HTTP_REQUEST_TIMEOUT)
+    except requests.exceptions.RequestException:
+        record_request(url, start_time)
+        raise
+    record_request(url, start_time, rsp.status_code, len(rsp.content))
+    if rest_cassette.is_recording:
+        rest_cassette.record(method, url, headers, body, rsp, time.perf_counter() - start_time, cached_content)
+    return rsp
+
+
+def parse_json_body(url, body):
+    """
+    Parses the body of a response, a body that is not JSON (e.g. a login page of a proxy) fails like the request itself
+    :param url: String representation of the url
+    :param body: Body of the response as bytes
+    :returns: JSON content of the body
+    :raises InvalidResponseError: If the body is not valid JSON
+    """
+    try:
+        return json.loads(body)
+    except ValueError as e:
+        raise InvalidResponseError(e, url)
+
+
+def get_cached_json(url, cache_entry):
+    # A cached body that cannot be parsed is dropped, so the next request fetches the resource again
+    try:
+        return parse_json_body(url, cache_entry.body)
+    except InvalidResponseError:
+        HttpCache.get_instance().remove(url)
+        raise
+
+
+def get_json(url, headers):
+    # Cached responses are revalidated with a conditional request, the cached body is served on 304
+    http_cache = HttpCache.get_instance()
+    cache_entry = http_cache.get_entry(url)
+    if cache_entry:
+        headers = dict(headers, **cache_entry.get_validator_headers())
+
+    rsp = send_request(_GET, url, headers, cached_content=cache_entry.body if cache_entry else None)
+    check_rate_limit(rsp.status_code, rsp.headers, url)
+    if cache_entry and rsp.status_code == HTTP_NOT_MODIFIED:
+        return get_cached_json(url, cache_entry)
+    rsp.raise_for_status()
+    # Only the valid bodies are cached
+    rsp_json = parse_json_body(url, rsp.content)
+    http_cache.store(url, rsp.headers.get(HEADER_ETAG), rsp.headers.get(HEADER_LAST_MODIFIED), rsp.content)
+    return rsp_json
+
+
+def post_json(url, headers, body):
+    rsp = send_request(_POST, url, headers, body)
+    check_rate_limit(rsp.status_code, rsp.headers, url)
+    rsp.raise_for_status()
+    return parse_json_body(url, rsp.content)
+
+
+def get_page_values(rsp_json):
+    return rsp_json.get(_VALUES, [])
+
+
+def get_next_page_start(rsp_json):
+    if rsp_json[_IS_LAST_PAGE]:
+        return None
+    return rsp_json[_NEXT_PAGE_START]
+
+
+def warm_up_connection(repo_ref=None):
+    repo_ref = get_repo_ref(repo_ref)
+    if not RepoInfo.are_all_fields_set(repo_ref) or RestCassette.get_instance().is_replaying:
+        return None
+    return SessionManager.get_instance().warm_up(get_server_url(repo_ref), get_request_headers(repo_ref))
+
+
+class Paginator:
+    """
+    Lazy iterator over the values of a paged resource, e.g. the activities of a PR. Pages are requested with the given
+    limit one at a time, as the values are consumed, so a caller that stops early does not fetch the remaining pages.
+    Start of the next page is kept as a cursor: a page failing with a transient error is requested again from it, and
+    an interrupted iteration is resumed from it, without fetching the pages already read.
+    :param url: String representation of the url of the paged resource
+    :param headers: Request headers to be sent
+    :param limit: Maximum number of values in a page
+    :param start: Start of the first page to be fetched, the next page start of an earlier iteration to resume it
+    :param max_retries: Number of times a page is requested again after a transient error
+    """
+
+    def __init__(self, url, headers, limit=constants.PAGE_LIMIT, start=0, max_retries=constants.PAGE_RETRY_CNT):
+        self.url = url
+        self.headers = headers
+        self.limit = limit
+        self.next_start = start
+        self.max_retries = max_retries
+        self.page_cnt = 0
+        self.retry_cnt = 0
+
+    @property
+    def is_last_page_read(self):
+        return self.next_start is None
+
+    def get_next_page_url(self):
+        return get_page_rest_url(self.url, self.next_start, self.limit)
+
+    """
+    Moves the cursor past the fetched page.
+    :param rsp_json: JSON content of the page
+    :returns: List of the values of the page
+    :raises KeyError: If the page has no paging fields
+    """
+    def on_page(self, rsp_json):
+        values = get_page_values(rsp_json)
+        self.next_start = get_next_page_start(rsp_json)
+        self.page_cnt += 1
+        return values
+
+    """
+    Decides whether the failed page is requested again, only the connection errors and the timeouts are retried.
+    :param error: Exception raised while fetching the page
+    :returns: True, if the page is to be requested again, False, otherwise
+    """
+    def can_retry(self, error):
+        if not isinstance(error, _TRANSIENT_ERRORS) or self.retry_cnt >= self.max_retries:
+            return False
+        self.retry_cnt += 1
+        _logger.debug("[Paginator][%s] Page at %s is requested again, Error: %s", self.url, self.next_start, error)
+        return True
+
+    """
+    Fetches the page at the cursor.
+    :returns: List of the values of the page
+    :raises requests.exceptions.RequestException: If the page cannot be fetched, the cursor stays at the page
+    """
+    def fetch_next_page(self):
+        self.retry_cnt = 0
+        while True:
+            try:
+                return self.on_page(get_json(self.get_next_page_url(), self.headers))
+            except requests.exceptions.RequestException as e:
+                if not self.can_retry(e):
+                    raise
+
+    def __iter__(self):
+        while not self.is_last_page_read:
+            for value in self.fetch_next_page():
+                yield value
+
+
+def get_activities(pr_id, repo_ref=None):
+    if not pr_id:
+        return 0
+
+    repo_ref = get_repo_ref(repo_ref)
+    if not RepoInfo.are_all_fields_set(repo_ref):
+        return 0
+
+    paginator = Paginator(get_pr_activities_rest_url(pr_id, repo_ref), get_request_headers(repo_ref))
+    try:
+        activity_cnt = sum(1 for _ in paginator)
+    except (KeyError, TypeError):
+        return 0
+    except requests.exceptions.RequestException:
+        return 0
+
+    _logger.debug("[get_activities][%s] Activity Cnt: %d, Page Cnt: %d", pr_id, activity_cnt, paginator.page_cnt)
+    return activity_cnt
+
+
+def get_new_activities_paginator(pr_id, last_activity_id, repo_ref):
+    # Without a known activity, only the newest one is needed as the starting point of the PR
+    return Paginator(get_pr_activities_rest_url(pr_id, repo_ref), get_request_headers(repo_ref),
+                     limit=1 if last_activity_id is None else constants.PAGE_LIMIT)
+
+
+def is_new_activity(activity, last_activity_id):
+    # Activities are listed newest first, reading stops at the first known activity
+    return last_activity_id is None or activity[_ID] > last_activity_id
+
+
+def get_newest_activity_id(new_activities, last_activity_id):
+    if new_activities:
+        return new_activities[0][_ID]
+    return last_activity_id if last_activity_id is not None else 0
+
+
+def get_activity_description(activity):
+    user = activity.get(_USER) or {}
+    return str(activity.get(_ACTION, "")) + " by " + str(user.get(_DISPLAY_NAME, ""))
+
+
+def get_new_activities(pr_id, last_activity_id=None, repo_ref=None):
+    if not pr_id:
+        return [], last_activity_id
+
+    repo_ref = get_repo_ref(repo_ref)
+    if not RepoInfo.are_all_fields_set(repo_ref):
+        return [], last_activity_id
+
+    new_activities = []
+    try:
+        for activity in get_new_activities_paginator(pr_id, last_activity_id, repo_ref):
+            if not is_new_activity(activity, last_activity_id):
+                break
+            new_activities.append(activity)
+            if last_activity_id is None:
+                break
+    except (KeyError, TypeError):
+        return [], last_activity_id
+    except requests.exceptions.RequestException:
+        return [], last_activity_id
+
+    newest_activity_id = get_newest_activity_id(new_activities, last_activity_id)
+    _logger.debug("[get_new_activities][%s] New Activity Cnt: %d", pr_id, len(new_activities))
+    if last_activity_id is None:
+        return [], newest_activity_id
+    return new_activities, newest_activity_id
+
+
+class PrSnapshot:
+    """
+    State of a PR for a single check cycle. The PR resource is fetched once on creation, the merge check is fetched
+    lazily at most once, so all the checks of the cycle are answered from the same responses.
+    :param pr_id: String representation of the PR id
+    :param pr_json: JSON content of the PR resource
+    :param headers: Request headers to be used for the lazily fetched resources
+    :param merge_json: JSON content of the merge check, if it is already fetched
+    :param repo_ref: *RepoRef* of the repository of the PR, the repository in the settings by default
+    """
+
+    def __init__(self, pr_id, pr_json, headers, merge_json=None, repo_ref=None):
+        self.pr_id = pr_id
+        self.repo_ref = get_repo_ref(repo_ref)
+        self.pr_json = pr_json
+        self._headers = headers
+        self._merge_json = merge_json
+        self.throttled = False
+
+    @property
+    def key(self):
+        return self.repo_ref.get_pr_key(self.pr_id)
+
+    @property
+    def state(self):
+        return self.pr_json.get(_STATE)
+
+    @property
+    def is_merged(self):
+        return self.state == _MERGED_STR
+
+    @property
+    def latest_commit(self):
+        try:
+            return self.pr_json[_FROM_REF][_LATEST_COMMIT]
+        except (KeyError, TypeError):
+            return None
+
+    @property
+    def comment_count(self):
+        return (self.pr_json.get(_PROPERTIES) or {}).get(_COMMENT_COUNT, 0)
+
+    @property
+    def open_task_count(self):
+        return (self.pr_json.get(_PROPERTIES) or {}).get(_OPEN_TASK_COUNT, 0)
+
+    @property
+    def version(self):
+        return self.pr_json.get(_VERSION)
+
+    @property
+    def updated_date(self):
+        return self.pr_json.get(_UPDATED_DATE)
+
+    @property
+    def is_conflicted(self):
+        if self.is_merged:
+            return False
+        return bool(self._get_merge_json().get(_CONFLICTED, False))
+
+    @property
+    def can_merge(self):
+        if self.is_merged:
+            return False
+        return bool(self._get_merge_json().get(_CAN_MERGE, False))
+
+    @property
+    def needs_build_status(self):
+        return not self.is_merged and not self.is_conflicted and not self.can_merge
+
+    def fetch_merge_check(self):
+        if not self.is_merged:
+            self._get_merge_json()
+        return self
+
+    def get_build_status(self):
+        commit_sha = self.latest_commit
+        if not commit_sha:
+            return PrStatus.NO_STATUS
+        return get_commit_status(commit_sha, self._headers, self.repo_ref)
+
+    def _get_merge_json(self):
+        if self._merge_json is None:
+            merge_url = get_pr_merge_rest_url(self.pr_id, self.repo_ref)
+            try:
+                self._merge_json = get_json(merge_url, headers=self._headers)
+            except RateLimitedError:
+                # Merge check is unknown, the state of the PR cannot be resolved in this cycle
+                self.throttled = True
+                self._merge_json = {}
+            except requests.exceptions.RequestException:
+                self._merge_json = {}
+            watcher_logging.log_request(_logger, "[PrSnapshot][%s] %s", merge_url, self._merge_json)
+        return self._merge_json
+
+
+def fetch_pr_snapshot(pr_id, repo_ref=None):
+    if not pr_id:
+        return None
+
+    repo_ref = get_repo_ref(repo_ref)
+    if not RepoInfo.are_all_fields_set(repo_ref):
+        return None
+
+    pr_rest_target_url = get_pr_rest_url(pr_id, repo_ref)
+    headers = get_request_headers(repo_ref)
+
+    rsp_json = get_json(pr_rest_target_url, headers=headers)
+    watcher_logging.log_request(_logger, "[get_pr_snapshot][%s] %s", pr_rest_target_url, rsp_json)
+
+    return PrSnapshot(pr_id, rsp_json, headers, repo_ref=repo_ref)
+
+
+def get_pr_snapshot(pr_id, repo_ref=None):
+    try:
+        return fetch_pr_snapshot(pr_id, repo_ref)
+    except requests.exceptions.RequestException:
+        return None
+
+
+def get_status_from_stats(stats_json):
+    try:
+        successful = stats_json[_SUCCESSFUL]
+        in_progress = stats_json[_IN_PROGRESS]
+        failed = stats_json[_FAILED]
+    except (KeyError, TypeError):
+        return PrStatus.NO_STATUS
+
+    watcher_logging.log_request(_logger, "[get_status] SUCCESSFUL: %s, IN_PROGRESS: %s, FAILED: %s", successful,
+                                in_progress, failed)
+
+    if failed > 0:
+        return PrStatus.FAILED
+    elif in_progress > 0:
+        return PrStatus.IN_PROGRESS
+    elif successful > 0:
+        return PrStatus.SUCCESS
+    else:
+        return PrStatus.NO_STATUS
+
+
+class BuildStatusMemo:
+    """
+    Bounded memo of the build statuses keyed by commit SHA
+    * Terminal statuses (SUCCESS or FAILED with no builds in progress) are reused until the head commit of the PR
+      changes, other statuses expire after a short TTL
+    * This is a SINGLETON class
+    """
+
+    """ Singleton reference of the class. """
+    _instance = None
+
+    """ Virtually private declaration of class constructor. """
+    def __init__(self, max_size=constants.BUILD_STATUS_MEMO_SIZE, ttl=constants.BUILD_STATUS_MEMO_TTL):
+        if not BuildStatusMemo._instance:
+            self.max_size = max_size
+            self.ttl = ttl
+            self.hits = 0
+            self.misses = 0
+            self._entries = OrderedDict()
+            self._lock = threading.Lock()
+            BuildStatusMemo._instance = self
+
+    """ Method to retrieve the reference to the singleton class object. """
+    @staticmethod
+    def get_instance():
+        if not BuildStatusMemo._instance:
+            BuildStatusMemo()
+        return BuildStatusMemo._instance
+
+    """
+    Returns the memoized build status of the commit.
+    :param commit_sha: String representation of the commit SHA
+    :returns: *PrStatus* of the commit, None if it is not memoized or expired
+    """
+    def get(self, commit_sha):
+        with self._lock:
+            memo_entry = self._entries.get(commit_sha)
+            if memo_entry and (memo_entry[1] is None or memo_entry[1] > time.monotonic()):
+                self._entries.move_to_end(commit_sha)
+                self.hits += 1
+                return memo_entry[0]
+            self.misses += 1
+            return None
+
+    """
+    Resolves the build status of the commit from its build stats and memoizes it.
+    :param commit_sha: String representation of the commit SHA
+    :param stats_json: JSON content of the build stats of the commit
+    :returns: *PrStatus* of the commit
+    """
+    def store(self, commit_sha, stats_json):
+        pr_status = get_status_from_stats(stats_json)
+        in_progress = stats_json.get(_IN_PROGRESS, 0) if isinstance(stats_json, dict) else 0
+        is_terminal = pr_status in (PrStatus.SUCCESS, PrStatus.FAILED) and not in_progress
+        with self._lock:
+            self._entries[commit_sha] = (pr_status, None if is_terminal else time.monotonic() + self.ttl)
+            self._entries.move_to_end(commit_sha)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return pr_status
+
+    def get_stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    """
+    Drops the memoized build status of the commit, e.g. when a new build status of the commit is pushed.
+    :param commit_sha: String representation of the commit SHA
+    """
+    def invalidate(self, commit_sha):
+        with self._lock:
+            self._entries.pop(commit_sha, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def get_commit_status(commit_sha, headers=None, repo_ref=None):
+    if not commit_sha:
+        return PrStatus.NO_STATUS
+
+    repo_ref = get_repo_ref(repo_ref)
+    if not RepoInfo.are_all_fields_set(repo_ref):
+        return PrStatus.NO_STATUS
+
+    build_status_memo = BuildStatusMemo.get_instance()
+    memo_status = build_status_memo.get(commit_sha)
+    if memo_status is not None:
+        return memo_status
+
+    target_status_url = get_pr_status_rest_url(commit_sha, repo_ref)
+    if headers is None:
+        headers = get_request_headers(repo_ref)
+
+    try:
+        rsp_json = get_json(target_status_url, headers=headers)
+    except requests.exceptions.RequestException:
+        return PrStatus.NO_STATUS
+
+    watcher_logging.log_request(_logger, "[get_status][%s] %s", target_status_url, rsp_json)
+    return build_status_memo.store(commit_sha, rsp_json)
+
+
+def get_commit_chunks(commit_shas):
+    unique_shas = list(dict.fromkeys(commit_sha for commit_sha in commit_shas if commit_sha))
+    return [unique_shas[i:i + constants.BUILD_STATUS_BATCH_SIZE]
+            for i in range(0, len(unique_shas), constants.BUILD_STATUS_BATCH_SIZE)]
+
+
+def get_statuses_from_batch_stats(commit_chunk, stats_json):
+    if not isinstance(stats_json, dict):
+        return {commit_sha: PrStatus.NO_STATUS for commit_sha in commit_chunk}
+    build_status_memo = BuildStatusMemo.get_instance()
+    return {commit_sha: build_status_memo.store(commit_sha, stats_json.get(commit_sha)) for commit_sha in commit_chunk}
+
+
+def get_memoized_statuses(commit_shas):
+    build_status_memo = BuildStatusMemo.get_instance()
+    statuses = {}
+    for commit_sha in commit_shas:
+        if commit_sha and commit_sha not in statuses:
+            memo_status = build_status_memo.get(commit_sha)
+            if memo_status is not None:
+                statuses[commit_sha] = memo_status
+    return statuses
+
+
+def get_build_status_memo_stats():
+    return BuildStatusMemo.get_instance().get_stats()
+
+
+def get_commit_statuses(commit_shas, headers=None, repo_ref=None):
+    repo_ref = get_repo_ref(repo_ref)
+    if not RepoInfo.are_all_fields_set(repo_ref):
+        return {}
+
+    statuses = get_memoized_statuses(commit_shas)
+    target_stats_url = get_commits_stats_rest_url(repo_ref)
+    if headers is None:
+        headers = get_request_headers(repo_ref)
+
+    # Build stats of the commits, that are not memoized, are resolved with one request per chunk
+    for commit_chunk in get_commit_chunks(commit_sha for commit_sha in commit_shas if commit_sha not in statuses):
+        try:
+            rsp_json = post_json(target_stats_url, headers=headers, body=commit_chunk)
+        except RateLimitedError:
+            # Statuses of the chunk are left unknown, instead of reporting them as NO_STATUS
+            continue
+        except requests.exceptions.RequestException:
+            rsp_json = None
+        statuses.update(get_statuses_from_batch_stats(commit_chunk, rsp_json))
+    return statuses
+
+
+def group_snapshots_by_server(pr_snapshots):
+    # Build statuses are served per server, the PRs of all the repositories of a server are resolved together
+    server_snapshots = OrderedDict()
+    for pr_snapshot in pr_snapshots:
+        if pr_snapshot.needs_build_status:
+            server_snapshots.setdefault(pr_snapshot.repo_ref.server_address, []).append(pr_snapshot)
+    return server_snapshots
+
+
+def get_pr_statuses(pr_snapshots):
+    pr_statuses = {}
+    for server_snapshots in group_snapshots_by_server(pr_snapshots).values():
+        commit_statuses = get_commit_statuses([pr_snapshot.latest_commit for pr_snapshot in server_snapshots],
+                                              repo_ref=server_snapshots[0].repo_ref)
+        pr_statuses.update(get_pr_statuses_from_commit_statuses(server_snapshots, commit_statuses))
+    return pr_statuses
+
+
+def get_pr_statuses_from_commit_statuses(pr_snapshots, commit_statuses):
+    # PRs without a latest commit have no build status, PRs with an unknown commit status are left out
+    pr_statuses = {}
+    for pr_snapshot in pr_snapshots:
+        if not pr_snapshot.latest_commit:
+            pr_statuses[pr_snapshot.key] = PrStatus.NO_STATUS
+        elif pr_snapshot.latest_commit in commit_statuses:
+            pr_statuses[pr_snapshot.key] = commit_statuses[pr_snapshot.latest_commit]
+    return pr_statuses
+
+
+def is_pr_merged(pr_id, repo_ref=None):
+    pr_snapshot = get_pr_snapshot(pr_id, repo_ref)
+    if not pr_snapshot:
+        return False
+    return pr_snapshot.is_merged
+
+
+def is_pr_conflicted(pr_id, repo_ref=None):
+    pr_snapshot = get_pr_snapshot(pr_id, repo_ref)
+    if not pr_snapshot:
+        return False
+    return pr_snapshot.is_conflicted
+
+
+def is_ready_to_merge(pr_id, repo_ref=None):
+    pr_snapshot = get_pr_snapshot(pr_id, repo_ref)
+    if not pr_snapshot:
+        return False
+    return pr_snapshot.can_merge
+
+
+def get_status(pr_id, repo_ref=None):
+    pr_snapshot = get_pr_snapshot(pr_id, repo_ref)
+    if not pr_snapshot:
+        return PrStatus.NO_STATUS
+    return pr_snapshot.get_build_status()
+
+
+def does_pr_exist(pr_id, repo_ref=None):
+    if not pr_id:
+        return 0
+
+    repo_ref = get_repo_ref(repo_ref)
+    if not RepoInfo.are_all_fields_set(repo_ref):
+        return 0
+
+    return get_pr_snapshot(pr_id, repo_ref) is not None
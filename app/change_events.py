@@ -0,0 +1,261 @@
+"""
+Functionality definition of the change events of the watched PRs and their coalesced digest notifications
+* Changes found by the poller are reported as typed events, instead of a free-form message for each PR
+* Events that arrive in the same window are merged into one digest, e.g. a moved target branch turning many PRs into
+  CONFLICT in one cycle gives one notification instead of one for each PR
+* Status changes that are reverted within the window are dropped, PRs flapping between statuses over a longer period
+  are held back until they settle
+* Nothing from Qt is imported here, the digest is handed to a callback
+"""
+import enum
+import threading
+import time
+from collections import OrderedDict, deque
+from app import bitbucket_rest_interaction, constants_def as constants
+from app.bitbucket_rest_interaction import PrStatus
+
+DIGEST_TITLE = "Changes of the watched PRs:"
+
+
+class ChangeEventType(enum.Enum):
+    STATUS_CHANGED = 1
+    COMMENTS_CHANGED = 2
+
+
+def get_activities_text(new_activities):
+    activities_text = ""
+    for activity in new_activities[:constants.NOTIFICATION_MAX_ACTIVITIES]:
+        activities_text += "\n    * " + bitbucket_rest_interaction.get_activity_description(activity)
+    if len(new_activities) > constants.NOTIFICATION_MAX_ACTIVITIES:
+        activities_text += "\n    * and " + str(len(new_activities) - constants.NOTIFICATION_MAX_ACTIVITIES) + " more"
+    return activities_text
+
+
+def get_pr_names_text(pr_list):
+    pr_names_text = ", ".join(pr.get_display_name() for pr in pr_list[:constants.NOTIFICATION_DIGEST_MAX_PRS])
+    if len(pr_list) > constants.NOTIFICATION_DIGEST_MAX_PRS:
+        pr_names_text += " and " + str(len(pr_list) - constants.NOTIFICATION_DIGEST_MAX_PRS) + " more"
+    return pr_names_text
+
+
+class ChangeEvent:
+    """
+    Change of a watched PR
+    :param event_type: *ChangeEventType* of the change
+    :param pr: *PrRecord* object of the PR
+    :param old_status: *PrStatus* of the PR before the change, for the status changes
+    :param new_status: *PrStatus* of the PR after the change, for the status changes
+    :param activities: List of the new activities of the PR, newest first, for the comment changes
+    """
+
+    __slots__ = ('event_type', 'pr', 'old_status', 'new_status', 'activities', 'time')
+
+    def __init__(self, event_type, pr, old_status=None, new_status=None, activities=()):
+        self.event_type = event_type
+        self.pr = pr
+        self.old_status = old_status
+        self.new_status = new_status
+        self.activities = list(activities)
+        self.time = time.time()
+
+    @staticmethod
+    def status_changed(pr, old_status, new_status):
+        return ChangeEvent(ChangeEventType.STATUS_CHANGED, pr, old_status=old_status, new_status=new_status)
+
+    @staticmethod
+    def comments_changed(pr, activities):
+        return ChangeEvent(ChangeEventType.COMMENTS_CHANGED, pr, activities=activities)
+
+
+class ChangeDigest:
+    """
+    Merged changes of a coalescing window, to be shown in one notification
+    :param events: List of *ChangeEvent* objects, at most one of each type for a PR
+    :param flapping_prs: List of *PrRecord* objects, that started flapping in the window
+    :param title: Title of the notification
+    """
+
+    def __init__(self, events, flapping_prs=(), title=DIGEST_TITLE):
+        self.events = events
+        self.flapping_prs = list(flapping_prs)
+        self.title = title
+
+    @property
+    def pr_list(self):
+        return list(OrderedDict((event.pr.key, event.pr) for event in self.events).values())
+
+    @property
+    def pr_key(self):
+        pr_list = self.pr_list
+        return pr_list[0].key if len(pr_list) == 1 and not self.flapping_prs else None
+
+    def get_text(self):
+        pr_list = self.pr_list
+        if len(pr_list) == 1 and not self.flapping_prs:
+            return self._get_pr_text(pr_list[0])
+
+        digest_text = self.title
+        status_events = OrderedDict()
+        comment_prs = []
+        for event in self.events:
+            if event.event_type == ChangeEventType.STATUS_CHANGED:
+                status_events.setdefault(event.new_status, []).append(event.pr)
+            else:
+                comment_prs.append(event.pr)
+        for new_status, status_prs in status_events.items():
+            digest_text += "\n- " + PrStatus(new_status).name + " (" + str(len(status_prs)) + "): " + \
+                           get_pr_names_text(status_prs)
+        if comment_prs:
+            digest_text += "\n- New changes in comment section (" + str(len(comment_prs)) + "): " + \
+                           get_pr_names_text(comment_prs)
+        if self.flapping_prs:
+            digest_text += "\n- Flapping, status updates are held back (" + str(len(self.flapping_prs)) + "): " + \
+                           get_pr_names_text(self.flapping_prs)
+        return digest_text
+
+    def _get_pr_text(self, pr):
+        pr_text = "Changes for " + pr.get_display_name() + ":"
+        change_cnt = 0
+        for event in self.events:
+            change_cnt += 1
+            if event.event_type == ChangeEventType.COMMENTS_CHANGED:
+                pr_text += "\n" + str(change_cnt) + "- New changes in comment section." + \
+                    get_activities_text(event.activities)
+            else:
+                pr_text += "\n" + str(change_cnt) + "- Status is updated from " + PrStatus(event.old_status).name + \
+                    " to " + PrStatus(event.new_status).name + "."
+        return pr_text
+
+
+class _PendingChanges:
+
+    __slots__ = ('pr', 'old_status', 'new_status', 'activities', 'comments_changed')
+
+    def __init__(self, pr):
+        self.pr = pr
+        self.old_status = None
+        self.new_status = None
+        self.activities = []
+        self.comments_changed = False
+
+
+class ChangeCoalescer:
+    """
+    Merges the change events of a window into one digest
+    * The window starts with the first event after a digest, so a steady stream of events gives a digest per window
+    * Status changes of a PR in the window are merged from its first old status to its last new status
+    * A PR is flapping, when its status changes too often in the flap window. Its status changes are held back until
+      it settles, then the settled status is reported once.
+    :param on_digest: Function to be called with the *ChangeDigest*, called on the timer thread of the window
+    :param window: Coalescing window in seconds
+    :param flap_window: Period in seconds, that the status changes of a PR are counted in
+    :param flap_threshold: Number of the status changes in the flap window, that the PR is counted as flapping from
+    :param clock: Function returning the current time in seconds, monotonic clock by default
+    """
+
+    def __init__(self, on_digest, window=constants.NOTIFICATION_COALESCE_WINDOW,
+                 flap_window=constants.NOTIFICATION_FLAP_WINDOW, flap_threshold=constants.NOTIFICATION_FLAP_THRESHOLD,
+                 clock=time.monotonic):
+        self.on_digest = on_digest
+        self.window = window
+        self.flap_window = flap_window
+        self.flap_threshold = flap_threshold
+        self._clock = clock
+        self._pending = OrderedDict()
+        self._transition_times = {}
+        self._held_statuses = {}
+        self._timer = None
+        self._lock = threading.Lock()
+
+    """
+    Adds the events to the current window, and starts the window if it is not started yet.
+    :param events: List of *ChangeEvent* objects
+    """
+    def add(self, events):
+        with self._lock:
+            for event in events:
+                self._add_event(event)
+            if (self._pending or self._held_statuses) and not self._timer:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    """
+    Ends the current window and reports its digest, if there are any changes to be reported.
+    :param title: Title of the digest
+    :returns: *ChangeDigest* object, None if there is nothing to be reported
+    """
+    def flush(self, title=DIGEST_TITLE):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            events, flapping_prs = self._take_events()
+            # Held back PRs are checked again in the next window, until they settle
+            if self._held_statuses:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if not events and not flapping_prs:
+            return None
+        change_digest = ChangeDigest(events, flapping_prs, title)
+        self.on_digest(change_digest)
+        return change_digest
+
+    def _add_event(self, event):
+        pr_key = event.pr.key
+        pending_changes = self._pending.get(pr_key)
+        if not pending_changes:
+            pending_changes = self._pending[pr_key] = _PendingChanges(event.pr)
+        if event.event_type == ChangeEventType.STATUS_CHANGED:
+            if pending_changes.old_status is None:
+                pending_changes.old_status = event.old_status
+            pending_changes.new_status = event.new_status
+            self._record_transition(pr_key)
+        else:
+            pending_changes.comments_changed = True
+            pending_changes.activities = event.activities + pending_changes.activities
+
+    def _record_transition(self, pr_key):
+        now = self._clock()
+        transition_times = self._transition_times.setdefault(pr_key, deque())
+        transition_times.append(now)
+        while transition_times and transition_times[0] < now - self.flap_window:
+            transition_times.popleft()
+
+    def _is_flapping(self, pr_key):
+        transition_times = self._transition_times.get(pr_key)
+        if not transition_times:
+            return False
+        while transition_times and transition_times[0] < self._clock() - self.flap_window:
+            transition_times.popleft()
+        return len(transition_times) >= self.flap_threshold
+
+    def _take_events(self):
+        events = []
+        flapping_prs = []
+        for pr_key, pending_changes in self._pending.items():
+            if pending_changes.comments_changed:
+                events.append(ChangeEvent.comments_changed(pending_changes.pr, pending_changes.activities))
+            if pending_changes.new_status is None:
+                continue
+            if self._is_flapping(pr_key):
+                if pr_key not in self._held_statuses:
+                    self._held_statuses[pr_key] = (pending_changes.pr, pending_changes.old_status)
+                    flapping_prs.append(pending_changes.pr)
+                continue
+            old_status = self._held_statuses.pop(pr_key, (None, pending_changes.old_status))[1]
+            # Status changes reverted in the window are dropped
+            if pending_changes.new_status != old_status:
+                events.append(ChangeEvent.status_changed(pending_changes.pr, old_status, pending_changes.new_status))
+        self._pending.clear()
+
+        # Held back PRs without any changes in the flap window are settled, their final statuses are reported
+        for pr_key, (pr, old_status) in list(self._held_statuses.items()):
+            if not self._is_flapping(pr_key) and not self._transition_times.get(pr_key):
+                del self._held_statuses[pr_key]
+                if pr.status != old_status:
+                    events.append(ChangeEvent.status_changed(pr, old_status, pr.status))
+        for pr_key in [pr_key for pr_key, transition_times in self._transition_times.items() if not transition_times]:
+            del self._transition_times[pr_key]
+        return events, flapping_prs
@@ -1,20 +1,20 @@
-"""
-Hex code definition of the colors as string
-"""
-FAILED_BG = "#FF5630"
-FAILED_FG = "#000000"
-
-SUCCESS_BG = "#36B37E"
-SUCCESS_FG = "#000000"
-
-IN_PROGRESS_BG = "#5243AA"
-IN_PROGRESS_FG = "#FFFFFF"
-
-CONFLICT_BG = "#FFAB00"
-CONFLICT_FG = "#000000"
-
-DEFAULT_BG = "#FFFFFF"
-DEFAULT_FG = "#000000"
-
-MERGED_BG = "#00875a"
-MERGED_FG = "#FFFFFF"
+"""
+Hex code definition of the colors as string
+"""
+FAILED_BG = "#FF5630"
+FAILED_FG = "#000000"
+
+SUCCESS_BG = "#36B37E"
+SUCCESS_FG = "#000000"
+
+IN_PROGRESS_BG = "#5243AA"
+IN_PROGRESS_FG = "#FFFFFF"
+
+CONFLICT_BG = "#FFAB00"
+CONFLICT_FG = "#000000"
+
+DEFAULT_BG = "#FFFFFF"
+DEFAULT_FG = "#000000"
+
+MERGED_BG = "#00875a"
+MERGED_FG = "#FFFFFF"
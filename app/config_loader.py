@@ -0,0 +1,165 @@
+"""
+Functionality definition of the file and environment based configuration, used by the headless watcher instead of
+the registry
+* Configuration file is a JSON object, e.g.
+  {"server_address": "api.bitbucket.org", "api_version": "1.0", "project_name": "PROJECT", "repo_name": "repo",
+   "access_token": "...", "server_access_tokens": {"other.server": "..."}, "prs": ["12", "https://other.server/..."]}
+* Environment variables override the values of the file, PR_WATCHER_CONFIG gives the path of the file
+* Webhook receiver is started, if "webhook_port" and "webhook_secret" are set
+* Metrics endpoint is started on the local machine, if "metrics_port" is set
+* Logging is set with "log_level", "log_levels" of the modules, e.g. {"pr_poller": "DEBUG"}, and "log_sample_rate" of
+  the debug records of the requests
+* REST requests are recorded to the cassette of "cassette_record", or served from the cassette of "cassette_replay"
+  at "cassette_speed" times the recorded speed, for profiling real workloads offline
+"""
+import json
+import os
+from app import constants_def as constants, watcher_logging
+from app.exception_definitions.config_cannot_be_read_error import ConfigCannotBeReadError
+from app.repo_info import RepoInfo
+from app.rest_cassette import RestCassette
+
+""" Configuration keys """
+CONFIG_ACCESS_TOKEN = "access_token"
+CONFIG_API_VERSION = "api_version"
+CONFIG_SERVER_ADDRESS = "server_address"
+CONFIG_PROJECT_NAME = "project_name"
+CONFIG_REPO_NAME = "repo_name"
+CONFIG_SERVER_ACCESS_TOKENS = "server_access_tokens"
+CONFIG_PRS = "prs"
+CONFIG_USE_ASYNC_ENGINE = "use_async_engine"
+CONFIG_WEBHOOK_PORT = "webhook_port"
+CONFIG_WEBHOOK_SECRET = "webhook_secret"
+CONFIG_METRICS_PORT = "metrics_port"
+CONFIG_LOG_LEVEL = "log_level"
+CONFIG_LOG_LEVELS = "log_levels"
+CONFIG_LOG_SAMPLE_RATE = "log_sample_rate"
+CONFIG_CASSETTE_RECORD = "cassette_record"
+CONFIG_CASSETTE_REPLAY = "cassette_replay"
+CONFIG_CASSETTE_SPEED = "cassette_speed"
+
+""" Environment variable names """
+ENV_CONFIG_PATH = "PR_WATCHER_CONFIG"
+_ENV_NAMES = {
+    CONFIG_ACCESS_TOKEN: "PR_WATCHER_ACCESS_TOKEN",
+    CONFIG_API_VERSION: "PR_WATCHER_API_VERSION",
+    CONFIG_SERVER_ADDRESS: "PR_WATCHER_SERVER_ADDRESS",
+    CONFIG_PROJECT_NAME: "PR_WATCHER_PROJECT_NAME",
+    CONFIG_REPO_NAME: "PR_WATCHER_REPO_NAME",
+    CONFIG_SERVER_ACCESS_TOKENS: "PR_WATCHER_SERVER_ACCESS_TOKENS",
+    CONFIG_PRS: "PR_WATCHER_PRS",
+    CONFIG_USE_ASYNC_ENGINE: "PR_WATCHER_USE_ASYNC_ENGINE",
+    CONFIG_WEBHOOK_PORT: "PR_WATCHER_WEBHOOK_PORT",
+    CONFIG_WEBHOOK_SECRET: "PR_WATCHER_WEBHOOK_SECRET",
+    CONFIG_METRICS_PORT: "PR_WATCHER_METRICS_PORT",
+    CONFIG_LOG_LEVEL: "PR_WATCHER_LOG_LEVEL",
+    CONFIG_LOG_LEVELS: "PR_WATCHER_LOG_LEVELS",
+    CONFIG_LOG_SAMPLE_RATE: "PR_WATCHER_LOG_SAMPLE_RATE",
+    CONFIG_CASSETTE_RECORD: "PR_WATCHER_CASSETTE_RECORD",
+    CONFIG_CASSETTE_REPLAY: "PR_WATCHER_CASSETTE_REPLAY",
+    CONFIG_CASSETTE_SPEED: "PR_WATCHER_CASSETTE_SPEED",
+}
+
+_TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+def read_config_file(config_path):
+    """
+    Reads the JSON configuration file
+    :param config_path: Path of the configuration file
+    :returns: Dictionary of the configuration values
+    :raises ConfigCannotBeReadError: If the file cannot be read, or it is not a JSON object
+    """
+    try:
+        with open(config_path, "r", encoding="utf-8") as config_file:
+            config = json.load(config_file)
+    except (OSError, ValueError) as e:
+        raise ConfigCannotBeReadError(e, config_path)
+    if not isinstance(config, dict):
+        raise ConfigCannotBeReadError("Configuration is not a JSON object!", config_path)
+    return config
+
+
+def read_config_env(environ):
+    """
+    Reads the configuration values from the environment. Server access tokens are given as
+    "server_address=access_token" pairs separated with ";", PRs are given as links or ids separated with "," or spaces.
+    Levels of the modules are given as "module=LEVEL" pairs separated with ";".
+    :param environ: Dictionary of the environment variables
+    :returns: Dictionary of the configuration values that are set in the environment
+    """
+    config = {}
+    for config_key, env_name in _ENV_NAMES.items():
+        if environ.get(env_name):
+            config[config_key] = environ[env_name]
+    if CONFIG_SERVER_ACCESS_TOKENS in config:
+        config[CONFIG_SERVER_ACCESS_TOKENS] = RepoInfo.parse_server_access_tokens(config[CONFIG_SERVER_ACCESS_TOKENS])
+    if CONFIG_PRS in config:
+        config[CONFIG_PRS] = config[CONFIG_PRS].replace(",", " ").split()
+    if CONFIG_USE_ASYNC_ENGINE in config:
+        config[CONFIG_USE_ASYNC_ENGINE] = config[CONFIG_USE_ASYNC_ENGINE].strip().lower() in _TRUE_VALUES
+    if CONFIG_LOG_LEVELS in config:
+        config[CONFIG_LOG_LEVELS] = watcher_logging.parse_module_levels(config[CONFIG_LOG_LEVELS])
+    return config
+
+
+def load_config(config_path=None, environ=None):
+    """
+    Loads the configuration from the file and the environment, values of the environment override the file
+    :param config_path: Path of the configuration file, PR_WATCHER_CONFIG is used if it is not given
+    :param environ: Dictionary of the environment variables, environment of the process by default
+    :returns: Dictionary of the configuration values
+    :raises ConfigCannotBeReadError: If the configuration file cannot be read
+    """
+    environ = os.environ if environ is None else environ
+    config_path = config_path or environ.get(ENV_CONFIG_PATH)
+    config = read_config_file(config_path) if config_path else {}
+    config.update(read_config_env(environ))
+    return config
+
+
+def apply_config(config):
+    """
+    Sets the repository info from the configuration
+    :param config: Dictionary of the configuration values
+    """
+    repo_info = RepoInfo.get_instance()
+    repo_info.access_token = str(config.get(CONFIG_ACCESS_TOKEN, repo_info.access_token))
+    repo_info.api_version = str(config.get(CONFIG_API_VERSION, repo_info.api_version))
+    repo_info.server_address = str(config.get(CONFIG_SERVER_ADDRESS, repo_info.server_address))
+    repo_info.project_name = str(config.get(CONFIG_PROJECT_NAME, repo_info.project_name))
+    repo_info.repo_name = str(config.get(CONFIG_REPO_NAME, repo_info.repo_name))
+    repo_info.server_access_tokens = dict(config.get(CONFIG_SERVER_ACCESS_TOKENS) or {})
+
+
+def apply_logging_config(config, stream=None):
+    """
+    Sets up the logging from the configuration
+    :param config: Dictionary of the configuration values
+    :param stream: Text stream to write the records to, stderr by default
+    :raises ValueError: If a level or the sample rate is not valid
+    """
+    watcher_logging.configure_logging(config.get(CONFIG_LOG_LEVEL) or constants.LOG_LEVEL,
+                                      dict(config.get(CONFIG_LOG_LEVELS) or {}),
+                                      float(config.get(CONFIG_LOG_SAMPLE_RATE, constants.LOG_REQUEST_SAMPLE_RATE)),
+                                      stream)
+
+
+def apply_cassette_config(config):
+    """
+    Starts recording or replaying the REST requests, if a cassette is configured
+    :param config: Dictionary of the configuration values
+    :returns: True, if a cassette is started, False, otherwise
+    :raises OSError: If the cassette cannot be opened
+    :raises ValueError: If both recording and replaying are configured, or the speed is not valid
+    """
+    record_path = config.get(CONFIG_CASSETTE_RECORD)
+    replay_path = config.get(CONFIG_CASSETTE_REPLAY)
+    if record_path and replay_path:
+        raise ValueError("Cassette cannot be recorded and replayed at the same time!")
+    if record_path:
+        RestCassette.get_instance().start_recording(str(record_path))
+    elif replay_path:
+        RestCassette.get_instance().start_replaying(str(replay_path), float(
+            config.get(CONFIG_CASSETTE_SPEED, constants.CASSETTE_REPLAY_SPEED)))
+    return bool(record_path or replay_path)
@@ -1,43 +1,110 @@
-"""
-Definition of global constant variables
-"""
-"""
-ACCESS_TOKEN = ""
-API_VERSION = ""
-SERVER_ADDRESS = ""
-PROJECT_NAME = ""
-REPO_NAME = ""
-"""
-
-FAILED = "FAILED"
-SUCCESS = "SUCCESS"
-IN_PROGRESS = "IN_PROGRESS"
-CONFLICT = "CONFLICT"
-NO_STATUS = "NO_STATUS"
-INVALID = "INVALID"
-MERGED = "MERGED"
-READY_TO_MERGE = "READY_TO_MERGE"
-
-VALID_STATS = [FAILED, SUCCESS, IN_PROGRESS, CONFLICT, MERGED, READY_TO_MERGE]
-
-APP_ICON = "mk_icon.ico"
-
-HORIZONTAL_SPACE = 5
-HORIZONTAL_PADDING = 10
-VERTICAL_SPACE = 5
-VERTICAL_PADDING = 10
-
-
-DEFAULT_WIN_TOP = 10
-DEFAULT_WIN_LEFT = 10
-DEFAULT_WIN_WIDTH = 300
-
-DEFAULT_BTN_HEIGHT = 30
-DEFAULT_BTN_WIDTH = 70
-DEFAULT_LABEL_HEIGHT = 20
-DEFAULT_CONTAINER_HEIGHT = 220
-
-OPTIONS_WIDTH = 320
-
-EDIT_LINE_STYLESHEET_DEFAULT = "border:1px solid black;"
-EDIT_LINE_STYLESHEET_CHANGED = "border:1px solid red;"
+"""
+Definition of global constant variables
+"""
+"""
+ACCESS_TOKEN = ""
+API_VERSION = ""
+SERVER_ADDRESS = ""
+PROJECT_NAME = ""
+REPO_NAME = ""
+"""
+
+FAILED = "FAILED"
+SUCCESS = "SUCCESS"
+IN_PROGRESS = "IN_PROGRESS"
+CONFLICT = "CONFLICT"
+NO_STATUS = "NO_STATUS"
+INVALID = "INVALID"
+MERGED = "MERGED"
+READY_TO_MERGE = "READY_TO_MERGE"
+
+VALID_STATS = [FAILED, SUCCESS, IN_PROGRESS, CONFLICT, MERGED, READY_TO_MERGE]
+
+APP_ICON = "mk_icon.ico"
+
+HORIZONTAL_SPACE = 5
+HORIZONTAL_PADDING = 10
+VERTICAL_SPACE = 5
+VERTICAL_PADDING = 10
+
+
+DEFAULT_WIN_TOP = 10
+DEFAULT_WIN_LEFT = 10
+DEFAULT_WIN_WIDTH = 300
+
+DEFAULT_BTN_HEIGHT = 30
+DEFAULT_BTN_WIDTH = 70
+DEFAULT_LABEL_HEIGHT = 20
+DEFAULT_CONTAINER_HEIGHT = 220
+LIST_REFRESH_INTERVAL_MS = 16
+MSG_BOX_TICK_INTERVAL_MS = 250
+
+OPTIONS_WIDTH = 320
+
+EDIT_LINE_STYLESHEET_DEFAULT = "border:1px solid black;"
+EDIT_LINE_STYLESHEET_CHANGED = "border:1px solid red;"
+
+HTTP_POOL_SIZE_PER_HOST = 10
+HTTP_WARM_UP_TIMEOUT = 10
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 30
+HTTP_REQUEST_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+POLL_CONCURRENCY_PER_HOST = 8
+POLL_USE_ASYNC_ENGINE = False
+ASYNC_REQUEST_CONCURRENCY_PER_HOST = 32
+
+APP_DATA_DIR_NAME = ".pr_watcher"
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_FILE_NAME = "http_cache.db"
+HTTP_CACHE_MAX_BYTES = 32 * 1024 * 1024
+HTTP_CACHE_FLUSH_INTERVAL = 30
+
+WATCH_LIST_STORE_ENABLED = True
+WATCH_LIST_STORE_FILE_NAME = "watch_list.db"
+WARM_START_MAX_DELAY = 30
+
+PAGE_LIMIT = 50
+PAGE_RETRY_CNT = 2
+
+BUILD_STATUS_BATCH_SIZE = 100
+BUILD_STATUS_MEMO_SIZE = 4096
+BUILD_STATUS_MEMO_TTL = 5
+
+NOTIFICATION_MAX_ACTIVITIES = 5
+NOTIFICATION_DIGEST_MAX_PRS = 10
+NOTIFICATION_COALESCE_WINDOW = 5
+NOTIFICATION_FLAP_WINDOW = 300
+NOTIFICATION_FLAP_THRESHOLD = 5
+
+POLL_INTERVAL_IN_PROGRESS = 10
+POLL_INTERVAL_READY_TO_MERGE = 30
+POLL_INTERVAL_CONFLICT = 30
+POLL_INTERVAL_DEFAULT = 20
+POLL_INTERVAL_MERGED = 900
+POLL_BACKOFF_MAX = 300
+POLL_JITTER_RATIO = 0.1
+POLL_SCHEDULER_MAX_WAIT = 1
+
+RATE_LIMIT_INITIAL_RATE = 10.0
+RATE_LIMIT_MIN_RATE = 0.5
+RATE_LIMIT_MAX_RATE = 50.0
+RATE_LIMIT_BURST = 20
+RATE_LIMIT_RECOVERY_STEP = 0.05
+RATE_LIMIT_DECREASE_FACTOR = 0.5
+RATE_LIMIT_DEFAULT_RETRY_AFTER = 30
+
+WEBHOOK_HOST = "0.0.0.0"
+WEBHOOK_MAX_BODY_BYTES = 1024 * 1024
+WEBHOOK_RECONCILIATION_INTERVAL = 600
+
+LOG_LEVEL = "INFO"
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s][%(trace_id)s] %(message)s"
+LOG_REQUEST_SAMPLE_RATE = 0.1
+
+CASSETTE_REPLAY_SPEED = 1.0
+
+METRICS_HOST = "127.0.0.1"
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_CYCLE_DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+METRICS_CYCLE_PRS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
@@ -0,0 +1,10 @@
+class ConfigCannotBeReadError(Exception):
+
+    """
+    Custom exception definition, that will be raised in case of an error in reading process of the configuration file
+    :param msg: The custom message to be shown.
+    :param config_path: Path of the configuration file
+    """
+    def __init__(self, msg, config_path):
+        super().__init__("Configuration Cannot be Read! Msg: " + str(msg))
+        self.config_path = config_path
@@ -0,0 +1,13 @@
+import requests
+
+
+class InvalidResponseError(requests.exceptions.RequestException):
+
+    """
+    Custom exception definition, that will be raised when the body of a response or a cached response is not valid JSON
+    :param msg: The custom message to be shown.
+    :param url: Url of the request
+    """
+    def __init__(self, msg, url):
+        super().__init__("Response is not Valid JSON! Msg: " + str(msg) + " Url: " + str(url))
+        self.url = url
@@ -0,0 +1,14 @@
+import requests
+
+
+class NoRecordedResponseError(requests.exceptions.RequestException):
+
+    """
+    Custom exception definition, that will be raised when a replayed cassette has no response for a request
+    :param method: Method of the request
+    :param url: Url of the request
+    """
+    def __init__(self, method, url):
+        super().__init__("No Recorded Response! Request: " + str(method) + " " + str(url))
+        self.method = method
+        self.url = url
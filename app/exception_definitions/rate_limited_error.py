@@ -0,0 +1,13 @@
+import requests
+
+
+class RateLimitedError(requests.exceptions.RequestException):
+
+    """
+    Custom exception definition, that will be raised when a request is rejected or held back by the rate limit
+    :param msg: The custom message to be shown.
+    :param retry_after: Seconds to wait before the next request, as requested by the server
+    """
+    def __init__(self, msg, retry_after):
+        super().__init__("Request is Rate Limited! Msg: " + str(msg))
+        self.retry_after = retry_after
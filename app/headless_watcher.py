@@ -0,0 +1,195 @@
+"""
+Headless entry point of the watcher, for build machines and containers
+* Runs the same poller as the tray application, without importing Qt or reading the registry
+* Configuration is read from a JSON file and the environment, see *config_loader*
+* Changes of the PRs are written to stdout as JSON lines, the diagnostic output of the watcher is written to stderr
+* Changes can be pushed by Bitbucket webhooks instead of being polled, when "webhook_port" and "webhook_secret" are
+  configured
+* Metrics of the requests and the cycles are served on the local machine when "metrics_port" is configured, and are
+  dumped to stderr on SIGUSR1
+* REST requests can be recorded to a cassette and replayed without the network, see *rest_cassette*
+* Usage: python -m app.headless_watcher [--config PATH] [--async-engine]
+"""
+import argparse
+import contextlib
+import json
+import signal
+import sys
+import threading
+import time
+from app import bitbucket_rest_interaction, config_loader, pr_poller
+from app.exception_definitions.config_cannot_be_read_error import ConfigCannotBeReadError
+from app.metrics import MetricsServer, install_dump_signal
+from app.pr_list_manager import PrListManager
+from app.rest_cassette import RestCassette
+from app.webhook_receiver import WebhookReceiver
+
+""" Event names of the JSON lines """
+EVENT_PR_ADDED = "pr_added"
+EVENT_PR_RESTORED = "pr_restored"
+EVENT_PR_NOT_FOUND = "pr_not_found"
+EVENT_PR_UPDATED = "pr_updated"
+EVENT_PRS_REMOVED = "prs_removed"
+
+
+def get_pr_fields(pr):
+    return {"server_address": pr.repo.server_address, "project_name": pr.repo.project_name,
+            "repo_name": pr.repo.repo_name, "pr_id": pr.id, "link": pr.link, "status": pr.status_text}
+
+
+class JsonLinesListener(pr_poller.PrPollerListener):
+    """
+    Listener of the poller writing the changes of the PRs as JSON lines
+    :param stream: Text stream to write the lines to
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps(dict({"event": event, "time": round(time.time(), 3)}, **fields))
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def on_pr_updated(self, pr_update):
+        self.emit(EVENT_PR_UPDATED, old_status=bitbucket_rest_interaction.PrStatus(pr_update.old_status).name,
+                  status_changed=pr_update.status_changed, comments_changed=pr_update.comments_changed,
+                  new_activities=[bitbucket_rest_interaction.get_activity_description(activity)
+                                  for activity in pr_update.new_activities],
+                  **get_pr_fields(pr_update.pr))
+
+    def on_prs_removed(self):
+        self.emit(EVENT_PRS_REMOVED)
+
+
+def watch_prs(pr_links, listener):
+    """
+    Adds the PRs of the configuration to the watch-list
+    :param pr_links: List of the links or the ids of the PRs
+    :param listener: *JsonLinesListener* object to report the added PRs
+    """
+    pr_list_manager = PrListManager.get_instance()
+    for pr_link in pr_links:
+        pr_ref = bitbucket_rest_interaction.parse_pr_link(str(pr_link))
+        pr = pr_poller.create_pr_record(pr_ref[1], pr_ref[0]) if pr_ref else None
+        if not pr:
+            listener.emit(EVENT_PR_NOT_FOUND, link=str(pr_link))
+            continue
+        if pr_list_manager.add_pr(pr):
+            listener.emit(EVENT_PR_ADDED, **get_pr_fields(pr))
+
+
+def get_port(config, config_key):
+    """
+    Reads a port from the configuration
+    :param config: Dictionary of the configuration values
+    :param config_key: Key of the port
+    :returns: Port number, None if it is not set
+    :raises ValueError: If the port is not a valid port number
+    """
+    port = config.get(config_key)
+    if not port:
+        return None
+    port = int(port)
+    if not 0 < port < 65536:
+        raise ValueError("Port " + str(port) + " of " + config_key + " is out of range!")
+    return port
+
+
+def bind_servers(config, poller):
+    """
+    Binds the ports of the metrics endpoint and the webhook receiver, that are configured. The metrics endpoint is
+    started at once, the webhook receiver is started by the caller.
+    :param config: Dictionary of the configuration values
+    :param poller: *PrPoller* object to pass the webhook events to
+    :returns: Tuple of the *MetricsServer* and the *WebhookReceiver* objects, None for the ones not configured
+    :raises OSError: If a port cannot be bound, e.g. it is already in use
+    :raises ValueError: If a port is not valid
+    """
+    metrics_port = get_port(config, config_loader.CONFIG_METRICS_PORT)
+    webhook_port = get_port(config, config_loader.CONFIG_WEBHOOK_PORT)
+    metrics_server = None
+    if metrics_port:
+        metrics_server = MetricsServer(metrics_port)
+        metrics_server.start()
+    try:
+        webhook_receiver = WebhookReceiver(poller, str(config[config_loader.CONFIG_WEBHOOK_SECRET]),
+                                           webhook_port) if webhook_port else None
+    except (OSError, ValueError):
+        if metrics_server:
+            metrics_server.stop()
+        raise
+    return metrics_server, webhook_receiver
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Watches the Bitbucket PRs without a user interface, status "
+                                                 "changes are written to stdout as JSON lines.")
+    parser.add_argument("--config", help="Path of the JSON configuration file, PR_WATCHER_CONFIG by default")
+    parser.add_argument("--async-engine", action="store_true", help="Runs the cycles on an event loop")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    try:
+        config = config_loader.load_config(args.config)
+    except ConfigCannotBeReadError as e:
+        print(str(e) + " Path: " + str(e.config_path), file=sys.stderr)
+        return 2
+    config_loader.apply_config(config)
+    try:
+        config_loader.apply_logging_config(config, sys.stderr)
+    except ValueError as e:
+        print("Logging cannot be configured! " + str(e), file=sys.stderr)
+        return 2
+    webhook_port = config.get(config_loader.CONFIG_WEBHOOK_PORT)
+    if webhook_port and not config.get(config_loader.CONFIG_WEBHOOK_SECRET):
+        print("Webhook secret is not set, webhook requests cannot be verified!", file=sys.stderr)
+        return 2
+    try:
+        config_loader.apply_cassette_config(config)
+    except (OSError, ValueError) as e:
+        print("Cassette cannot be used! " + str(e), file=sys.stderr)
+        return 2
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    install_dump_signal()
+
+    # Only the JSON lines are written to stdout
+    listener = JsonLinesListener(sys.stdout)
+    poller = pr_poller.PrPoller(listener, stop_event, use_async_engine=args.async_engine or bool(
+        config.get(config_loader.CONFIG_USE_ASYNC_ENGINE)))
+    # Ports are bound before any PR is restored or fetched, so a bad or busy port fails the start at once
+    try:
+        metrics_server, webhook_receiver = bind_servers(config, poller)
+    except (OSError, ValueError) as e:
+        print("Server cannot be started! " + str(e), file=sys.stderr)
+        RestCassette.get_instance().stop()
+        return 2
+
+    with contextlib.redirect_stdout(sys.stderr):
+        # Watch-list of the last run is restored first, PRs of the configuration are added to it
+        for pr in pr_poller.restore_watch_list():
+            listener.emit(EVENT_PR_RESTORED, **get_pr_fields(pr))
+        bitbucket_rest_interaction.warm_up_connection()
+        watch_prs(config.get(config_loader.CONFIG_PRS) or [], listener)
+        if webhook_receiver:
+            webhook_receiver.start()
+        try:
+            poller.run()
+        finally:
+            if webhook_receiver:
+                webhook_receiver.stop()
+            if metrics_server:
+                metrics_server.stop()
+            RestCassette.get_instance().stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Functionality definition of the conditional request cache for the REST interaction
+* Stores the validators (ETag, Last-Modified) and the bodies of the responses, keyed by url
+* Entries are persisted to a local SQLite file, so a restarted watcher revalidates instead of re-downloading
+* Total body size is bounded, least recently used entries are evicted first. Access times of the hits are persisted
+  too, so the order of the entries survives a restart.
+* Writes are queued in memory and flushed in one transaction at the end of each poll cycle, or after the flush
+  interval, outside the lock of the lookups
+* This is a SINGLETON class
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app import constants_def as constants
+
+""" Request and response header related constants """
+HEADER_ETAG = "ETag"
+HEADER_LAST_MODIFIED = "Last-Modified"
+HEADER_IF_NONE_MATCH = "If-None-Match"
+HEADER_IF_MODIFIED_SINCE = "If-Modified-Since"
+HTTP_NOT_MODIFIED = 304
+
+
+class CacheEntry:
+    """
+    Cached response of a url
+    :param etag: Value of the ETag header of the response, None if not sent
+    :param last_modified: Value of the Last-Modified header of the response, None if not sent
+    :param body: Body of the response as bytes
+    """
+
+    __slots__ = ("etag", "last_modified", "body")
+
+    def __init__(self, etag, last_modified, body):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.body = body
+
+    def get_validator_headers(self):
+        validator_headers = {}
+        if self.etag:
+            validator_headers[HEADER_IF_NONE_MATCH] = self.etag
+        if self.last_modified:
+            validator_headers[HEADER_IF_MODIFIED_SINCE] = self.last_modified
+        return validator_headers
+
+
+def get_default_cache_path():
+    return os.path.join(os.path.expanduser("~"), constants.APP_DATA_DIR_NAME, constants.HTTP_CACHE_FILE_NAME)
+
+
+class HttpCache:
+
+    """ Singleton reference of the class. """
+    _instance = None
+
+    """ Virtually private declaration of class constructor. """
+    def __init__(self, db_path=None, max_bytes=constants.HTTP_CACHE_MAX_BYTES):
+        if not HttpCache._instance:
+            self.enabled = constants.HTTP_CACHE_ENABLED
+            self.db_path = db_path if db_path else get_default_cache_path()
+            self.max_bytes = max_bytes
+            self.total_bytes = 0
+            self._entries = OrderedDict()
+            self._lock = threading.Lock()
+            self._db_lock = threading.Lock()
+            self._pending_writes = []
+            self._access_times = {}
+            self._last_flush_time = time.monotonic()
+            self._conn = None
+            self._loaded = False
+            HttpCache._instance = self
+
+    """ Method to retrieve the reference to the singleton class object. """
+    @staticmethod
+    def get_instance():
+        if not HttpCache._instance:
+            HttpCache()
+        return HttpCache._instance
+
+    """
+    Returns the cached entry of the url and marks it as the most recently used one.
+    :param url: String representation of the url
+    :returns: *CacheEntry* object, None if the url is not cached
+    """
+    def get_entry(self, url):
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load()
+            cache_entry = self._entries.get(url)
+            if cache_entry:
+                self._entries.move_to_end(url)
+                self._access_times[url] = time.time()
+        self._flush_if_due()
+        return cache_entry
+
+    """
+    Stores the response of the url, if it has at least one validator.
+    :param url: String representation of the url
+    :param etag: Value of the ETag header of the response
+    :param last_modified: Value of the Last-Modified header of the response
+    :param body: Body of the response as bytes
+    :returns: True, if the response is stored, False, otherwise
+    """
+    def store(self, url, etag, last_modified, body):
+        if not self.enabled or (not etag and not last_modified) or len(body) > self.max_bytes:
+            return False
+        cache_entry = CacheEntry(etag, last_modified, body)
+        with self._lock:
+            self._load()
+            self._discard(url)
+            self._entries[url] = cache_entry
+            self.total_bytes += len(body)
+            self._pending_writes.append(("INSERT OR REPLACE INTO entries (url, etag, last_modified, body, last_access) "
+                                         "VALUES (?, ?, ?, ?, ?)", (url, etag, last_modified, body, time.time())))
+            self._evict()
+        self._flush_if_due()
+        return True
+
+    def remove(self, url):
+        with self._lock:
+            self._load()
+            self._discard(url)
+            self._pending_writes.append(("DELETE FROM entries WHERE url = ?", (url,)))
+
+    def clear(self):
+        with self._lock:
+            self._load()
+            self._entries.clear()
+            self._access_times.clear()
+            self.total_bytes = 0
+            self._pending_writes.append(("DELETE FROM entries", ()))
+        self.flush()
+
+    """
+    Writes the queued entries and the access times of the hits to the local store, in one transaction.
+    Lookups are not blocked while the store is written.
+    """
+    def flush(self):
+        with self._db_lock:
+            with self._lock:
+                pending_writes, self._pending_writes = self._pending_writes, []
+                access_times, self._access_times = self._access_times, {}
+                self._last_flush_time = time.monotonic()
+            if not pending_writes and not access_times:
+                return
+            for sql, params in pending_writes:
+                self._execute(sql, params)
+            for url, last_access in access_times.items():
+                self._execute("UPDATE entries SET last_access = ? WHERE url = ?", (last_access, url))
+            self._commit()
+
+    def _flush_if_due(self):
+        if time.monotonic() - self._last_flush_time >= constants.HTTP_CACHE_FLUSH_INTERVAL:
+            self.flush()
+
+    def _discard(self, url):
+        cache_entry = self._entries.pop(url, None)
+        if cache_entry:
+            self.total_bytes -= len(cache_entry.body)
+        self._access_times.pop(url, None)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            url, cache_entry = self._entries.popitem(last=False)
+            self.total_bytes -= len(cache_entry.body)
+            self._access_times.pop(url, None)
+            self._pending_writes.append(("DELETE FROM entries WHERE url = ?", (url,)))
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS entries (url TEXT PRIMARY KEY, etag TEXT, "
+                               "last_modified TEXT, body BLOB, last_access REAL)")
+            rows = self._conn.execute("SELECT url, etag, last_modified, body FROM entries ORDER BY last_access")
+            for url, etag, last_modified, body in rows:
+                self._entries[url] = CacheEntry(etag, last_modified, body)
+                self.total_bytes += len(body)
+            self._evict()
+        except (OSError, sqlite3.Error):
+            # Cache keeps working in memory, if the local store cannot be used
+            self._conn = None
+
+    def _execute(self, sql, params=()):
+        if not self._conn:
+            return
+        try:
+            self._conn.execute(sql, params)
+        except sqlite3.Error:
+            pass
+
+    def _commit(self):
+        if not self._conn:
+            return
+        try:
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
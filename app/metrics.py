@@ -0,0 +1,259 @@
+"""
+Functionality definition of the metrics of the REST interaction and the poll cycles
+* Latency histograms, request counts per status code and received body bytes are kept for each endpoint, e.g.
+  activities, merge or build_status, so slow cycles can be traced to the endpoint that causes them
+* Durations and PR counts of the poll cycles are kept for each server
+* Metrics are served in the Prometheus text format and as JSON by an optional local HTTP endpoint, and can be dumped
+  to stderr on SIGUSR1 where the signal is supported
+* This is a SINGLETON class
+"""
+import json
+import signal
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app import constants_def as constants, watcher_logging
+
+_logger = watcher_logging.get_logger("metrics")
+
+""" Metric names """
+METRIC_REQUEST_DURATION = "pr_watcher_request_duration_seconds"
+METRIC_REQUESTS = "pr_watcher_requests_total"
+METRIC_REQUEST_ERRORS = "pr_watcher_request_errors_total"
+METRIC_RECEIVED_BYTES = "pr_watcher_received_bytes_total"
+METRIC_CYCLE_DURATION = "pr_watcher_cycle_duration_seconds"
+METRIC_CYCLE_PRS = "pr_watcher_cycle_prs"
+
+""" Status code label of the requests that failed without a response """
+NO_RESPONSE_CODE = "none"
+
+""" Paths of the metrics endpoint """
+PATH_PROMETHEUS = "/metrics"
+PATH_JSON = "/metrics.json"
+_PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_JSON_CONTENT_TYPE = "application/json"
+
+HTTP_OK = 200
+HTTP_NOT_FOUND = 404
+
+
+class Histogram:
+    """
+    Cumulative histogram of the observed values, in the layout of the Prometheus histograms
+    :param buckets: Sorted upper bounds of the buckets, the +Inf bucket is added implicitly
+    """
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                self.counts[index] += 1
+                break
+
+    """ Returns the cumulative counts of the buckets, as pairs of the upper bounds and the counts. """
+    def get_cumulative_counts(self):
+        cumulative_counts = []
+        cumulative_count = 0
+        for upper_bound, count in zip(self.buckets, self.counts):
+            cumulative_count += count
+            cumulative_counts.append((upper_bound, cumulative_count))
+        return cumulative_counts
+
+    def to_dict(self):
+        return {"count": self.count, "sum": round(self.sum, 6),
+                "buckets": {str(upper_bound): count for upper_bound, count in self.get_cumulative_counts()}}
+
+
+def _format_labels(labels):
+    return "{" + ",".join(name + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+                          for name, value in labels) + "}"
+
+
+def _format_histogram(name, label_name, histograms):
+    lines = ["# TYPE " + name + " histogram"]
+    for label_value, histogram in sorted(histograms.items()):
+        for upper_bound, count in histogram.get_cumulative_counts():
+            lines.append(name + "_bucket" + _format_labels(((label_name, label_value), ("le", upper_bound))) + " " +
+                         str(count))
+        lines.append(name + "_bucket" + _format_labels(((label_name, label_value), ("le", "+Inf"))) + " " +
+                     str(histogram.count))
+        lines.append(name + "_sum" + _format_labels(((label_name, label_value),)) + " " + repr(histogram.sum))
+        lines.append(name + "_count" + _format_labels(((label_name, label_value),)) + " " + str(histogram.count))
+    return lines
+
+
+def _format_counter(name, label_names, counts):
+    lines = ["# TYPE " + name + " counter"]
+    for label_values, count in sorted(counts.items()):
+        lines.append(name + _format_labels(zip(label_names, label_values)) + " " + str(count))
+    return lines
+
+
+class Metrics:
+
+    """ Singleton reference of the class. """
+    _instance = None
+
+    """ Virtually private declaration of class constructor. """
+    def __init__(self):
+        if not Metrics._instance:
+            self._lock = threading.Lock()
+            self.reset()
+            Metrics._instance = self
+
+    """ Method to retrieve the reference to the singleton class object. """
+    @staticmethod
+    def get_instance():
+        if not Metrics._instance:
+            Metrics()
+        return Metrics._instance
+
+    def reset(self):
+        with self._lock:
+            self._request_durations = {}
+            self._request_cnts = {}
+            self._error_cnts = {}
+            self._received_bytes = {}
+            self._cycle_durations = {}
+            self._cycle_pr_cnts = {}
+
+    """
+    Records a REST request.
+    :param endpoint: Name of the endpoint of the request, e.g. activities
+    :param status_code: Status code of the response, None if the request failed without a response
+    :param duration: Duration of the request in seconds
+    :param received_bytes: Size of the received body in bytes
+    """
+    def record_request(self, endpoint, status_code, duration, received_bytes=0):
+        code = NO_RESPONSE_CODE if status_code is None else str(status_code)
+        with self._lock:
+            histogram = self._request_durations.get(endpoint)
+            if not histogram:
+                histogram = self._request_durations[endpoint] = Histogram(constants.METRICS_LATENCY_BUCKETS)
+            histogram.observe(duration)
+            self._request_cnts[(endpoint, code)] = self._request_cnts.get((endpoint, code), 0) + 1
+            if status_code is None or status_code >= 400:
+                self._error_cnts[(endpoint, code)] = self._error_cnts.get((endpoint, code), 0) + 1
+            self._received_bytes[endpoint] = self._received_bytes.get(endpoint, 0) + received_bytes
+
+    """
+    Records a poll cycle.
+    :param server_address: Address of the server that the cycle checked the PRs of
+    :param duration: Duration of the cycle in seconds
+    :param pr_cnt: Number of the PRs checked in the cycle
+    """
+    def record_cycle(self, server_address, duration, pr_cnt):
+        with self._lock:
+            duration_histogram = self._cycle_durations.get(server_address)
+            if not duration_histogram:
+                duration_histogram = self._cycle_durations[server_address] = Histogram(
+                    constants.METRICS_CYCLE_DURATION_BUCKETS)
+                self._cycle_pr_cnts[server_address] = Histogram(constants.METRICS_CYCLE_PRS_BUCKETS)
+            duration_histogram.observe(duration)
+            self._cycle_pr_cnts[server_address].observe(pr_cnt)
+
+    def get_snapshot(self):
+        with self._lock:
+            return {
+                "requests": {endpoint: self._get_endpoint_snapshot(endpoint, histogram)
+                             for endpoint, histogram in sorted(self._request_durations.items())},
+                "cycles": {server_address: {"duration": histogram.to_dict(),
+                                            "prs": self._cycle_pr_cnts[server_address].to_dict()}
+                           for server_address, histogram in sorted(self._cycle_durations.items())},
+            }
+
+    def _get_endpoint_snapshot(self, endpoint, histogram):
+        endpoint_snapshot = histogram.to_dict()
+        endpoint_snapshot["status_codes"] = {code: count for (count_endpoint, code), count
+                                             in sorted(self._request_cnts.items()) if count_endpoint == endpoint}
+        endpoint_snapshot["errors"] = sum(count for (count_endpoint, _), count in self._error_cnts.items()
+                                          if count_endpoint == endpoint)
+        endpoint_snapshot["received_bytes"] = self._received_bytes.get(endpoint, 0)
+        return endpoint_snapshot
+
+    def get_prometheus_text(self):
+        with self._lock:
+            lines = _format_histogram(METRIC_REQUEST_DURATION, "endpoint", self._request_durations)
+            lines += _format_counter(METRIC_REQUESTS, ("endpoint", "code"), self._request_cnts)
+            lines += _format_counter(METRIC_REQUEST_ERRORS, ("endpoint", "code"), self._error_cnts)
+            lines += _format_counter(METRIC_RECEIVED_BYTES, ("endpoint",),
+                                     {(endpoint,): count for endpoint, count in self._received_bytes.items()})
+            lines += _format_histogram(METRIC_CYCLE_DURATION, "server", self._cycle_durations)
+            lines += _format_histogram(METRIC_CYCLE_PRS, "server", self._cycle_pr_cnts)
+        return "\n".join(lines) + "\n"
+
+
+def dump_metrics(stream=None):
+    stream = stream or sys.stderr
+    stream.write(json.dumps(Metrics.get_instance().get_snapshot(), indent=2) + "\n")
+    stream.flush()
+
+
+def install_dump_signal():
+    """
+    Dumps the metrics as JSON to stderr when the process receives SIGUSR1, must be called from the main thread
+    :returns: True, if the signal handler is installed, False, if the platform has no SIGUSR1, e.g. Windows
+    """
+    dump_signal = getattr(signal, "SIGUSR1", None)
+    if dump_signal is None:
+        return False
+    signal.signal(dump_signal, lambda signum, frame: dump_metrics())
+    return True
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == PATH_PROMETHEUS:
+            self._send_body(Metrics.get_instance().get_prometheus_text(), _PROMETHEUS_CONTENT_TYPE)
+        elif path == PATH_JSON:
+            self._send_body(json.dumps(Metrics.get_instance().get_snapshot()), _JSON_CONTENT_TYPE)
+        else:
+            self.send_error(HTTP_NOT_FOUND)
+
+    def _send_body(self, text, content_type):
+        body = text.encode("utf-8")
+        self.send_response(HTTP_OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, msg_format, *args):
+        pass
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint of the metrics, /metrics is served in the Prometheus text format and /metrics.json as JSON
+    :param port: Port to listen on, 0 for any free port
+    :param host: Address to listen on, only the local machine by default
+    """
+
+    def __init__(self, port, host=constants.METRICS_HOST):
+        self._http_server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        self._http_server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._http_server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._http_server.serve_forever, daemon=True)
+        self._thread.start()
+        _logger.info("[METRICS] Listening on port %d", self.port)
+
+    def stop(self):
+        self._http_server.shutdown()
+        self._http_server.server_close()
@@ -0,0 +1,156 @@
+"""
+Functionality definition of the adaptive polling scheduler of the check thread
+* Keeps a priority queue of the next due times of the PRs, polling intervals depend on the statuses of the PRs
+* Due times are advanced from the previous due time, so the polling rate does not drift with the cycle time
+* Failing PRs are backed off exponentially, all the intervals are jittered so the clients do not stay in phase
+* When the changes are pushed by webhooks, the intervals are raised to a minimum, so polling is only a slow
+  reconciliation sweep
+"""
+import heapq
+import itertools
+import random
+import threading
+import time
+from app import constants_def as constants
+from app.bitbucket_rest_interaction import PrStatus
+
+_STATUS_INTERVALS = {
+    PrStatus.IN_PROGRESS: constants.POLL_INTERVAL_IN_PROGRESS,
+    PrStatus.READY_TO_MERGE: constants.POLL_INTERVAL_READY_TO_MERGE,
+    PrStatus.CONFLICT: constants.POLL_INTERVAL_CONFLICT,
+    PrStatus.MERGED: constants.POLL_INTERVAL_MERGED,
+}
+
+
+def get_status_interval(status):
+    return _STATUS_INTERVALS.get(status, constants.POLL_INTERVAL_DEFAULT)
+
+
+class PollScheduler:
+    """
+    Scheduler of the PR polls, stale queue entries of the rescheduled PRs are skipped when they are popped
+    :param clock: Function returning the current time in seconds, monotonic clock by default
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self.min_interval = 0
+        self._heap = []
+        self._due_times = {}
+        self._error_cnts = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    """
+    Adds the PRs that are not scheduled yet, with the intervals of their statuses, and drops the PRs that are not
+    watched anymore.
+    :param pr_statuses: Dictionary of the keys of the watched PRs to their *PrStatus*
+    """
+    def sync(self, pr_statuses):
+        with self._lock:
+            for pr_key in list(self._due_times):
+                if pr_key not in pr_statuses:
+                    del self._due_times[pr_key]
+                    self._error_cnts.pop(pr_key, None)
+            for pr_key, status in pr_statuses.items():
+                if pr_key not in self._due_times:
+                    self._push(pr_key, self._clock() + self._jitter(self._get_interval(status)))
+
+    """
+    Schedules the next poll of the PR with the interval of its status, and resets its backoff.
+    :param pr_key: Key of the PR
+    :param status: *PrStatus* of the PR
+    """
+    def schedule_for_status(self, pr_key, status):
+        with self._lock:
+            self._error_cnts.pop(pr_key, None)
+            self._schedule_next(pr_key, self._get_interval(status))
+
+    """
+    Schedules the next poll of the PR with an exponential backoff, after a failed poll.
+    :param pr_key: Key of the PR
+    :param min_delay: Minimum delay in seconds, e.g. the delay requested by the server
+    """
+    def schedule_after_error(self, pr_key, min_delay=0):
+        with self._lock:
+            error_cnt = self._error_cnts.get(pr_key, 0) + 1
+            self._error_cnts[pr_key] = error_cnt
+            backoff = min(constants.POLL_INTERVAL_IN_PROGRESS * 2 ** (error_cnt - 1), constants.POLL_BACKOFF_MAX)
+            self._push(pr_key, self._clock() + max(self._jitter(backoff), min_delay))
+
+    """
+    Schedules the PRs restored after a restart, with the delays left from their due times before the restart.
+    :param pr_delays: Dictionary of the keys of the PRs to the seconds until their first polls
+    """
+    def restore(self, pr_delays):
+        with self._lock:
+            now = self._clock()
+            for pr_key, delay in pr_delays.items():
+                if pr_key not in self._due_times:
+                    self._push(pr_key, now + delay)
+
+    """
+    Returns the seconds until the next polls of the PRs, to be persisted with the states of the PRs.
+    :param pr_keys: List of the keys of the PRs
+    :returns: Dictionary of the keys of the scheduled PRs to the seconds until their next polls
+    """
+    def get_due_delays(self, pr_keys):
+        with self._lock:
+            now = self._clock()
+            return {pr_key: max(self._due_times[pr_key] - now, 0) for pr_key in pr_keys if pr_key in self._due_times}
+
+    def schedule_now(self, pr_key):
+        with self._lock:
+            self._push(pr_key, self._clock())
+
+    def remove(self, pr_key):
+        with self._lock:
+            self._due_times.pop(pr_key, None)
+            self._error_cnts.pop(pr_key, None)
+
+    """
+    Pops the PRs, whose polls are due.
+    :returns: Set of the keys of the due PRs
+    """
+    def pop_due(self):
+        due_pr_keys = set()
+        with self._lock:
+            now = self._clock()
+            while self._heap and self._heap[0][0] <= now:
+                due_time, _, pr_key = heapq.heappop(self._heap)
+                if self._due_times.get(pr_key) == due_time:
+                    due_pr_keys.add(pr_key)
+        return due_pr_keys
+
+    """
+    Returns the time to wait for the next due poll, bounded so the newly added PRs are picked up in time.
+    :returns: Time to wait in seconds
+    """
+    def get_wait_time(self):
+        with self._lock:
+            while self._heap and self._due_times.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                return constants.POLL_SCHEDULER_MAX_WAIT
+            wait_time = self._heap[0][0] - self._clock()
+        return min(max(wait_time, 0), constants.POLL_SCHEDULER_MAX_WAIT)
+
+    def _get_interval(self, status):
+        return max(get_status_interval(status), self.min_interval)
+
+    def _schedule_next(self, pr_key, interval):
+        # Next due time is advanced from the previous one, unless the poll is already late for the interval.
+        # A late poll is scheduled a whole interval from now, so long cycles do not re-poll the PRs back to back.
+        now = self._clock()
+        due_time = self._due_times.get(pr_key, now) + self._jitter(interval)
+        if due_time < now:
+            due_time = now + self._jitter(interval)
+        self._push(pr_key, due_time)
+
+    def _push(self, pr_key, due_time):
+        self._due_times[pr_key] = due_time
+        heapq.heappush(self._heap, (due_time, next(self._sequence), pr_key))
+
+    @staticmethod
+    def _jitter(interval):
+        return interval * random.uniform(1 - constants.POLL_JITTER_RATIO, 1 + constants.POLL_JITTER_RATIO)
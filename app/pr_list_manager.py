@@ -1,126 +1,170 @@
-"""
-Functionality definition of management class for the PR list
-* This is a SINGLETON class
-"""
-import enum
-
-
-class PRInProgressAction(enum.Enum):
-    PR_REMOVED = 1
-    PR_CANNOT_BE_REMOVED = 2
-    PR_IN_PROGRESS_UPDATED = 3
-
-
-class _PrNode:
-    """
-    Node definition for linked list structure
-    """
-    basic_pr = None
-    next_pr_node = None
-
-
-class PrListManager:
-
-    """ Singleton reference of the class. """
-    _instance = None
-
-    """ Virtually private declaration of class constructor. """
-    def __init__(self):
-        if not PrListManager._instance:
-            self.pr_root_node = None
-            self.pr_id_to_remove = ""
-            self.pr_id_in_progress = ""
-            PrListManager._instance = self
-
-    """ Method to retrieve the reference to the singleton class object. """
-    @staticmethod
-    def get_instance():
-        if not PrListManager._instance:
-            PrListManager()
-        return PrListManager._instance
-
-    """
-    Adds the new pr to the linked list, if it is not already added.
-    :param watch_pr_item: *BasicPR* object to be added to the linked list
-    :returns: True, if the pr is added successfully, False, otherwise
-    """
-    def add_pr(self, watch_pr_item):
-        if not watch_pr_item:
-            return False
-
-        if not self.pr_root_node:
-            tmp_pr_node = _PrNode()
-            tmp_pr_node.basic_pr = watch_pr_item
-            tmp_pr_node.next_pr_node = None
-            self.pr_root_node = tmp_pr_node
-            return True
-
-        tmp_pr_node = self.pr_root_node
-        if tmp_pr_node.basic_pr.id == watch_pr_item.id:
-            return False
-        while tmp_pr_node.next_pr_node:
-            tmp_pr_node = tmp_pr_node.next_pr_node
-            if tmp_pr_node.basic_pr.id == watch_pr_item.id:
-                return False
-        curr_pr_node = _PrNode()
-        curr_pr_node.basic_pr = watch_pr_item
-        curr_pr_node.next_pr_node = None
-        tmp_pr_node.next_pr_node = curr_pr_node
-        return True
-
-    """
-    Removes the PR item with the corresponding id form to the linked list, if it already exists.
-    :param pr_id: String representation of the PR id to be removed from the linked list
-    :returns: True, if the pr is removed successfully, False, otherwise
-    """
-    def remove_pr_from_list(self, pr_id):
-        # Checks whether the corresponding PR item is already in execution by the check thread.
-        # If it is indeed, store the id to be removed later, when check thread finishes using the PR item
-        if self.pr_id_in_progress != pr_id:
-            if not self.pr_root_node:
-                return False
-
-            if self.pr_root_node.basic_pr.id == pr_id:
-                self.pr_root_node.basic_pr = None
-                tmp_pr_node = self.pr_root_node.next_pr_node
-                self.pr_root_node.next_pr_node = None
-                self.pr_root_node = tmp_pr_node
-                return True
-            tmp_pr_node = self.pr_root_node
-            while tmp_pr_node.next_pr_node is not None:
-                tmp_next_node = tmp_pr_node.next_pr_node
-                if tmp_next_node.basic_pr.id == pr_id:
-                    tmp_pr_node.next_pr_node = tmp_next_node.next_pr_node
-                    tmp_next_node.basic_pr = None
-                    tmp_next_node.next_pr_node = None
-                    return True
-                tmp_pr_node = tmp_pr_node.next_pr_node
-        else:
-            self.pr_id_to_remove = pr_id
-        return False
-
-    """
-    Updates the PR id in progress.
-    :param pr_id: String representation of the PR id in progress by the check thread.
-    """
-    def update_pr_id_in_progress(self, pr_id):
-        self.pr_id_in_progress = pr_id
-        if self.pr_id_to_remove != pr_id:
-            if self.remove_pr_from_list(self.pr_id_to_remove):
-                self.pr_id_to_remove = ""
-                return PRInProgressAction.PR_REMOVED
-            return PRInProgressAction.PR_CANNOT_BE_REMOVED
-        return PRInProgressAction.PR_IN_PROGRESS_UPDATED
-
-    """
-    Checks whether the PR item with given id exists or no
-    :param pr_id: String representation of the PR id to be searched
-    :returns: True, if PR exits, False, otherwise
-    """
-    def does_pr_item_exist(self, pr_id):
-        tmp_pr_node = self.pr_root_node
-        while tmp_pr_node:
-            if tmp_pr_node.basic_pr and tmp_pr_node.basic_pr.id == pr_id:
-                return True
-            tmp_pr_node = tmp_pr_node.next_pr_node
-        return False
+"""
+Functionality definition of management class for the PR list
+* PR items are kept in an insertion ordered dictionary indexed by PR key, so lookup, add and remove are O(1)
+* PR keys are (server address, project, repository, PR id) tuples, so PRs of different repositories can be watched
+* The list is shared by the UI and the check thread, all the access is guarded by a lock
+* Readers iterate an immutable snapshot of the list, that is rebuilt only after the list is changed
+* Added and removed PRs are written to the *WatchListStore*, so the watch-list survives a restart
+* This is a SINGLETON class
+"""
+import enum
+import threading
+from collections import OrderedDict
+from app import watcher_logging
+from app.watch_list_store import WatchListStore
+
+_logger = watcher_logging.get_logger("pr_list_manager")
+
+
+class PRInProgressAction(enum.Enum):
+    PR_REMOVED = 1
+    PR_CANNOT_BE_REMOVED = 2
+    PR_IN_PROGRESS_UPDATED = 3
+
+
+class PrListManager:
+
+    """ Singleton reference of the class. """
+    _instance = None
+
+    """ Virtually private declaration of class constructor. """
+    def __init__(self):
+        if not PrListManager._instance:
+            self.pr_keys_to_remove = set()
+            self.pr_keys_in_progress = set()
+            self._pr_items = OrderedDict()
+            self._pr_list_snapshot = ()
+            self._lock = threading.RLock()
+            PrListManager._instance = self
+
+    """ Method to retrieve the reference to the singleton class object. """
+    @staticmethod
+    def get_instance():
+        if not PrListManager._instance:
+            PrListManager()
+        return PrListManager._instance
+
+    """
+    Adds the new pr to the list, if it is not already added.
+    :param watch_pr_item: *PrRecord* object to be added to the list
+    :returns: True, if the pr is added successfully, False, otherwise
+    """
+    def add_pr(self, watch_pr_item):
+        if not watch_pr_item:
+            return False
+
+        with self._lock:
+            if watch_pr_item.key in self._pr_items:
+                return False
+            self._pr_items[watch_pr_item.key] = watch_pr_item
+            self._pr_list_snapshot = None
+            WatchListStore.get_instance().add_record(watch_pr_item)
+            _logger.debug("PR %s is added, PR Cnt: %d", watch_pr_item.key, len(self._pr_items))
+            return True
+
+    """
+    Adds the PRs restored from the *WatchListStore* to the list, without writing them to the store again.
+    :param pr_list: List of *PrRecord* objects
+    :returns: Number of the PRs that are added
+    """
+    def restore_prs(self, pr_list):
+        restored_cnt = 0
+        with self._lock:
+            for watch_pr_item in pr_list:
+                if watch_pr_item.key not in self._pr_items:
+                    self._pr_items[watch_pr_item.key] = watch_pr_item
+                    restored_cnt += 1
+            self._pr_list_snapshot = None
+        _logger.info("Restored PR Cnt: %d", restored_cnt)
+        return restored_cnt
+
+    """
+    Removes the PR item with the corresponding key from the list, if it already exists.
+    :param pr_key: Key of the PR to be removed from the list
+    :returns: True, if the pr is removed successfully, False, otherwise
+    """
+    def remove_pr_from_list(self, pr_key):
+        # Checks whether the corresponding PR item is already in execution by the check thread.
+        # If it is indeed, store the key to be removed later, when check thread finishes using the PR item
+        with self._lock:
+            if pr_key in self.pr_keys_in_progress:
+                self.pr_keys_to_remove.add(pr_key)
+                _logger.debug("PR %s is in progress, it will be removed after its check", pr_key)
+                return False
+            return self._remove_pr_item(pr_key)
+
+    def _remove_pr_item(self, pr_key):
+        if self._pr_items.pop(pr_key, None) is None:
+            return False
+        self._pr_list_snapshot = None
+        WatchListStore.get_instance().remove_record(pr_key)
+        _logger.debug("PR %s is removed, PR Cnt: %d", pr_key, len(self._pr_items))
+        return True
+
+    """
+    Marks all the given PRs as in progress, for the check threads checking several PRs at the same time.
+    PRs already in progress by the other check threads stay in progress.
+    :param pr_keys: List of the keys of the PRs in progress by the check thread.
+    """
+    def set_prs_in_progress(self, pr_keys):
+        with self._lock:
+            self.pr_keys_in_progress.update(pr_keys)
+
+    """
+    Marks the PR as not in progress anymore, and applies all the pending removals of the PRs that are not in
+    progress, including the given one.
+    :param pr_key: Key of the PR that the check thread is done with.
+    :returns: PR_REMOVED, if any PR is removed, PR_IN_PROGRESS_UPDATED, otherwise
+    """
+    def release_pr_in_progress(self, pr_key):
+        return self.release_prs_in_progress([pr_key])
+
+    """
+    Marks the PRs as not in progress anymore, and applies all the pending removals of the PRs that are not in
+    progress, including the given ones.
+    :param pr_keys: List of the keys of the PRs that the check thread is done with.
+    :returns: PR_REMOVED, if any PR is removed, PR_IN_PROGRESS_UPDATED, otherwise
+    """
+    def release_prs_in_progress(self, pr_keys):
+        with self._lock:
+            self.pr_keys_in_progress.difference_update(pr_keys)
+            if self._remove_pending_prs() == PRInProgressAction.PR_REMOVED:
+                return PRInProgressAction.PR_REMOVED
+            return PRInProgressAction.PR_IN_PROGRESS_UPDATED
+
+    def _remove_pending_prs(self):
+        if not self.pr_keys_to_remove:
+            return PRInProgressAction.PR_IN_PROGRESS_UPDATED
+        removed = False
+        for pr_key in self.pr_keys_to_remove - self.pr_keys_in_progress:
+            self.pr_keys_to_remove.discard(pr_key)
+            removed = self._remove_pr_item(pr_key) or removed
+        return PRInProgressAction.PR_REMOVED if removed else PRInProgressAction.PR_CANNOT_BE_REMOVED
+
+    """
+    Returns an immutable snapshot of the PR items in order, so the list can be iterated while it is being modified.
+    :returns: Tuple of *PrRecord* objects
+    """
+    def get_pr_list(self):
+        with self._lock:
+            if self._pr_list_snapshot is None:
+                self._pr_list_snapshot = tuple(self._pr_items.values())
+            return self._pr_list_snapshot
+
+    """
+    Returns the PR item with the given key.
+    :param pr_key: Key of the PR
+    :returns: *PrRecord* object, None if the PR does not exist
+    """
+    def get_pr(self, pr_key):
+        with self._lock:
+            return self._pr_items.get(pr_key)
+
+    """
+    Checks whether the PR item with given key exists or no
+    :param pr_key: Key of the PR to be searched
+    :returns: True, if PR exits, False, otherwise
+    """
+    def does_pr_item_exist(self, pr_key):
+        with self._lock:
+            return pr_key in self._pr_items
@@ -0,0 +1,150 @@
+"""
+Functionality definition of the table model of the PR watch-list window
+* Rows mirror the list of the *PrListManager*, a refresh emits dataChanged only for the rows whose statuses or names
+  are changed, and inserts or removes only the added or removed rows
+* Colors of the statuses are resolved once into brushes, instead of a stylesheet for each label on every update
+* Refresh requests are coalesced with a single shot timer, so the view is repainted at most once per frame however
+  many PRs are updated
+"""
+from app import colors_def as colors, constants_def as constants
+from app.bitbucket_rest_interaction import PrStatus
+from app.pr_list_manager import PrListManager
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PyQt5.QtGui import QBrush, QColor, QFont
+
+""" Columns of the table """
+COLUMN_PR = 0
+COLUMN_STATUS = 1
+_COLUMN_HEADERS = ("Pull Request", "Status")
+
+_STATUS_COLORS = {
+    PrStatus.FAILED: (colors.FAILED_BG, colors.FAILED_FG),
+    PrStatus.SUCCESS: (colors.SUCCESS_BG, colors.SUCCESS_FG),
+    PrStatus.IN_PROGRESS: (colors.IN_PROGRESS_BG, colors.IN_PROGRESS_FG),
+    PrStatus.CONFLICT: (colors.CONFLICT_BG, colors.CONFLICT_FG),
+    PrStatus.MERGED: (colors.MERGED_BG, colors.MERGED_FG),
+    PrStatus.READY_TO_MERGE: (colors.MERGED_BG, colors.MERGED_FG),
+}
+_DEFAULT_COLORS = (colors.DEFAULT_BG, colors.DEFAULT_FG)
+
+
+def _get_status_brushes():
+    return {status: (QBrush(QColor(_STATUS_COLORS.get(status, _DEFAULT_COLORS)[0])),
+                     QBrush(QColor(_STATUS_COLORS.get(status, _DEFAULT_COLORS)[1])))
+            for status in PrStatus}
+
+
+class _PrRow:
+
+    __slots__ = ('key', 'pr', 'display_name', 'status')
+
+    def __init__(self, pr):
+        self.key = pr.key
+        self.pr = pr
+        self.display_name = pr.get_display_name()
+        self.status = pr.status
+
+    """
+    Updates the row from its PR.
+    :returns: True, if the shown values of the row are changed, False, otherwise
+    """
+    def update(self):
+        display_name = self.pr.get_display_name()
+        if self.status == self.pr.status and self.display_name == display_name:
+            return False
+        self.status = self.pr.status
+        self.display_name = display_name
+        return True
+
+
+class PrListModel(QAbstractTableModel):
+    """
+    Table model of the watched PRs
+    :param parent: Parent object of the model
+    :param refresh_interval: Minimum interval between two refreshes in milliseconds
+    """
+
+    def __init__(self, parent=None, refresh_interval=constants.LIST_REFRESH_INTERVAL_MS):
+        super().__init__(parent)
+        self._rows = []
+        self._status_brushes = _get_status_brushes()
+        self._pr_font = QFont()
+        self._pr_font.setBold(True)
+        self.refresh_cnt = 0
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(refresh_interval)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(_COLUMN_HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return _COLUMN_HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        if index.column() == COLUMN_PR:
+            if role == Qt.DisplayRole:
+                return row.display_name
+            if role == Qt.ToolTipRole:
+                return row.pr.link
+            if role == Qt.FontRole:
+                return self._pr_font
+            return None
+        if role == Qt.DisplayRole:
+            return PrStatus(row.status).name
+        if role == Qt.BackgroundRole:
+            return self._status_brushes[row.status][0]
+        if role == Qt.ForegroundRole:
+            return self._status_brushes[row.status][1]
+        return None
+
+    def get_pr_key(self, row):
+        return self._rows[row].key if 0 <= row < len(self._rows) else None
+
+    """ Requests a refresh, requests arriving before the refresh timer fires are served by the same refresh. """
+    def request_refresh(self):
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    """
+    Updates the rows from the list of the *PrListManager*, changes are reported to the views row by row.
+    :returns: Number of the rows that are inserted, removed or changed
+    """
+    def refresh(self):
+        self.refresh_cnt += 1
+        pr_list = PrListManager.get_instance().get_pr_list()
+        pr_keys = {pr.key for pr in pr_list}
+        change_cnt = 0
+
+        # Removed PRs are dropped from the bottom up, so the indices of the remaining rows stay valid
+        for row_index in range(len(self._rows) - 1, -1, -1):
+            if self._rows[row_index].key not in pr_keys:
+                self.beginRemoveRows(QModelIndex(), row_index, row_index)
+                del self._rows[row_index]
+                self.endRemoveRows()
+                change_cnt += 1
+
+        # PRs are kept in insertion order, so the added PRs are appended
+        row_keys = {row.key for row in self._rows}
+        added_prs = [pr for pr in pr_list if pr.key not in row_keys]
+        if added_prs:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(added_prs) - 1)
+            self._rows.extend(_PrRow(pr) for pr in added_prs)
+            self.endInsertRows()
+            change_cnt += len(added_prs)
+
+        for row_index, row in enumerate(self._rows):
+            if row.update():
+                self.dataChanged.emit(self.index(row_index, COLUMN_PR), self.index(row_index, COLUMN_STATUS))
+                change_cnt += 1
+        return change_cnt
@@ -0,0 +1,519 @@
+"""
+Functionality definition of the poller of the watched PRs, independent of the user interface
+* Checks the watched PRs on one lane per server and reports the changes to a listener, so the same poller is used by
+  the tray application and the headless watcher
+* Nothing from Qt is imported here, the async engine is imported only when it is used
+* Polls can be requested by the webhook receiver, with the status pushed by the webhook if it is already known
+* Watch-list restored after a restart is revalidated in the background, changes found in the first checks of the
+  restored PRs are reported together once all of them are checked, instead of one notification per PR
+"""
+import asyncio
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from app import bitbucket_rest_interaction, constants_def as constants, watcher_logging
+from app.bitbucket_rest_interaction import PrStatus
+from app.change_events import ChangeEvent, get_activities_text
+from app.exception_definitions.rate_limited_error import RateLimitedError
+from app.http_cache import HttpCache
+from app.metrics import Metrics
+from app.poll_scheduler import PollScheduler
+from app.pr_list_manager import PrListManager, PRInProgressAction
+from app.pr_record import PrRecord
+from app.rate_governor import RateGovernor
+from app.repo_info import RepoInfo, RepoRef
+from app.watch_list_store import WatchListStore
+
+_logger = watcher_logging.get_logger("pr_poller")
+
+
+def resolve_pr_status(pr_snapshot, build_status=None):
+    """
+    Resolves the watch-list status of a PR from the snapshot of the cycle
+    :param pr_snapshot: *PrSnapshot* object of the PR, None if the PR cannot be fetched
+    :param build_status: *PrStatus* of the latest commit, if it is already fetched
+    :returns: *PrStatus* of the PR
+    """
+    if not pr_snapshot:
+        return PrStatus.NO_STATUS
+    if pr_snapshot.is_merged:
+        return PrStatus.MERGED
+    if pr_snapshot.is_conflicted:
+        return PrStatus.CONFLICT
+    if pr_snapshot.can_merge:
+        return PrStatus.READY_TO_MERGE
+
+    pr_status_enum = build_status if build_status is not None else pr_snapshot.get_build_status()
+    if pr_status_enum in (PrStatus.FAILED, PrStatus.IN_PROGRESS, PrStatus.SUCCESS):
+        return pr_status_enum
+    return PrStatus.NO_STATUS
+
+
+def update_pr_properties(pr, pr_snapshot):
+    pr.comment_cnt = pr_snapshot.comment_count
+    pr.open_task_cnt = pr_snapshot.open_task_count
+    pr.head_commit = pr_snapshot.latest_commit
+    pr.version = pr_snapshot.version
+
+
+def _have_comments_changed(pr, pr_snapshot):
+    """
+    Checks whether the comment section of the PR is changed, from the properties of the PR resource
+    :param pr: *PrRecord* object with the properties of the last check
+    :param pr_snapshot: *PrSnapshot* object of the PR for the current check
+    :returns: True, if the comment or the open task count is changed, False, otherwise
+    """
+    if pr.version is None:
+        return False
+    return pr_snapshot.comment_count != pr.comment_cnt or pr_snapshot.open_task_count != pr.open_task_cnt
+
+
+def create_pr_record(pr_id, repo_ref=None):
+    """
+    Fetches the PR and creates its record, the newest activity of the PR is the starting point of the change reports
+    :param pr_id: String representation of the PR id
+    :param repo_ref: *RepoRef* of the repository of the PR, the repository in the settings by default
+    :returns: *PrRecord* object, None if the PR does not exist or cannot be fetched
+    """
+    pr_snapshot = bitbucket_rest_interaction.get_pr_snapshot(pr_id, repo_ref)
+    if not pr_snapshot:
+        return None
+
+    # Check the newest activity, new activities are reported from there on
+    _, last_activity_id = bitbucket_rest_interaction.get_new_activities(pr_id, repo_ref=repo_ref)
+
+    # Merged, conflict and ready to merge checks have priority over the build status
+    pr = PrRecord(pr_id, resolve_pr_status(pr_snapshot), pr_snapshot.repo_ref)
+    update_pr_properties(pr, pr_snapshot)
+    pr.last_activity_id = last_activity_id
+    pr.last_polled = time.time()
+    return pr
+
+
+class _PrCheckResult:
+    """
+    Result of the check of a PR in a cycle, to be applied to the PR item by the poller
+    :param pr_snapshot: *PrSnapshot* object of the PR, None if the PR cannot be fetched
+    :param comments_changed: True, if the comment section of the PR is changed since the last check
+    :param new_activities: List of the activities of the PR since the last check, newest first
+    :param last_activity_id: Id of the newest activity of the PR
+    :param throttled: True, if the state of the PR cannot be resolved because of the rate limit
+    :param pushed: True, if the status of the PR is pushed by a webhook instead of being fetched
+    """
+
+    def __init__(self, pr_snapshot, comments_changed, new_activities, last_activity_id, throttled=False,
+                 pushed=False):
+        self.pr_snapshot = pr_snapshot
+        self.comments_changed = comments_changed
+        self.new_activities = new_activities
+        self.last_activity_id = last_activity_id
+        self.throttled = throttled
+        self.pushed = pushed
+        self.status = PrStatus.NO_STATUS
+
+
+def _fetch_pr(pr):
+    """
+    Fetches the new activities and the snapshot of the PR, without updating the PR item
+    :param pr: *PrRecord* object to be checked
+    :returns: *_PrCheckResult* object of the PR, status of which is not resolved yet
+    """
+    try:
+        pr_snapshot = bitbucket_rest_interaction.fetch_pr_snapshot(pr.id, pr.repo)
+    except RateLimitedError:
+        return _PrCheckResult(None, False, [], pr.last_activity_id, throttled=True)
+    except requests.exceptions.RequestException:
+        pr_snapshot = None
+    if not pr_snapshot:
+        return _PrCheckResult(None, False, [], pr.last_activity_id)
+    if pr_snapshot.fetch_merge_check().throttled:
+        return _PrCheckResult(None, False, [], pr.last_activity_id, throttled=True)
+
+    # Activities are read only when the counters of the PR resource move
+    if not _have_comments_changed(pr, pr_snapshot):
+        return _PrCheckResult(pr_snapshot, False, [], pr.last_activity_id)
+    new_activities, last_activity_id = bitbucket_rest_interaction.get_new_activities(pr.id, pr.last_activity_id,
+                                                                                     pr.repo)
+    return _PrCheckResult(pr_snapshot, True, new_activities, last_activity_id)
+
+
+def _get_snapshots_to_resolve(check_results):
+    return [check_result.pr_snapshot for check_result in check_results
+            if check_result.pr_snapshot and not check_result.throttled]
+
+
+def _resolve_check_results(check_results, build_statuses):
+    # Check whether the PR is merged, conflicted, ready to merge or the build status, in order.
+    # PRs, whose build status is held back by the rate limit, keep their last known state.
+    for check_result in check_results:
+        pr_snapshot = check_result.pr_snapshot
+        if check_result.throttled:
+            continue
+        if pr_snapshot and pr_snapshot.needs_build_status and pr_snapshot.key not in build_statuses:
+            check_result.throttled = True
+            continue
+        check_result.status = resolve_pr_status(pr_snapshot, build_statuses.get(pr_snapshot.key) if pr_snapshot
+                                                 else None)
+    return check_results
+
+
+def _check_prs(executor, pr_list):
+    """
+    Checks the PRs of the cycle. PRs are fetched on the worker pool, build statuses of all the PRs are resolved in
+    batches afterwards.
+    :param executor: *ThreadPoolExecutor* object to fetch the PRs on
+    :param pr_list: List of *PrRecord* objects to be checked
+    :returns: List of *_PrCheckResult* objects, in order of the PRs
+    """
+    check_results = list(executor.map(watcher_logging.bind_trace(_fetch_pr), pr_list))
+    build_statuses = bitbucket_rest_interaction.get_pr_statuses(_get_snapshots_to_resolve(check_results))
+    return _resolve_check_results(check_results, build_statuses)
+
+
+async def _fetch_pr_async(client, pr):
+    try:
+        pr_snapshot = await client.fetch_pr_snapshot(pr.id, pr.repo)
+    except RateLimitedError:
+        return _PrCheckResult(None, False, [], pr.last_activity_id, throttled=True)
+    except requests.exceptions.RequestException:
+        pr_snapshot = None
+    if not pr_snapshot:
+        return _PrCheckResult(None, False, [], pr.last_activity_id)
+    if pr_snapshot.throttled:
+        return _PrCheckResult(None, False, [], pr.last_activity_id, throttled=True)
+
+    if not _have_comments_changed(pr, pr_snapshot):
+        return _PrCheckResult(pr_snapshot, False, [], pr.last_activity_id)
+    new_activities, last_activity_id = await client.get_new_activities(pr.id, pr.last_activity_id, pr.repo)
+    return _PrCheckResult(pr_snapshot, True, new_activities, last_activity_id)
+
+
+async def _check_prs_async(client, pr_list):
+    """
+    Async version of *_check_prs*, running the requests of the cycle on the event loop of the client
+    :param client: *AsyncBitbucketClient* object to be used for the requests
+    :param pr_list: List of *PrRecord* objects to be checked
+    :returns: List of *_PrCheckResult* objects, in order of the PRs
+    """
+    check_results = await asyncio.gather(*[_fetch_pr_async(client, pr) for pr in pr_list])
+    build_statuses = await client.get_pr_statuses(_get_snapshots_to_resolve(check_results))
+    return _resolve_check_results(check_results, build_statuses)
+
+
+def restore_watch_list():
+    """
+    Restores the watch-list persisted before the restart, restored PRs are revalidated by the poller
+    :returns: List of the restored *PrRecord* objects
+    """
+    pr_list = WatchListStore.get_instance().load_records()
+    PrListManager.get_instance().restore_prs(pr_list)
+    return pr_list
+
+
+def get_watched_servers():
+    return dict.fromkeys(pr.repo.server_address for pr in PrListManager.get_instance().get_pr_list())
+
+
+class PrUpdate:
+    """
+    Changes of a PR found in a check, to be reported to the listener of the poller
+    :param pr: *PrRecord* object of the PR, already updated with the changes
+    :param old_status: *PrStatus* of the PR before the check
+    :param comments_changed: True, if the comment section of the PR is changed since the last check
+    :param new_activities: List of the activities of the PR since the last check, newest first
+    :param message_text: String representation of the changes, to be shown to the user
+    """
+
+    def __init__(self, pr, old_status, comments_changed, new_activities, message_text):
+        self.pr = pr
+        self.old_status = old_status
+        self.comments_changed = comments_changed
+        self.new_activities = new_activities
+        self.message_text = message_text
+
+    @property
+    def status_changed(self):
+        return self.old_status != self.pr.status
+
+    """
+    Returns the typed change events of the update, comment changes first.
+    :returns: List of *ChangeEvent* objects
+    """
+    def get_change_events(self):
+        change_events = []
+        if self.comments_changed:
+            change_events.append(ChangeEvent.comments_changed(self.pr, self.new_activities))
+        if self.status_changed:
+            change_events.append(ChangeEvent.status_changed(self.pr, self.old_status, self.pr.status))
+        return change_events
+
+
+class PrPollerListener:
+    """
+    Listener of the changes found by the poller, the methods are called on the lane threads of the poller
+    """
+
+    def on_pr_updated(self, pr_update):
+        pass
+
+    def on_prs_removed(self):
+        pass
+
+    """
+    Called once all the PRs restored after a restart are revalidated, with the changes found in their first checks.
+    :param pr_updates: List of *PrUpdate* objects, empty if none of the restored PRs is changed
+    """
+    def on_prs_revalidated(self, pr_updates):
+        for pr_update in pr_updates:
+            self.on_pr_updated(pr_update)
+
+
+class PrPoller:
+    """
+    Poller of the watched PRs, independent of the user interface
+    :param listener: *PrPollerListener* object to be informed about the changes
+    :param stop_event: *threading.Event* object, polling stops when it is set
+    :param max_workers: Number of the PRs of a server to be fetched at the same time
+    :param use_async_engine: True, to run the cycles on an event loop instead of a worker pool
+    """
+
+    def __init__(self, listener, stop_event, max_workers=constants.POLL_CONCURRENCY_PER_HOST,
+                 use_async_engine=constants.POLL_USE_ASYNC_ENGINE):
+        self.listener = listener
+        self.stop_event = stop_event
+        self.max_workers = max_workers
+        self.use_async_engine = use_async_engine
+        self.skip_cycles = False
+        self.force_changes = False
+        self.schedulers = {}
+        self.reconciliation_interval = 0
+        self._poll_requests = {}
+        self._poll_requests_lock = threading.Lock()
+        self._revalidating_keys = {}
+        self._revalidated_updates = {}
+
+    def run(self):
+        # Each server is polled on its own lane, with its own scheduler, worker pool and connections, so a slow server
+        # does not hold up the polling of the others
+        host_lanes = []
+        while not self.stop_event.wait(timeout=constants.POLL_SCHEDULER_MAX_WAIT):
+            for server_address in get_watched_servers():
+                if server_address not in self.schedulers:
+                    self.schedulers[server_address] = PollScheduler()
+                    self.schedulers[server_address].min_interval = self.reconciliation_interval
+                    self._restore_schedule(server_address)
+                    host_lane = threading.Thread(target=self._run_host_lane, args=(server_address,), daemon=True)
+                    host_lane.start()
+                    host_lanes.append(host_lane)
+        for host_lane in host_lanes:
+            host_lane.join()
+
+    """
+    Raises the polling intervals to the reconciliation interval, when the changes are pushed by webhooks.
+    :param reconciliation_interval: Minimum polling interval in seconds, 0 for the intervals of the statuses
+    """
+    def set_reconciliation_interval(self, reconciliation_interval):
+        self.reconciliation_interval = reconciliation_interval
+        for scheduler in list(self.schedulers.values()):
+            scheduler.min_interval = reconciliation_interval
+
+    """
+    Requests the PR to be checked in the next cycle of its server, e.g. when a webhook reports a change of the PR.
+    :param pr_key: Key of the PR
+    :param status: *PrStatus* of the PR pushed by the webhook, None if the PR has to be fetched
+    """
+    def request_poll(self, pr_key, status=None):
+        with self._poll_requests_lock:
+            if status is not None or pr_key not in self._poll_requests:
+                self._poll_requests[pr_key] = status
+        scheduler = self.schedulers.get(RepoRef.from_pr_key(pr_key)[0].server_address)
+        if scheduler:
+            scheduler.schedule_now(pr_key)
+
+    def _take_pushed_statuses(self, pr_list):
+        with self._poll_requests_lock:
+            return {pr.key: self._poll_requests.pop(pr.key) for pr in pr_list if pr.key in self._poll_requests}
+
+    def _restore_schedule(self, server_address):
+        # Restored PRs keep their due times from before the restart, overdue ones are checked at once. None of them
+        # waits longer than the warm start delay, so the revalidation is not held up by the slowly polled PRs.
+        now = time.time()
+        restored_due_times = WatchListStore.get_instance().pop_restored_due_times(server_address)
+        self.schedulers[server_address].restore(
+            {pr_key: min(max((next_due or now) - now, 0), constants.WARM_START_MAX_DELAY)
+             for pr_key, next_due in restored_due_times.items()})
+        if restored_due_times:
+            self._revalidating_keys[server_address] = set(restored_due_times)
+            self._revalidated_updates[server_address] = []
+
+    def _run_host_lane(self, server_address):
+        _logger.info("[UPDATE_THREAD][%s] Lane Started!", server_address)
+        if self.use_async_engine:
+            self._run_async_engine(server_address)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._run_schedule(server_address, lambda pr_list: _check_prs(executor, pr_list))
+
+    def _run_async_engine(self, server_address):
+        # The async engine, and aiohttp if it is installed, are loaded only when they are used
+        from app.bitbucket_async_interaction import AsyncBitbucketClient
+
+        # All the cycles run on the same event loop, so the connections of the client are kept alive between cycles
+        loop = asyncio.new_event_loop()
+        client = AsyncBitbucketClient()
+        loop.run_until_complete(client.open())
+        try:
+            self._run_schedule(server_address,
+                               lambda pr_list: loop.run_until_complete(_check_prs_async(client, pr_list)))
+        finally:
+            loop.run_until_complete(client.close())
+            loop.close()
+
+    def _run_schedule(self, server_address, check_prs):
+        # Each cycle checks only the PRs of the server that are due, intervals of the PRs depend on their statuses
+        scheduler = self.schedulers[server_address]
+        while not self.stop_event.wait(timeout=scheduler.get_wait_time()):
+            repo_info = RepoInfo.get_instance()
+            if self.skip_cycles:
+                continue
+            if not repo_info.get_access_token(server_address):
+                continue
+            pr_list = [pr for pr in PrListManager.get_instance().get_pr_list()
+                       if pr.repo.server_address == server_address]
+            scheduler.sync({pr.key: pr.status for pr in pr_list})
+            due_pr_keys = scheduler.pop_due()
+            if not due_pr_keys:
+                continue
+            due_pr_list = [pr for pr in pr_list if pr.key in due_pr_keys]
+            with watcher_logging.cycle_trace():
+                _logger.info("[UPDATE_THREAD][%s] Start of the Cycle! Due PR Cnt: %d", server_address,
+                             len(due_pr_list))
+                cycle_start_time = time.perf_counter()
+                self._run_guarded_cycle(server_address, check_prs, scheduler, due_pr_list)
+                cycle_duration = time.perf_counter() - cycle_start_time
+                Metrics.get_instance().record_cycle(server_address, cycle_duration, len(due_pr_list))
+                _logger.debug("[UPDATE_THREAD][%s] Build Status Memo: %s", server_address,
+                              bitbucket_rest_interaction.get_build_status_memo_stats())
+                _logger.debug("[UPDATE_THREAD][%s] Rate Limits: %s", server_address,
+                              RateGovernor.get_instance(server_address).get_limits())
+                _logger.info("[UPDATE_THREAD][%s] End of Cycle! Duration: %.3fs", server_address, cycle_duration)
+
+    def _run_guarded_cycle(self, server_address, check_prs, scheduler, pr_list):
+        # An unexpected error fails only its cycle, the lane keeps running and the PRs are polled again with backoff
+        pr_list_manager = PrListManager.get_instance()
+        try:
+            self._run_cycle(server_address, check_prs, scheduler, pr_list)
+            return
+        except Exception:
+            _logger.exception("[UPDATE_THREAD][%s] Cycle Failed!", server_address)
+        finally:
+            if pr_list_manager.release_prs_in_progress([pr.key for pr in pr_list]) == PRInProgressAction.PR_REMOVED:
+                self.listener.on_prs_removed()
+        for pr in pr_list:
+            if pr_list_manager.does_pr_item_exist(pr.key):
+                scheduler.schedule_after_error(pr.key)
+            else:
+                scheduler.remove(pr.key)
+
+    def _run_cycle(self, server_address, check_prs, scheduler, pr_list):
+        pr_list_manager = PrListManager.get_instance()
+        pr_list_manager.set_prs_in_progress([pr.key for pr in pr_list])
+        # PRs, whose statuses are pushed by the webhooks, are not fetched
+        pushed_statuses = self._take_pushed_statuses(pr_list)
+        fetched_pr_list = [pr for pr in pr_list if pushed_statuses.get(pr.key) is None]
+        check_results = dict(zip([pr.key for pr in fetched_pr_list],
+                                 check_prs(fetched_pr_list) if fetched_pr_list else []))
+        # Results are applied in the order of the list, so the changes are reported in a deterministic order
+        for pr in pr_list:
+            check_result = check_results.get(pr.key)
+            if check_result is None:
+                check_result = _PrCheckResult(None, False, [], pr.last_activity_id, pushed=True)
+                check_result.status = pushed_statuses[pr.key]
+            # Removals requested during the cycle are applied between the PRs
+            if pr_list_manager.release_pr_in_progress(pr.key) == PRInProgressAction.PR_REMOVED:
+                self.listener.on_prs_removed()
+            if not pr_list_manager.does_pr_item_exist(pr.key):
+                scheduler.remove(pr.key)
+                continue
+            if check_result.throttled:
+                # Throttled PRs keep their last known state, and are polled again after the Retry-After
+                _logger.info("[UPDATE_THREAD][-PR-%s-] Throttled, keeping the last known state!", pr.id)
+                scheduler.schedule_after_error(pr.key,
+                                               RateGovernor.get_instance(pr.repo.server_address).get_blocked_time())
+                continue
+            pr_update = self._apply_check_result(pr, check_result)
+            revalidating_keys = self._revalidating_keys.get(server_address)
+            if revalidating_keys and pr.key in revalidating_keys:
+                revalidating_keys.discard(pr.key)
+                if pr_update:
+                    self._revalidated_updates[server_address].append(pr_update)
+            elif pr_update:
+                self.listener.on_pr_updated(pr_update)
+            if check_result.pr_snapshot or check_result.pushed:
+                scheduler.schedule_for_status(pr.key, pr.status)
+            else:
+                scheduler.schedule_after_error(pr.key)
+        if pr_list_manager.release_prs_in_progress([pr.key for pr in pr_list]) == PRInProgressAction.PR_REMOVED:
+            self.listener.on_prs_removed()
+
+        # States of the checked PRs are written in one transaction, with their next due times
+        checked_pr_list = [pr for pr in pr_list if pr_list_manager.does_pr_item_exist(pr.key)]
+        WatchListStore.get_instance().save_states(checked_pr_list,
+                                                  scheduler.get_due_delays([pr.key for pr in checked_pr_list]))
+        HttpCache.get_instance().flush()
+        self._report_revalidation(server_address)
+
+        # Polls requested during the cycle are not overridden by the schedules of the cycle
+        with self._poll_requests_lock:
+            requested_pr_keys = [pr.key for pr in pr_list if pr.key in self._poll_requests]
+        for pr_key in requested_pr_keys:
+            scheduler.schedule_now(pr_key)
+
+    def _report_revalidation(self, server_address):
+        revalidating_keys = self._revalidating_keys.get(server_address)
+        if revalidating_keys is None:
+            return
+        # Restored PRs that are removed before their first checks are not waited for
+        pr_list_manager = PrListManager.get_instance()
+        revalidating_keys.difference_update([pr_key for pr_key in revalidating_keys
+                                             if not pr_list_manager.does_pr_item_exist(pr_key)])
+        if revalidating_keys:
+            return
+        del self._revalidating_keys[server_address]
+        pr_updates = self._revalidated_updates.pop(server_address)
+        _logger.info("[UPDATE_THREAD][%s] Restored PRs are Revalidated! Changed PR Cnt: %d", server_address,
+                     len(pr_updates))
+        self.listener.on_prs_revalidated(pr_updates)
+
+    def _apply_check_result(self, pr, check_result):
+        message_text = "Changes for " + pr.get_display_name() + ":"
+        change_cnt = 0
+        pr_status = check_result.status
+        pr_old_status = pr.status
+        pr.last_activity_id = check_result.last_activity_id
+        pr.last_polled = time.time()
+        if check_result.comments_changed:
+            change_cnt += 1
+            message_text += "\n" + str(change_cnt) + "- New changes in comment section." + \
+                get_activities_text(check_result.new_activities)
+        if check_result.pr_snapshot:
+            update_pr_properties(pr, check_result.pr_snapshot)
+
+        if self.force_changes:
+            change_cnt += 1
+            message_text += "\n" + str(change_cnt) + "- New comments are added."
+            pr_status = PrStatus.IN_PROGRESS
+
+        if pr_status != pr.status:
+            pr_old_status_text = pr.status_text
+            pr.status = pr_status
+            change_cnt += 1
+            message_text += "\n" + str(change_cnt) + "- Status is updated from " + pr_old_status_text + " to " + \
+                            pr.status_text + "."
+
+        if change_cnt > 0:
+            _logger.info("[UPDATE_THREAD][-PR-%s-] CHANGE_CNT: %d, MSG: %s", pr.id, change_cnt, message_text)
+            return PrUpdate(pr, pr_old_status, check_result.comments_changed, check_result.new_activities,
+                            message_text)
+        return None
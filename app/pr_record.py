@@ -0,0 +1,57 @@
+"""
+Definition of the record of a watched PR
+* Records are kept for every watched PR for the lifetime of the application, so they are declared with __slots__
+  and hold only the properties that are tracked between the checks
+* Status is stored as *PrStatus*, which is integer coded, instead of a free-form string
+* Link of the PR is not stored, it is derived from the repository reference when it is needed
+* Records of the same repository share the same *RepoRef* object
+"""
+from app.bitbucket_rest_interaction import PrStatus, get_pr_web_url, get_repo_ref
+
+_repo_refs = {}
+
+
+class PrRecord:
+    """
+    Record of a watched PR
+    :param pr_id: String representation of the PR id
+    :param status: *PrStatus* of the PR
+    :param repo_ref: *RepoRef* of the repository of the PR, the repository in the settings by default
+    """
+
+    __slots__ = ('id', 'repo', 'status', 'comment_cnt', 'open_task_cnt', 'head_commit', 'version', 'last_activity_id',
+                 'last_polled')
+
+    def __init__(self, pr_id, status=PrStatus.NO_STATUS, repo_ref=None):
+        repo_ref = get_repo_ref(repo_ref)
+        self.id = pr_id
+        self.repo = _repo_refs.setdefault(repo_ref, repo_ref)
+        self.status = status
+        self.comment_cnt = 0
+        self.open_task_cnt = 0
+        self.head_commit = None
+        self.version = None
+        self.last_activity_id = None
+        self.last_polled = None
+
+    @property
+    def key(self):
+        return self.repo.get_pr_key(self.id)
+
+    @property
+    def link(self):
+        return get_pr_web_url(self.id, self.repo)
+
+    """ Returns the name of the PR to be shown, PRs of the repository in the settings are shown with only their ids. """
+    def get_display_name(self):
+        if self.repo == get_repo_ref():
+            return "PR-" + self.id
+        return self.repo.project_name + "/" + self.repo.repo_name + " PR-" + self.id
+
+    @property
+    def status_text(self):
+        return PrStatus(self.status).name
+
+    def __str__(self):
+        return "ID: " + self.id + ", LINK: " + self.link + ", STATUS: " + self.status_text + ", COMMENT CNT: " + \
+               str(self.comment_cnt)
@@ -0,0 +1,149 @@
+"""
+Functionality definition of the global request governor of the REST interaction
+* Every request takes a token from a token bucket, so the request rate of the watcher is bounded
+* The rate is adapted to the observed rate limit responses: it is halved on a 429 response and recovers slowly on
+  successful responses
+* Retry-After of the server is honored: requests are rejected with *RateLimitedError* until the given time
+* Each server has its own governor, so a throttled server does not hold back the requests to the other servers
+* This is a SINGLETON class, with an additional instance per server
+"""
+import email.utils
+import threading
+import time
+from app import constants_def as constants
+from app.exception_definitions.rate_limited_error import RateLimitedError
+
+HEADER_RETRY_AFTER = "Retry-After"
+HTTP_TOO_MANY_REQUESTS = 429
+
+
+def parse_retry_after(retry_after):
+    """
+    Parses the value of a Retry-After header, that can either be delay seconds or an HTTP date
+    :param retry_after: String representation of the header value, None if the header is not sent
+    :returns: Seconds to wait
+    """
+    if not retry_after:
+        return constants.RATE_LIMIT_DEFAULT_RETRY_AFTER
+    try:
+        return max(float(retry_after), 0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return constants.RATE_LIMIT_DEFAULT_RETRY_AFTER
+
+
+class RateGovernor:
+
+    """ Singleton reference of the class. """
+    _instance = None
+
+    """ References of the per server instances of the class. """
+    _host_instances = {}
+    _host_instances_lock = threading.Lock()
+
+    """ Virtually private declaration of class constructor. """
+    def __init__(self, clock=time.monotonic, host=None):
+        if host is not None or not RateGovernor._instance:
+            self.host = host
+            self.rate = constants.RATE_LIMIT_INITIAL_RATE
+            self.burst = constants.RATE_LIMIT_BURST
+            self.tokens = float(self.burst)
+            self.throttled_cnt = 0
+            self._clock = clock
+            self._last_refill = clock()
+            self._blocked_until = 0
+            self._lock = threading.Lock()
+            if host is None:
+                RateGovernor._instance = self
+
+    """
+    Method to retrieve the reference to the singleton class object, or to the instance of the given server.
+    :param host: String representation of the host of the server, None for the singleton
+    """
+    @staticmethod
+    def get_instance(host=None):
+        if host is None:
+            if not RateGovernor._instance:
+                RateGovernor()
+            return RateGovernor._instance
+        with RateGovernor._host_instances_lock:
+            if host not in RateGovernor._host_instances:
+                RateGovernor._host_instances[host] = RateGovernor(host=host)
+            return RateGovernor._host_instances[host]
+
+    """
+    Returns the current limits of the governors of all the servers.
+    :returns: Dictionary of the hosts to their limits
+    """
+    @staticmethod
+    def get_all_limits():
+        with RateGovernor._host_instances_lock:
+            host_instances = dict(RateGovernor._host_instances)
+        return {host: rate_governor.get_limits() for host, rate_governor in host_instances.items()}
+
+    """
+    Reserves a token for a request, without waiting for it.
+    :returns: Seconds to wait before sending the request
+    :raises RateLimitedError: If the requests are blocked by a Retry-After of the server
+    """
+    def reserve(self):
+        with self._lock:
+            now = self._clock()
+            if self._blocked_until > now:
+                raise RateLimitedError("Blocked by Retry-After", self._blocked_until - now)
+            self._refill(now)
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    """
+    Waits for a token for a request.
+    :raises RateLimitedError: If the requests are blocked by a Retry-After of the server
+    """
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    """
+    Adapts the rate to a rate limit response of the server and blocks the requests until its Retry-After.
+    :param retry_after: Value of the Retry-After header of the response, None if not sent
+    :returns: Seconds to wait before the next request
+    """
+    def on_rate_limited(self, retry_after):
+        delay = parse_retry_after(retry_after)
+        with self._lock:
+            now = self._clock()
+            self.throttled_cnt += 1
+            self.rate = max(self.rate * constants.RATE_LIMIT_DECREASE_FACTOR, constants.RATE_LIMIT_MIN_RATE)
+            self.tokens = min(self.tokens, 0)
+            self._blocked_until = max(self._blocked_until, now + delay)
+        return delay
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.rate + constants.RATE_LIMIT_RECOVERY_STEP, constants.RATE_LIMIT_MAX_RATE)
+
+    def get_blocked_time(self):
+        with self._lock:
+            return max(self._blocked_until - self._clock(), 0)
+
+    """
+    Returns the current limits of the governor.
+    :returns: Dictionary of the request rate per second, the burst size, the available tokens, the remaining blocked
+    time in seconds and the count of the rate limit responses
+    """
+    def get_limits(self):
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            return {"rate": round(self.rate, 2), "burst": self.burst, "tokens": round(self.tokens, 2),
+                    "blocked_for": round(max(self._blocked_until - now, 0), 2), "throttled_cnt": self.throttled_cnt}
+
+    def _refill(self, now):
+        self.tokens = min(self.tokens + (now - self._last_refill) * self.rate, self.burst)
+        self._last_refill = now
@@ -1,29 +1,93 @@
-class RepoInfo:
-
-    """ Singleton reference of the class """
-    _instance = None
-
-    """ Virtually private declaration of class constructor """
-    def __init__(self):
-        if not RepoInfo._instance:
-            self.access_token = ""
-            self.api_version = ""
-            self.server_address = ""
-            self.project_name = ""
-            self.repo_name = ""
-            RepoInfo._instance = self
-
-    """ Method to retrieve the reference to the singleton class object """
-    @staticmethod
-    def get_instance():
-        if not RepoInfo._instance:
-            RepoInfo()
-        return RepoInfo._instance
-
-    @staticmethod
-    def are_all_fields_set():
-        if not RepoInfo._instance or not RepoInfo._instance.access_token or not RepoInfo._instance.api_version \
-                or not RepoInfo._instance.server_address or not RepoInfo._instance.project_name \
-                or not RepoInfo._instance.repo_name:
-            return False
-        return True
+from collections import namedtuple
+
+
+class RepoRef(namedtuple('RepoRef', ['server_address', 'project_name', 'repo_name'])):
+    """
+    Reference of a watched repository, PRs of several repositories on several servers can be watched at the same time.
+    API version and the access token are not part of the reference, they are resolved per server from *RepoInfo*.
+    :param server_address: String representation of the server address (e.g. api.bitbucket.org)
+    :param project_name: String representation of the project name
+    :param repo_name: String representation of the repository name
+    """
+
+    __slots__ = ()
+
+    """ Returns the reference of the repository set in the settings. """
+    @staticmethod
+    def get_default():
+        repo_info = RepoInfo.get_instance()
+        return RepoRef(repo_info.server_address, repo_info.project_name, repo_info.repo_name)
+
+    """
+    Returns the key of the PR in the repository, PRs are keyed by (server address, project, repository, PR id).
+    :param pr_id: String representation of the PR id
+    """
+    def get_pr_key(self, pr_id):
+        return tuple(self) + (pr_id,)
+
+    """
+    Splits the key of a PR into the reference of its repository and its id.
+    :param pr_key: Key of the PR
+    :returns: Tuple of the *RepoRef* and the string representation of the PR id
+    """
+    @staticmethod
+    def from_pr_key(pr_key):
+        return RepoRef(*pr_key[:3]), pr_key[3]
+
+
+class RepoInfo:
+
+    """ Singleton reference of the class """
+    _instance = None
+
+    """ Virtually private declaration of class constructor """
+    def __init__(self):
+        if not RepoInfo._instance:
+            self.access_token = ""
+            self.api_version = ""
+            self.server_address = ""
+            self.project_name = ""
+            self.repo_name = ""
+            self.server_access_tokens = {}
+            RepoInfo._instance = self
+
+    """ Method to retrieve the reference to the singleton class object """
+    @staticmethod
+    def get_instance():
+        if not RepoInfo._instance:
+            RepoInfo()
+        return RepoInfo._instance
+
+    """
+    Returns the access token of the server. Servers other than the one in the settings can have their own tokens,
+    the token in the settings is used for the servers without one.
+    :param server_address: String representation of the server address
+    """
+    def get_access_token(self, server_address):
+        return self.server_access_tokens.get(server_address) or self.access_token
+
+    """
+    Parses the access tokens of the servers, given in "server_address=access_token" pairs separated with ";".
+    :param server_tokens_text: String representation of the server tokens
+    :returns: Dictionary of the server addresses to their access tokens
+    """
+    @staticmethod
+    def parse_server_access_tokens(server_tokens_text):
+        server_access_tokens = {}
+        for server_token in (server_tokens_text or "").split(";"):
+            server_address, _, access_token = server_token.partition("=")
+            if server_address.strip() and access_token.strip():
+                server_access_tokens[server_address.strip()] = access_token.strip()
+        return server_access_tokens
+
+    @staticmethod
+    def are_all_fields_set(repo_ref=None):
+        if repo_ref is not None:
+            return bool(RepoInfo._instance and RepoInfo._instance.api_version and repo_ref.server_address and
+                        repo_ref.project_name and repo_ref.repo_name and
+                        RepoInfo._instance.get_access_token(repo_ref.server_address))
+        if not RepoInfo._instance or not RepoInfo._instance.access_token or not RepoInfo._instance.api_version \
+                or not RepoInfo._instance.server_address or not RepoInfo._instance.project_name \
+                or not RepoInfo._instance.repo_name:
+            return False
+        return True
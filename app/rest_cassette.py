@@ -0,0 +1,204 @@
+"""
+Functionality definition of the record and replay mode of the REST interaction, to profile real workloads offline
+* Recording writes every request and response of the session with its duration to a cassette, a gzip compressed
+  JSON lines file. The access token of the Authorization header is redacted, and the cookies and the user headers
+  of the responses are dropped before it is written.
+* Replaying serves the responses of a cassette without any network access, after the recorded durations divided by
+  the speed, 0 for no waiting
+* Requests are matched by their methods, urls and bodies, responses of the same request are served in the recorded
+  order, the last one is repeated once they are used up
+* Conditional requests are answered as the HTTP cache of the replaying watcher expects, a recorded 304 is served
+  with the cached body to a request without validators, and a recorded 200 is served as 304 to a request whose
+  ETag matches
+* This is a SINGLETON class
+"""
+import gzip
+import json
+import threading
+import time
+from collections import deque
+import requests
+from requests.structures import CaseInsensitiveDict
+from app import constants_def as constants
+from app.exception_definitions.no_recorded_response_error import NoRecordedResponseError
+from app.http_cache import HEADER_ETAG, HEADER_IF_NONE_MATCH, HEADER_IF_MODIFIED_SINCE, HTTP_NOT_MODIFIED
+
+""" Modes of the cassette """
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+REDACTED_AUTH = "Bearer <redacted>"
+_HEADER_AUTH = "Authorization"
+""" Headers carrying the credentials or the identity of the user, they are not written to the cassette """
+_REQUEST_CREDENTIAL_HEADERS = ("cookie", "proxy-authorization")
+_RESPONSE_CREDENTIAL_HEADERS = ("set-cookie", "x-ausername", "x-auserid", "x-asessionid", "www-authenticate",
+                                "proxy-authenticate")
+_HTTP_OK = 200
+
+
+def _get_request_key(method, url, body):
+    return method.upper(), url, json.dumps(body, sort_keys=True) if body is not None else None
+
+
+def read_interactions(cassette_path):
+    """
+    Reads the recorded interactions of a cassette, a cassette of an interrupted recording is read up to its end
+    :param cassette_path: Path of the cassette file
+    :returns: List of the interactions, as dictionaries
+    """
+    interactions = []
+    with gzip.open(cassette_path, "rt", encoding="utf-8") as cassette_file:
+        try:
+            for line in cassette_file:
+                if line.strip():
+                    interactions.append(json.loads(line))
+        except (EOFError, ValueError):
+            pass
+    return interactions
+
+
+def remove_credential_headers(headers, credential_headers):
+    return {name: value for name, value in (headers or {}).items() if name.lower() not in credential_headers}
+
+
+def create_response(method, url, status_code, headers, content):
+    rsp = requests.Response()
+    rsp.status_code = status_code
+    rsp.headers = CaseInsensitiveDict(headers)
+    rsp._content = content
+    rsp.url = url
+    rsp.reason = ""
+    rsp.request = requests.Request(method, url).prepare()
+    return rsp
+
+
+class RestCassette:
+
+    """ Singleton reference of the class. """
+    _instance = None
+
+    """ Virtually private declaration of class constructor. """
+    def __init__(self):
+        if not RestCassette._instance:
+            self.mode = MODE_OFF
+            self.path = None
+            self.speed = constants.CASSETTE_REPLAY_SPEED
+            self._file = None
+            self._start_time = None
+            self._responses = {}
+            self._lock = threading.Lock()
+            RestCassette._instance = self
+
+    """ Method to retrieve the reference to the singleton class object. """
+    @staticmethod
+    def get_instance():
+        if not RestCassette._instance:
+            RestCassette()
+        return RestCassette._instance
+
+    @property
+    def is_recording(self):
+        return self.mode == MODE_RECORD
+
+    @property
+    def is_replaying(self):
+        return self.mode == MODE_REPLAY
+
+    """
+    Starts recording the requests to the cassette, the cassette is appended to if it exists.
+    :param cassette_path: Path of the cassette file
+    :raises OSError: If the cassette cannot be opened
+    """
+    def start_recording(self, cassette_path):
+        self.stop()
+        with self._lock:
+            self._file = gzip.open(cassette_path, "at", encoding="utf-8")
+            self._start_time = time.time()
+            self.path = cassette_path
+            self.mode = MODE_RECORD
+
+    """
+    Starts serving the requests from the cassette.
+    :param cassette_path: Path of the cassette file
+    :param speed: Replay speed relative to the recorded durations, 0 to serve the responses without waiting
+    :raises OSError: If the cassette cannot be read
+    """
+    def start_replaying(self, cassette_path, speed=constants.CASSETTE_REPLAY_SPEED):
+        self.stop()
+        responses = {}
+        for interaction in read_interactions(cassette_path):
+            request_key = _get_request_key(interaction["method"], interaction["url"], interaction.get("request_body"))
+            responses.setdefault(request_key, deque()).append(interaction)
+        with self._lock:
+            self._responses = responses
+            self.speed = speed
+            self.path = cassette_path
+            self.mode = MODE_REPLAY
+
+    def stop(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            self._responses = {}
+            self.mode = MODE_OFF
+
+    """
+    Writes the request and its response to the cassette.
+    :param method: Method of the request
+    :param url: Url of the request
+    :param headers: Headers of the request, the Authorization header is redacted and the cookies are dropped
+    :param body: JSON body of the request, None if it has no body
+    :param rsp: *requests.Response* object of the request
+    :param elapsed: Duration of the request in seconds
+    :param cached_content: Cached body of the url, for the 304 responses
+    """
+    def record(self, method, url, headers, body, rsp, elapsed, cached_content=None):
+        request_headers = remove_credential_headers(headers, _REQUEST_CREDENTIAL_HEADERS)
+        if _HEADER_AUTH in request_headers:
+            request_headers[_HEADER_AUTH] = REDACTED_AUTH
+        interaction = {"time": round(time.time() - self._start_time, 3), "method": method.upper(), "url": url,
+                       "request_headers": request_headers, "request_body": body, "status": rsp.status_code,
+                       "headers": remove_credential_headers(rsp.headers, _RESPONSE_CREDENTIAL_HEADERS),
+                       "content": rsp.content.decode("utf-8", "replace"), "elapsed": round(elapsed, 4)}
+        if cached_content is not None and rsp.status_code == HTTP_NOT_MODIFIED:
+            interaction["cached_content"] = cached_content.decode("utf-8", "replace")
+        line = json.dumps(interaction, separators=(",", ":"))
+        with self._lock:
+            if self._file:
+                self._file.write(line + "\n")
+                # Each interaction is flushed, so an interrupted recording can still be replayed
+                self._file.flush()
+
+    """
+    Serves the recorded response of the request, after its recorded duration divided by the speed.
+    :param method: Method of the request
+    :param url: Url of the request
+    :param headers: Headers of the request
+    :param body: JSON body of the request, None if it has no body
+    :returns: *requests.Response* object
+    :raises NoRecordedResponseError: If there is no recorded response for the request
+    """
+    def replay(self, method, url, headers, body=None):
+        with self._lock:
+            recorded_responses = self._responses.get(_get_request_key(method, url, body))
+            if not recorded_responses:
+                raise NoRecordedResponseError(method, url)
+            interaction = recorded_responses.popleft() if len(recorded_responses) > 1 else recorded_responses[0]
+        if self.speed > 0:
+            time.sleep(interaction["elapsed"] / self.speed)
+
+        status_code = interaction["status"]
+        rsp_headers = interaction["headers"]
+        content = interaction["content"]
+        headers = CaseInsensitiveDict(headers or {})
+        has_validators = HEADER_IF_NONE_MATCH in headers or HEADER_IF_MODIFIED_SINCE in headers
+        if status_code == HTTP_NOT_MODIFIED and not has_validators and "cached_content" in interaction:
+            status_code = _HTTP_OK
+            content = interaction["cached_content"]
+        elif status_code == _HTTP_OK and headers.get(HEADER_IF_NONE_MATCH) and \
+                headers.get(HEADER_IF_NONE_MATCH) == CaseInsensitiveDict(rsp_headers).get(HEADER_ETAG):
+            status_code = HTTP_NOT_MODIFIED
+            content = ""
+        return create_response(method.upper(), url, status_code, rsp_headers, content.encode("utf-8"))
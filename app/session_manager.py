@@ -0,0 +1,91 @@
+"""
+Functionality definition of the shared HTTP session layer for the REST interaction
+* Each server has its own keep-alive session, so the connection pools of the servers are separated and a slow server
+  cannot use up the connections of the others
+* This is a SINGLETON class
+"""
+import threading
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from app import constants_def as constants
+
+
+class SessionManager:
+
+    """ Singleton reference of the class. """
+    _instance = None
+
+    """ Virtually private declaration of class constructor. """
+    def __init__(self):
+        if not SessionManager._instance:
+            self.pool_size = constants.HTTP_POOL_SIZE_PER_HOST
+            self._sessions = {}
+            self._lock = threading.Lock()
+            SessionManager._instance = self
+
+    """ Method to retrieve the reference to the singleton class object. """
+    @staticmethod
+    def get_instance():
+        if not SessionManager._instance:
+            SessionManager()
+        return SessionManager._instance
+
+    """
+    Returns the shared keep-alive session of the host, creates it on the first call for the host.
+    Sessions are shared between the threads, connections are reused from the pool of the session.
+    :param host: String representation of the host of the server, None for a session shared by all the hosts
+    :returns: *requests.Session* object
+    """
+    def get_session(self, host=None):
+        with self._lock:
+            if host not in self._sessions:
+                self._sessions[host] = self._create_session()
+            return self._sessions[host]
+
+    """
+    Updates the connection pool size per host. The current sessions are closed and new ones will be created with the
+    new pool size on the next requests.
+    :param pool_size: Maximum number of kept-alive connections per host
+    """
+    def set_pool_size(self, pool_size):
+        if pool_size < 1:
+            return False
+        with self._lock:
+            self.pool_size = pool_size
+            self._close_sessions()
+        return True
+
+    """
+    Opens a connection to the given url in the background, so the first request of the check thread does not pay
+    for the TCP and TLS handshakes.
+    :param url: String representation of the url to be connected
+    :param headers: Request headers to be sent with the warm up request
+    :returns: Started *threading.Thread* object
+    """
+    def warm_up(self, url, headers):
+        warm_up_thread = threading.Thread(target=self._warm_up, args=(url, headers,), daemon=True)
+        warm_up_thread.start()
+        return warm_up_thread
+
+    def _warm_up(self, url, headers):
+        try:
+            self.get_session(urlsplit(url).netloc).head(url, headers=headers, timeout=constants.HTTP_WARM_UP_TIMEOUT)
+        except requests.exceptions.RequestException:
+            pass
+
+    def close(self):
+        with self._lock:
+            self._close_sessions()
+
+    def _close_sessions(self):
+        for session in self._sessions.values():
+            session.close()
+        self._sessions.clear()
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
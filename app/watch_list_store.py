@@ -0,0 +1,195 @@
+"""
+Functionality definition of the persistent store of the watch-list
+* Watched PRs and their last known states are persisted to a local SQLite file, so a restarted watcher restores the
+  watch-list at once and compares the first check of each PR with its state before the restart
+* Validators of the HTTP responses are persisted by *HttpCache*, the version of the PR resource is stored here
+* PRs are inserted and deleted when they are added to and removed from the watch-list, states of the checked PRs are
+  written in one transaction per cycle
+* Next due times are stored as wall clock times, since the monotonic clock of the scheduler does not survive a restart
+* This is a SINGLETON class
+"""
+import os
+import sqlite3
+import threading
+import time
+from app import constants_def as constants, watcher_logging
+from app.bitbucket_rest_interaction import PrStatus
+from app.pr_record import PrRecord
+from app.repo_info import RepoRef
+
+_logger = watcher_logging.get_logger("watch_list_store")
+
+_STATE_COLUMNS = ("status", "comment_cnt", "open_task_cnt", "head_commit", "version", "last_activity_id",
+                  "last_polled")
+
+
+def get_default_store_path():
+    return os.path.join(os.path.expanduser("~"), constants.APP_DATA_DIR_NAME, constants.WATCH_LIST_STORE_FILE_NAME)
+
+
+def get_stored_status(pr_id, status_value):
+    # A status unknown to this version, e.g. written by another version, is checked again from scratch
+    try:
+        return PrStatus(status_value)
+    except ValueError:
+        _logger.warning("[WATCH_LIST] Unknown status %s of PR %s, it is restored without a status!", status_value,
+                        pr_id)
+        return PrStatus.NO_STATUS
+
+
+def _get_state_values(pr):
+    return tuple(getattr(pr, column) for column in _STATE_COLUMNS)
+
+
+class WatchListStore:
+
+    """ Singleton reference of the class. """
+    _instance = None
+
+    """ Virtually private declaration of class constructor. """
+    def __init__(self, db_path=None):
+        if not WatchListStore._instance:
+            self.enabled = constants.WATCH_LIST_STORE_ENABLED
+            self.db_path = db_path if db_path else get_default_store_path()
+            self._restored_due_times = {}
+            self._lock = threading.Lock()
+            self._conn = None
+            self._loaded = False
+            WatchListStore._instance = self
+
+    """ Method to retrieve the reference to the singleton class object. """
+    @staticmethod
+    def get_instance():
+        if not WatchListStore._instance:
+            WatchListStore()
+        return WatchListStore._instance
+
+    """
+    Reads the watched PRs with their last known states, in the order they are added to the watch-list.
+    Next due times of the PRs are kept, to be taken by the schedulers of the servers.
+    :returns: List of *PrRecord* objects
+    """
+    def load_records(self):
+        if not self.enabled:
+            return []
+        pr_list = []
+        with self._lock:
+            self._load()
+            rows = self._query("SELECT server_address, project_name, repo_name, pr_id, " + ", ".join(_STATE_COLUMNS) +
+                               ", next_due FROM watched_prs ORDER BY rowid")
+            for row in rows:
+                pr = PrRecord(row[3], get_stored_status(row[3], row[4]), RepoRef(*row[:3]))
+                for column, value in zip(_STATE_COLUMNS[1:], row[5:-1]):
+                    setattr(pr, column, value)
+                pr_list.append(pr)
+                self._restored_due_times[pr.key] = row[-1]
+        return pr_list
+
+    """
+    Takes the next due times of the restored PRs of the server, so they are scheduled only once.
+    :param server_address: String representation of the server address
+    :returns: Dictionary of the keys of the PRs to their next due times, in wall clock seconds
+    """
+    def pop_restored_due_times(self, server_address):
+        with self._lock:
+            restored_due_times = {pr_key: next_due for pr_key, next_due in self._restored_due_times.items()
+                                  if RepoRef.from_pr_key(pr_key)[0].server_address == server_address}
+            for pr_key in restored_due_times:
+                del self._restored_due_times[pr_key]
+        return restored_due_times
+
+    """
+    Inserts the PR that is added to the watch-list with its current state.
+    :param pr: *PrRecord* object
+    """
+    def add_record(self, pr):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._load()
+            self._execute("INSERT OR IGNORE INTO watched_prs (server_address, project_name, repo_name, pr_id, " +
+                          ", ".join(_STATE_COLUMNS) + ", next_due) VALUES (" + ", ".join("?" * 12) + ")",
+                          pr.key + _get_state_values(pr) + (None,))
+            self._commit()
+
+    """
+    Deletes the PR that is removed from the watch-list.
+    :param pr_key: Key of the PR
+    """
+    def remove_record(self, pr_key):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._load()
+            self._restored_due_times.pop(pr_key, None)
+            self._execute("DELETE FROM watched_prs WHERE server_address = ? AND project_name = ? AND repo_name = ? "
+                          "AND pr_id = ?", pr_key)
+            self._commit()
+
+    """
+    Writes the states of the PRs checked in a cycle in one transaction. PRs that are removed from the watch-list in the
+    meantime are not inserted again.
+    :param pr_list: List of *PrRecord* objects
+    :param due_delays: Dictionary of the keys of the PRs to the seconds until their next checks
+    """
+    def save_states(self, pr_list, due_delays):
+        if not self.enabled or not pr_list:
+            return
+        now = time.time()
+        with self._lock:
+            self._load()
+            self._execute_many("UPDATE watched_prs SET " + ", ".join(column + " = ?" for column in _STATE_COLUMNS) +
+                               ", next_due = ? WHERE server_address = ? AND project_name = ? AND repo_name = ? "
+                               "AND pr_id = ?",
+                               [_get_state_values(pr) + (now + due_delays.get(pr.key, 0),) + pr.key
+                                for pr in pr_list])
+            self._commit()
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS watched_prs (server_address TEXT, project_name TEXT, "
+                               "repo_name TEXT, pr_id TEXT, status INTEGER, comment_cnt INTEGER, "
+                               "open_task_cnt INTEGER, head_commit TEXT, version INTEGER, last_activity_id INTEGER, "
+                               "last_polled REAL, next_due REAL, "
+                               "PRIMARY KEY (server_address, project_name, repo_name, pr_id))")
+            self._commit()
+        except (OSError, sqlite3.Error):
+            # Watch-list is kept only in memory, if the local store cannot be used
+            self._conn = None
+
+    def _query(self, sql, params=()):
+        if not self._conn:
+            return []
+        try:
+            return self._conn.execute(sql, params).fetchall()
+        except sqlite3.Error:
+            return []
+
+    def _execute(self, sql, params=()):
+        if not self._conn:
+            return
+        try:
+            self._conn.execute(sql, params)
+        except sqlite3.Error:
+            pass
+
+    def _execute_many(self, sql, params_list):
+        if not self._conn:
+            return
+        try:
+            self._conn.executemany(sql, params_list)
+        except sqlite3.Error:
+            pass
+
+    def _commit(self):
+        if not self._conn:
+            return
+        try:
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
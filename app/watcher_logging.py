@@ -0,0 +1,126 @@
+"""
+Functionality definition of the logging of the watcher, on top of the logging module of the standard library
+* Each module logs to its own logger under "pr_watcher", so the levels can be set per module, e.g.
+  "bitbucket_rest_interaction=DEBUG;pr_poller=WARNING"
+* Messages are formatted lazily with the arguments of the logging calls, response bodies are not turned into strings
+  unless the record is emitted
+* Each poll cycle runs in a trace, the trace id is added to the records of the cycle, so the requests of a cycle can
+  be correlated
+* Debug records of the requests are sampled by the cycle, either all or none of the requests of a cycle are logged.
+  Level of the logger is checked before the sampling, so nothing more than the check is paid at the info level.
+"""
+import contextlib
+import contextvars
+import functools
+import logging
+import random
+import sys
+from app import constants_def as constants
+
+ROOT_LOGGER_NAME = "pr_watcher"
+NO_TRACE_ID = "-"
+
+""" Trace of the current cycle, as a tuple of the trace id and whether the requests of the cycle are sampled """
+_trace = contextvars.ContextVar("pr_watcher_trace", default=None)
+_sample_rate = constants.LOG_REQUEST_SAMPLE_RATE
+
+
+class _TraceIdFilter(logging.Filter):
+
+    def filter(self, record):
+        record.trace_id = get_trace_id()
+        return True
+
+
+def get_logger(module_name):
+    return logging.getLogger(ROOT_LOGGER_NAME + "." + module_name)
+
+
+def parse_module_levels(module_levels_text):
+    """
+    Parses the levels of the modules
+    :param module_levels_text: "module=LEVEL" pairs separated with ";" or ",", e.g. "pr_poller=DEBUG"
+    :returns: Dictionary of the module names and the level names
+    """
+    module_levels = {}
+    for module_level in (module_levels_text or "").replace(",", ";").split(";"):
+        module_name, _, level_name = module_level.partition("=")
+        if module_name.strip() and level_name.strip():
+            module_levels[module_name.strip()] = level_name.strip().upper()
+    return module_levels
+
+
+def configure_logging(level=constants.LOG_LEVEL, module_levels=None, sample_rate=constants.LOG_REQUEST_SAMPLE_RATE,
+                      stream=None):
+    """
+    Sets up the handler and the levels of the loggers of the watcher, previous setup is replaced
+    :param level: Name of the level of the watcher, e.g. INFO
+    :param module_levels: Dictionary of the module names and the names of their levels
+    :param sample_rate: Ratio of the cycles, that the debug records of the requests are logged for
+    :param stream: Text stream to write the records to, stderr by default
+    :raises ValueError: If a level name is not known
+    """
+    global _sample_rate
+    _sample_rate = sample_rate
+    root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter(constants.LOG_FORMAT))
+    handler.addFilter(_TraceIdFilter())
+    root_logger.addHandler(handler)
+    root_logger.propagate = False
+    root_logger.setLevel(str(level).upper())
+    for logger_name, logger in list(logging.root.manager.loggerDict.items()):
+        if logger_name.startswith(ROOT_LOGGER_NAME + ".") and isinstance(logger, logging.Logger):
+            logger.setLevel(logging.NOTSET)
+    for module_name, module_level in (module_levels or {}).items():
+        get_logger(module_name).setLevel(str(module_level).upper())
+
+
+def get_trace_id():
+    trace = _trace.get()
+    return trace[0] if trace else NO_TRACE_ID
+
+
+def is_trace_sampled():
+    trace = _trace.get()
+    return bool(trace and trace[1])
+
+
+@contextlib.contextmanager
+def cycle_trace():
+    """
+    Runs the block in a new trace, the debug records of the requests of the trace are logged with the sample rate
+    :returns: Trace id of the cycle
+    """
+    trace_id = "%08x" % random.getrandbits(32)
+    token = _trace.set((trace_id, random.random() < _sample_rate))
+    try:
+        yield trace_id
+    finally:
+        _trace.reset(token)
+
+
+def bind_trace(function):
+    """
+    Binds the function to the current trace, for the functions run on the worker threads of the cycle
+    :param function: Function to be bound
+    :returns: Function running the given function in the current trace
+    """
+    trace = _trace.get()
+
+    @functools.wraps(function)
+    def run_in_trace(*args, **kwargs):
+        token = _trace.set(trace)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _trace.reset(token)
+    return run_in_trace
+
+
+def log_request(logger, msg, *args):
+    # Level is checked first, it is the cheapest check and it is false on the info level
+    if logger.isEnabledFor(logging.DEBUG) and is_trace_sampled():
+        logger.debug(msg, *args)
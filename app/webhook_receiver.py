@@ -0,0 +1,210 @@
+"""
+Functionality definition of the webhook receiver, so the changes of the watched PRs are pushed by Bitbucket instead of
+being polled
+* Embedded HTTP listener for the pr:modified, pr:merged, pr:comment:added, pr:from_ref_updated and build status events
+* Requests are verified with the HMAC-SHA256 signature of the body in the X-Hub-Signature header, that is created with
+  the secret of the webhook. Requests without a valid signature are rejected.
+* Merged PRs are updated from the payload directly, other events request an immediate check of the matching PRs
+* Polling falls back to a slow reconciliation sweep while the receiver is running
+* Recorded payloads of tests/webhook_payloads are posted to a local receiver by tests/test_webhook_receiver.py. They
+  can also be posted by hand, the signature is created with *sign_payload*, e.g.
+  curl -H "X-Event-Key: pr:merged" -H "X-Hub-Signature: sha256=$(openssl dgst -sha256 -hmac SECRET -r payload.json |
+  cut -d' ' -f1)" --data-binary @payload.json http://localhost:PORT/
+"""
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from app import constants_def as constants, watcher_logging
+from app.bitbucket_rest_interaction import BuildStatusMemo, PrStatus
+from app.pr_list_manager import PrListManager
+
+_logger = watcher_logging.get_logger("webhook_receiver")
+
+""" Request header related constants """
+HEADER_EVENT_KEY = "X-Event-Key"
+HEADER_SIGNATURE = "X-Hub-Signature"
+HEADER_CONTENT_LENGTH = "Content-Length"
+SIGNATURE_PREFIX = "sha256="
+
+""" Event keys """
+EVENT_PR_MODIFIED = "pr:modified"
+EVENT_PR_MERGED = "pr:merged"
+EVENT_PR_COMMENT_ADDED = "pr:comment:added"
+EVENT_PR_FROM_REF_UPDATED = "pr:from_ref_updated"
+EVENT_BUILD_STATUS_CREATED = "repo:commit_status_created"
+EVENT_BUILD_STATUS_UPDATED = "repo:commit_status_updated"
+EVENT_PING = "diagnostics:ping"
+
+PR_EVENTS = (EVENT_PR_MODIFIED, EVENT_PR_MERGED, EVENT_PR_COMMENT_ADDED, EVENT_PR_FROM_REF_UPDATED)
+BUILD_STATUS_EVENTS = (EVENT_BUILD_STATUS_CREATED, EVENT_BUILD_STATUS_UPDATED)
+
+""" Payload JSON related private constants """
+_EVENT_KEY = "eventKey"
+_PULL_REQUEST = "pullRequest"
+_ID = "id"
+_STATE = "state"
+_TO_REF = "toRef"
+_REPOSITORY = "repository"
+_SLUG = "slug"
+_PROJECT = "project"
+_KEY = "key"
+_LINKS = "links"
+_SELF = "self"
+_HREF = "href"
+_COMMIT = "commit"
+_COMMIT_STATUS = "commit_status"
+_HASH = "hash"
+_MERGED_STR = "MERGED"
+
+""" HTTP status codes """
+HTTP_NO_CONTENT = 204
+HTTP_BAD_REQUEST = 400
+HTTP_UNAUTHORIZED = 401
+HTTP_PAYLOAD_TOO_LARGE = 413
+
+
+def sign_payload(secret, body):
+    return SIGNATURE_PREFIX + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def is_signature_valid(secret, body, signature):
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign_payload(secret, body), signature.strip())
+
+
+def get_payload_pr_ref(payload):
+    """
+    Reads the reference of the PR of the event from the payload
+    :param payload: JSON content of the event
+    :returns: Tuple of the server address, project, repository and the PR id, server address is None if the payload
+    has no link of the PR
+    """
+    try:
+        pr_json = payload[_PULL_REQUEST]
+        repo_json = pr_json[_TO_REF][_REPOSITORY]
+        pr_ref = (None, repo_json[_PROJECT][_KEY], repo_json[_SLUG], str(pr_json[_ID]))
+    except (KeyError, TypeError):
+        return None
+    try:
+        return (urlsplit(pr_json[_LINKS][_SELF][0][_HREF]).netloc,) + pr_ref[1:]
+    except (KeyError, IndexError, TypeError):
+        return pr_ref
+
+
+def get_payload_commit(payload):
+    commit = payload.get(_COMMIT) or (payload.get(_COMMIT_STATUS) or {}).get(_COMMIT)
+    if isinstance(commit, dict):
+        commit = commit.get(_HASH) or commit.get(_ID)
+    return commit if isinstance(commit, str) else None
+
+
+def find_watched_prs(server_address, project_name, repo_name, pr_id):
+    # Project keys and repository slugs are matched case insensitively, since they can be entered in any case
+    return [pr for pr in PrListManager.get_instance().get_pr_list()
+            if pr.id == pr_id and pr.repo.repo_name.lower() == repo_name.lower()
+            and pr.repo.project_name.lower() == project_name.lower()
+            and (server_address is None or pr.repo.server_address == server_address)]
+
+
+def find_watched_prs_by_commit(commit_sha):
+    return [pr for pr in PrListManager.get_instance().get_pr_list() if pr.head_commit == commit_sha]
+
+
+class _WebhookRequestHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        receiver = self.server.receiver
+        try:
+            content_length = int(self.headers.get(HEADER_CONTENT_LENGTH, 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0 or content_length > constants.WEBHOOK_MAX_BODY_BYTES:
+            self.send_error(HTTP_PAYLOAD_TOO_LARGE if content_length > 0 else HTTP_BAD_REQUEST)
+            return
+        body = self.rfile.read(content_length)
+        if not is_signature_valid(receiver.secret, body, self.headers.get(HEADER_SIGNATURE)):
+            _logger.warning("[WEBHOOK] Request with an invalid signature is rejected!")
+            self.send_error(HTTP_UNAUTHORIZED)
+            return
+        try:
+            payload = json.loads(body.decode("utf-8"))
+        except ValueError:
+            self.send_error(HTTP_BAD_REQUEST)
+            return
+        if not isinstance(payload, dict):
+            self.send_error(HTTP_BAD_REQUEST)
+            return
+        receiver.handle_event(self.headers.get(HEADER_EVENT_KEY) or payload.get(_EVENT_KEY), payload)
+        self.send_response(HTTP_NO_CONTENT)
+        self.end_headers()
+
+    def log_message(self, msg_format, *args):
+        _logger.debug("[WEBHOOK] %s " + msg_format, self.address_string(), *args)
+
+
+class WebhookReceiver:
+    """
+    Embedded HTTP listener of the Bitbucket webhooks, the changes are handed to the poller
+    :param poller: *PrPoller* object of the watched PRs
+    :param secret: Secret of the webhook, used to verify the signatures of the requests
+    :param port: Port to listen on, 0 for any free port
+    :param host: Address to listen on
+    """
+
+    def __init__(self, poller, secret, port, host=constants.WEBHOOK_HOST):
+        if not secret:
+            raise ValueError("Webhook secret is not set!")
+        self.poller = poller
+        self.secret = secret
+        self._http_server = ThreadingHTTPServer((host, port), _WebhookRequestHandler)
+        self._http_server.daemon_threads = True
+        self._http_server.receiver = self
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._http_server.server_address[1]
+
+    def start(self):
+        # Polling is kept only as a reconciliation sweep, for the events that are missed
+        self.poller.set_reconciliation_interval(constants.WEBHOOK_RECONCILIATION_INTERVAL)
+        self._thread = threading.Thread(target=self._http_server.serve_forever, daemon=True)
+        self._thread.start()
+        _logger.info("[WEBHOOK] Listening on port %d", self.port)
+
+    def stop(self):
+        self._http_server.shutdown()
+        self._http_server.server_close()
+        self.poller.set_reconciliation_interval(0)
+
+    """
+    Applies the event to the matching watched PRs.
+    :param event_key: Key of the event, e.g. pr:merged
+    :param payload: JSON content of the event
+    :returns: Number of the watched PRs that the event is applied to
+    """
+    def handle_event(self, event_key, payload):
+        if event_key in PR_EVENTS:
+            pr_ref = get_payload_pr_ref(payload)
+            pr_list = find_watched_prs(*pr_ref) if pr_ref else []
+            # Merged state is known from the payload, the other states need the merge check and the build status
+            is_merged = (payload.get(_PULL_REQUEST) or {}).get(_STATE) == _MERGED_STR
+            for pr in pr_list:
+                self.poller.request_poll(pr.key, PrStatus.MERGED if is_merged else None)
+        elif event_key in BUILD_STATUS_EVENTS:
+            commit_sha = get_payload_commit(payload)
+            pr_list = find_watched_prs_by_commit(commit_sha) if commit_sha else []
+            if commit_sha:
+                BuildStatusMemo.get_instance().invalidate(commit_sha)
+            for pr in pr_list:
+                self.poller.request_poll(pr.key)
+        else:
+            pr_list = []
+            if event_key != EVENT_PING:
+                _logger.info("[WEBHOOK] Event is ignored: %s", event_key)
+        _logger.info("[WEBHOOK] %s is applied to %d PRs", event_key, len(pr_list))
+        return len(pr_list)
@@ -1,42 +1,51 @@
-import winreg
-from app.exception_definitions import reg_key_cannot_be_read_error
-
-""" Registry Path """
-REG_PATH = r"SOFTWARE\PR Watcher\Token"
-
-""" Registry Key Names """
-REG_API_VERSION_NAME = "API Version"
-REG_ACCESS_TOKE_NAME = "Access Token"
-REG_SERVER_ADDRESS_NAME = "Server Address"
-REG_PROJECT_NAME = "Project"
-REG_REPO_NAME = "Repository"
-
-VALID_KEY_NAMES = [REG_API_VERSION_NAME, REG_ACCESS_TOKE_NAME, REG_SERVER_ADDRESS_NAME, REG_PROJECT_NAME, REG_REPO_NAME]
-
-
-def write_reg_key(key_name, token):
-    if key_name not in VALID_KEY_NAMES:
-        return False
-    try:
-        print("Write registry key called, token: " + str(token))
-        winreg.CreateKey(winreg.HKEY_CURRENT_USER, REG_PATH)
-        registry_key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, REG_PATH, 0,
-                                      winreg.KEY_WRITE)
-        winreg.SetValueEx(registry_key, key_name, 0, winreg.REG_SZ, token)
-        winreg.CloseKey(registry_key)
-        return True
-    except WindowsError:
-        return False
-
-
-def read_reg_key(key_name):
-    if key_name not in VALID_KEY_NAMES:
-        raise reg_key_cannot_be_read_error.RegKeyCannotBeReadError(str(key_name) + " is not a valid name!", key_name)
-    try:
-        registry_key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, REG_PATH, 0,
-                                      winreg.KEY_READ)
-        value, regtype = winreg.QueryValueEx(registry_key, key_name)
-        winreg.CloseKey(registry_key)
-        return value
-    except WindowsError:
-        raise reg_key_cannot_be_read_error.RegKeyCannotBeReadError("Windows error occurred!", key_name)
+import winreg
+from app import watcher_logging
+from app.exception_definitions import reg_key_cannot_be_read_error
+
+_logger = watcher_logging.get_logger("win_registry_management")
+
+""" Registry Path """
+REG_PATH = r"SOFTWARE\PR Watcher\Token"
+
+""" Registry Key Names """
+REG_API_VERSION_NAME = "API Version"
+REG_ACCESS_TOKE_NAME = "Access Token"
+REG_SERVER_ADDRESS_NAME = "Server Address"
+REG_PROJECT_NAME = "Project"
+REG_REPO_NAME = "Repository"
+REG_SERVER_ACCESS_TOKENS_NAME = "Server Access Tokens"
+REG_WEBHOOK_PORT_NAME = "Webhook Port"
+REG_WEBHOOK_SECRET_NAME = "Webhook Secret"
+REG_METRICS_PORT_NAME = "Metrics Port"
+
+VALID_KEY_NAMES = [REG_API_VERSION_NAME, REG_ACCESS_TOKE_NAME, REG_SERVER_ADDRESS_NAME, REG_PROJECT_NAME, REG_REPO_NAME,
+                   REG_SERVER_ACCESS_TOKENS_NAME, REG_WEBHOOK_PORT_NAME, REG_WEBHOOK_SECRET_NAME, REG_METRICS_PORT_NAME]
+
+
+def write_reg_key(key_name, token):
+    if key_name not in VALID_KEY_NAMES:
+        return False
+    try:
+        # Values are not logged, they can be access tokens
+        _logger.debug("Write registry key called, key: %s", key_name)
+        winreg.CreateKey(winreg.HKEY_CURRENT_USER, REG_PATH)
+        registry_key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, REG_PATH, 0,
+                                      winreg.KEY_WRITE)
+        winreg.SetValueEx(registry_key, key_name, 0, winreg.REG_SZ, token)
+        winreg.CloseKey(registry_key)
+        return True
+    except WindowsError:
+        return False
+
+
+def read_reg_key(key_name):
+    if key_name not in VALID_KEY_NAMES:
+        raise reg_key_cannot_be_read_error.RegKeyCannotBeReadError(str(key_name) + " is not a valid name!", key_name)
+    try:
+        registry_key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, REG_PATH, 0,
+                                      winreg.KEY_READ)
+        value, regtype = winreg.QueryValueEx(registry_key, key_name)
+        winreg.CloseKey(registry_key)
+        return value
+    except WindowsError:
+        raise reg_key_cannot_be_read_error.RegKeyCannotBeReadError("Windows error occurred!", key_name)
@@ -0,0 +1,288 @@
+"""
+Local stand-in of the Bitbucket Server REST API, for measuring the watcher offline
+* Serves the endpoints used by *bitbucket_rest_interaction*: the PR resource, /merge, /activities paged with
+  isLastPage and nextPageStart, and the build status stats of a commit and of a batch of commits
+* Latency of the responses, page size of the activities and the ratio of the PRs changing on each fetch are
+  configurable. Changes are new comments, new commits and finished builds, drawn from a seeded random generator.
+* Responses have ETags and conditional requests are answered with 304, as the real server does
+* Served over plain HTTP, *use_plain_http* points the https urls of the watcher at it
+* Usage: python -m benchmarks.fake_bitbucket_server [--port PORT] [--prs CNT] [--latency SECONDS] [--page-size CNT]
+  [--change-ratio RATIO]
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_VERSION = "1.0"
+PROJECT_NAME = "PROJECT"
+REPO_NAME = "repository"
+
+_PR_PATH_PATTERN = re.compile(r"^/git/rest/api/[^/]+/projects/([^/]+)/repos/([^/]+)/pull-requests/(\d+)(/activities|"
+                              r"/merge)?$")
+_STATS_PATH_PATTERN = re.compile(r"^/git/rest/build-status/[^/]+/commits/stats(?:/([0-9a-f]+))?$")
+_CHANGES = ("comment", "commit", "build")
+
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+HTTP_NOT_FOUND = 404
+
+
+class FakePr:
+    """
+    State of a PR of the fake server
+    :param pr_id: Id of the PR
+    :param activity_cnt: Number of the activities of the PR at the start
+    :param rnd: *random.Random* object to draw the states from
+    """
+
+    def __init__(self, pr_id, activity_cnt, rnd):
+        self.id = pr_id
+        self.version = 0
+        self.comment_cnt = 0
+        self.commit_cnt = 0
+        self.commit = None
+        self.conflicted = rnd.random() < 0.05
+        self.can_merge = not self.conflicted and rnd.random() < 0.1
+        self.activities = []
+        self.last_activity_id = pr_id * 1000000
+        for _ in range(activity_cnt):
+            self.add_activity("COMMENTED")
+        self.push_commit()
+
+    def add_activity(self, action):
+        self.last_activity_id += 1
+        # Activities are served newest first
+        self.activities.insert(0, {"id": self.last_activity_id, "action": action,
+                                   "user": {"displayName": "User " + str(self.last_activity_id % 7)}})
+
+    def push_commit(self):
+        self.commit_cnt += 1
+        self.commit = hashlib.sha1((str(self.id) + ":" + str(self.commit_cnt)).encode("utf-8")).hexdigest()
+
+    def change(self, change, server):
+        self.version += 1
+        if change == "comment":
+            self.comment_cnt += 1
+            self.add_activity("COMMENTED")
+        elif change == "commit":
+            self.push_commit()
+            self.add_activity("RESCOPED")
+            server.build_stats[self.commit] = {"successful": 0, "inProgress": 1, "failed": 0}
+        else:
+            stats = server.build_stats.get(self.commit)
+            if stats and stats["inProgress"]:
+                failed = server.rnd.random() < 0.2
+                server.build_stats[self.commit] = {"successful": 0 if failed else 1, "inProgress": 0,
+                                                   "failed": 1 if failed else 0}
+
+    def to_json(self, server_address):
+        return {
+            "id": self.id, "version": self.version, "state": "OPEN", "updatedDate": 1600000000000 + self.version,
+            "fromRef": {"latestCommit": self.commit},
+            "toRef": {"repository": {"slug": REPO_NAME, "project": {"key": PROJECT_NAME}}},
+            "properties": {"commentCount": self.comment_cnt, "openTaskCount": 0},
+            "links": {"self": [{"href": "http://" + server_address + "/git/projects/" + PROJECT_NAME + "/repos/" +
+                                        REPO_NAME + "/pull-requests/" + str(self.id)}]},
+        }
+
+
+class FakeBitbucketServer:
+    """
+    Fake Bitbucket Server with the given number of PRs, with ids from 1 on
+    :param pr_cnt: Number of the PRs
+    :param port: Port to listen on, 0 for any free port
+    :param latency: Seconds to wait before each response
+    :param page_size: Number of the activities in a page
+    :param change_ratio: Probability of a PR to change when it is fetched
+    :param activity_cnt: Number of the activities of each PR at the start
+    :param seed: Seed of the random generator of the states and the changes
+    """
+
+    def __init__(self, pr_cnt, port=0, latency=0.0, page_size=25, change_ratio=0.0, activity_cnt=30, seed=1):
+        self.latency = latency
+        self.page_size = page_size
+        self.change_ratio = change_ratio
+        self.rnd = random.Random(seed)
+        self.prs = {pr_id: FakePr(pr_id, activity_cnt, self.rnd) for pr_id in range(1, pr_cnt + 1)}
+        self.build_stats = {}
+        for pr in self.prs.values():
+            build_result = self.rnd.random()
+            self.build_stats[pr.commit] = {"successful": int(build_result < 0.7), "inProgress": int(build_result > 0.9),
+                                           "failed": int(0.7 <= build_result <= 0.9)}
+        self.request_cnt = 0
+        self.lock = threading.Lock()
+        self._http_server = ThreadingHTTPServer(("127.0.0.1", port), _FakeRequestHandler)
+        self._http_server.daemon_threads = True
+        self._http_server.fake_server = self
+        self._thread = None
+
+    @property
+    def server_address(self):
+        return "127.0.0.1:" + str(self._http_server.server_address[1])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._http_server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        self._http_server.serve_forever()
+
+    def stop(self):
+        self._http_server.shutdown()
+        self._http_server.server_close()
+
+    def get_pr_json(self, pr_id):
+        pr = self.prs.get(pr_id)
+        if not pr:
+            return None
+        if self.change_ratio and self.rnd.random() < self.change_ratio:
+            pr.change(self.rnd.choice(_CHANGES), self)
+        return pr.to_json(self.server_address)
+
+    def get_merge_json(self, pr_id):
+        pr = self.prs.get(pr_id)
+        if not pr:
+            return None
+        return {"canMerge": pr.can_merge, "conflicted": pr.conflicted, "outcome": "CONFLICTED" if pr.conflicted
+                else "CLEAN", "vetoes": []}
+
+    def get_activities_json(self, pr_id, start, limit):
+        pr = self.prs.get(pr_id)
+        if not pr:
+            return None
+        limit = limit or self.page_size
+        values = pr.activities[start:start + limit]
+        is_last_page = start + limit >= len(pr.activities)
+        rsp_json = {"size": len(values), "limit": limit, "start": start, "isLastPage": is_last_page,
+                    "values": values}
+        if not is_last_page:
+            rsp_json["nextPageStart"] = start + limit
+        return rsp_json
+
+    def get_stats_json(self, commit_sha):
+        return self.build_stats.get(commit_sha, {"successful": 0, "inProgress": 0, "failed": 0})
+
+    def get_batch_stats_json(self, commit_shas):
+        return {commit_sha: self.get_stats_json(commit_sha) for commit_sha in commit_shas}
+
+
+class _FakeRequestHandler(BaseHTTPRequestHandler):
+
+    # Connections are kept alive, as the real server does
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        fake_server = self.server.fake_server
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        start = int(query.get("start", ["0"])[0])
+        limit = int(query.get("limit", ["0"])[0])
+        with fake_server.lock:
+            fake_server.request_cnt += 1
+            pr_match = _PR_PATH_PATTERN.match(url.path)
+            stats_match = _STATS_PATH_PATTERN.match(url.path)
+            if pr_match:
+                pr_id = int(pr_match.group(3))
+                if pr_match.group(4) == "/activities":
+                    rsp_json = fake_server.get_activities_json(pr_id, start, limit)
+                elif pr_match.group(4) == "/merge":
+                    rsp_json = fake_server.get_merge_json(pr_id)
+                else:
+                    rsp_json = fake_server.get_pr_json(pr_id)
+            elif stats_match and stats_match.group(1):
+                rsp_json = fake_server.get_stats_json(stats_match.group(1))
+            else:
+                rsp_json = None
+        self._send_json(rsp_json)
+
+    def do_HEAD(self):
+        self.send_response(HTTP_OK)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        fake_server = self.server.fake_server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with fake_server.lock:
+            fake_server.request_cnt += 1
+            stats_match = _STATS_PATH_PATTERN.match(urlsplit(self.path).path)
+            rsp_json = fake_server.get_batch_stats_json(json.loads(body or b"[]")) \
+                if stats_match and not stats_match.group(1) else None
+        self._send_json(rsp_json, use_etag=False)
+
+    def _send_json(self, rsp_json, use_etag=True):
+        latency = self.server.fake_server.latency
+        if latency:
+            time.sleep(latency)
+        if rsp_json is None:
+            self.send_response(HTTP_NOT_FOUND)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(rsp_json).encode("utf-8")
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if use_etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTP_NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(HTTP_OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if use_etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, msg_format, *args):
+        pass
+
+
+def use_plain_http(server_address, pool_size):
+    """
+    Sends the requests of the watcher to the server over plain HTTP, the urls of the watcher are always https
+    :param server_address: Address of the fake server, as host:port
+    :param pool_size: Maximum number of kept-alive connections to the server
+    """
+    from requests.adapters import HTTPAdapter
+    from app.session_manager import SessionManager
+
+    class _PlainHttpAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            request.url = "http://" + request.url[len("https://"):]
+            return super().send(request, **kwargs)
+
+    SessionManager.get_instance().get_session(server_address).mount(
+        "https://", _PlainHttpAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+
+
+def run_server(pr_cnt, port, latency, page_size, change_ratio, address_queue=None):
+    # Entry point of the server process of the benchmarks, the address is sent back once the server is listening
+    fake_server = FakeBitbucketServer(pr_cnt, port, latency, page_size, change_ratio)
+    if address_queue is not None:
+        address_queue.put(fake_server.server_address)
+    fake_server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves a fake Bitbucket Server REST API on the local machine.")
+    parser.add_argument("--port", type=int, default=7990)
+    parser.add_argument("--prs", type=int, default=100, help="Number of the PRs, with ids from 1 on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--page-size", type=int, default=25, help="Number of the activities in a page")
+    parser.add_argument("--change-ratio", type=float, default=0.0,
+                        help="Probability of a PR to change when it is fetched")
+    args = parser.parse_args()
+    print("Serving " + str(args.prs) + " PRs of " + PROJECT_NAME + "/" + REPO_NAME + " on 127.0.0.1:" + str(args.port))
+    run_server(args.prs, args.port, args.latency, args.page_size, args.change_ratio)
+
+
+if __name__ == '__main__':
+    main()
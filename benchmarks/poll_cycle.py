@@ -0,0 +1,113 @@
+"""
+Cycle time benchmark of the poller, against the fake Bitbucket Server of *fake_bitbucket_server*
+* Fake server runs in its own process, so the CPU time of the watcher is measured alone
+* For each PR count, the first cycle is cold, the following cycles are served with the conditional requests of the
+  HTTP cache. Wall time, requests and CPU time of the watcher process are reported per cycle.
+* Rate governor is lifted, so the cycles are bounded by the server and the watcher, not by the request rate
+* Usage: python -m benchmarks.poll_cycle [PR count ...] [--cycles CNT] [--latency SECONDS] [--change-ratio RATIO],
+  10, 100, 1000 and 10000 PRs by default
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app import constants_def as constants, pr_poller
+from app.bitbucket_rest_interaction import BuildStatusMemo
+from app.http_cache import HttpCache
+from app.metrics import Metrics
+from app.poll_scheduler import PollScheduler
+from app.pr_list_manager import PrListManager
+from app.pr_record import PrRecord
+from app.repo_info import RepoInfo, RepoRef
+from app.watch_list_store import WatchListStore
+from benchmarks import fake_bitbucket_server
+
+_DEFAULT_PR_CNTS = (10, 100, 1000, 10000)
+_UNLIMITED_RATE = 1000000.0
+
+
+def _get_request_cnt():
+    return sum(endpoint_snapshot["count"] for endpoint_snapshot in Metrics.get_instance().get_snapshot()["requests"]
+               .values())
+
+
+def _start_fake_server(pr_cnt, latency, change_ratio):
+    address_queue = multiprocessing.Queue()
+    server_process = multiprocessing.Process(target=fake_bitbucket_server.run_server, daemon=True,
+                                             args=(pr_cnt, 0, latency, 25, change_ratio, address_queue))
+    server_process.start()
+    return server_process, address_queue.get(timeout=60)
+
+
+def _set_up_watcher(server_address, pr_cnt):
+    repo_info = RepoInfo.get_instance()
+    repo_info.server_address = server_address
+    repo_info.api_version = fake_bitbucket_server.API_VERSION
+    repo_info.project_name = fake_bitbucket_server.PROJECT_NAME
+    repo_info.repo_name = fake_bitbucket_server.REPO_NAME
+    repo_info.access_token = "benchmark"
+    fake_bitbucket_server.use_plain_http(server_address, constants.POLL_CONCURRENCY_PER_HOST)
+    HttpCache.get_instance().clear()
+    BuildStatusMemo.get_instance().clear()
+
+    pr_list_manager = PrListManager.get_instance()
+    for pr in pr_list_manager.get_pr_list():
+        pr_list_manager.remove_pr_from_list(pr.key)
+    repo_ref = RepoRef.get_default()
+    for pr_id in range(1, pr_cnt + 1):
+        pr_list_manager.add_pr(PrRecord(str(pr_id), repo_ref=repo_ref))
+    return list(pr_list_manager.get_pr_list())
+
+
+def _measure_cycle(poller, executor, server_address, pr_list):
+    request_cnt = _get_request_cnt()
+    start_cpu_time = time.process_time()
+    start_time = time.perf_counter()
+    poller._run_cycle(server_address, lambda cycle_pr_list: pr_poller._check_prs(executor, cycle_pr_list),
+                      PollScheduler(), pr_list)
+    return (time.perf_counter() - start_time, _get_request_cnt() - request_cnt,
+            time.process_time() - start_cpu_time)
+
+
+def main(pr_cnts, cycle_cnt, latency, change_ratio):
+    # Cycles are measured without the limits and the stores of a real run
+    constants.RATE_LIMIT_INITIAL_RATE = constants.RATE_LIMIT_MAX_RATE = _UNLIMITED_RATE
+    constants.RATE_LIMIT_BURST = int(_UNLIMITED_RATE)
+    WatchListStore.get_instance().enabled = False
+    HttpCache(db_path=os.path.join(tempfile.mkdtemp(), constants.HTTP_CACHE_FILE_NAME))
+    poller = pr_poller.PrPoller(pr_poller.PrPollerListener(), threading.Event())
+
+    print("PR CNT".rjust(8) + "CYCLE".rjust(7) + "WALL S".rjust(10) + "REQUESTS".rjust(10) + "REQ/PR".rjust(8) +
+          "CPU S".rjust(9) + "CPU MS/PR".rjust(11))
+    for pr_cnt in pr_cnts:
+        server_process, server_address = _start_fake_server(pr_cnt, latency, change_ratio)
+        try:
+            pr_list = _set_up_watcher(server_address, pr_cnt)
+            with ThreadPoolExecutor(max_workers=constants.POLL_CONCURRENCY_PER_HOST) as executor:
+                for cycle_index in range(cycle_cnt + 1):
+                    wall_time, request_cnt, cpu_time = _measure_cycle(poller, executor, server_address, pr_list)
+                    print(str(pr_cnt).rjust(8) + ("cold" if cycle_index == 0 else str(cycle_index)).rjust(7) +
+                          ("%.3f" % wall_time).rjust(10) + str(request_cnt).rjust(10) +
+                          ("%.2f" % (request_cnt / pr_cnt)).rjust(8) + ("%.3f" % cpu_time).rjust(9) +
+                          ("%.3f" % (cpu_time * 1000 / pr_cnt)).rjust(11))
+        finally:
+            server_process.terminate()
+            server_process.join()
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Measures the poll cycles against the fake Bitbucket Server.")
+    parser.add_argument("pr_cnts", type=int, nargs="*", help="Numbers of the watched PRs")
+    parser.add_argument("--cycles", type=int, default=3, help="Number of the warm cycles after the cold one")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the server waits before each response")
+    parser.add_argument("--change-ratio", type=float, default=0.05,
+                        help="Probability of a PR to change when it is fetched")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = _parse_args()
+    main(args.pr_cnts or _DEFAULT_PR_CNTS, args.cycles, args.latency, args.change_ratio)
@@ -0,0 +1,112 @@
+"""
+Rendering benchmark of the PR watch-list window, runs on the offscreen platform of Qt
+* Rebuilds the watch-list with a label pair for each PR, as the former window did on every update, and refreshes the
+  table model with a few changed PRs, and reports the time of an update including the repaint
+* Burst shows the number of refreshes, when every changed PR of a cycle requests a refresh as the poller does
+* Usage: python -m benchmarks.pr_list_view [PR count ...], 100 and 1000 PRs by default
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from app import colors_def as colors
+from app.bitbucket_rest_interaction import PrStatus
+from app.pr_list_manager import PrListManager
+from app.pr_list_model import PrListModel
+from app.pr_record import PrRecord
+from app.repo_info import RepoInfo
+from app.watch_list_store import WatchListStore
+from PyQt5.QtCore import QEventLoop
+from PyQt5.QtWidgets import QApplication, QFormLayout, QGroupBox, QLabel, QScrollArea, QTableView
+
+_DEFAULT_PR_CNTS = (100, 1000)
+_CHANGED_PR_CNT = 5
+_UPDATE_CNT = 20
+_STATUSES = list(PrStatus)
+
+
+def _rebuild_labels(scroll_area, pr_list):
+    # Former update of the window, every label is created again and styled with its own stylesheet
+    group_box = QGroupBox()
+    form_layout = QFormLayout()
+    for pr in pr_list:
+        pr_id_label = QLabel(pr.get_display_name())
+        pr_id_label.setStyleSheet("border-style:none; font-weight:bold;")
+        pr_status_label = QLabel(pr.status_text)
+        pr_status_label.setStyleSheet("background-color:" + colors.FAILED_BG + "; color:" + colors.FAILED_FG + ";"
+                                      if pr.status == PrStatus.FAILED else
+                                      "background-color:" + colors.DEFAULT_BG + "; color:" + colors.DEFAULT_FG + ";")
+        form_layout.addRow(pr_id_label, pr_status_label)
+    group_box.setLayout(form_layout)
+    scroll_area.setWidget(group_box)
+
+
+def _change_statuses(pr_list, update_index):
+    for offset in range(_CHANGED_PR_CNT):
+        pr = pr_list[(update_index * _CHANGED_PR_CNT + offset) % len(pr_list)]
+        pr.status = _STATUSES[(_STATUSES.index(pr.status) + 1) % len(_STATUSES)]
+
+
+def _measure(app, widget, update):
+    widget.show()
+    app.processEvents()
+    start_time = time.perf_counter()
+    for update_index in range(_UPDATE_CNT):
+        update(update_index)
+        widget.repaint()
+        app.processEvents(QEventLoop.AllEvents)
+    elapsed = time.perf_counter() - start_time
+    widget.hide()
+    return elapsed * 1000 / _UPDATE_CNT
+
+
+def _measure_burst(app, model, pr_list):
+    # Every changed PR of the cycle requests a refresh, the requests are served once the event loop runs
+    refresh_cnt = model.refresh_cnt
+    _change_statuses(pr_list, 0)
+    for _ in range(_CHANGED_PR_CNT):
+        model.request_refresh()
+    deadline = time.perf_counter() + 0.5
+    while time.perf_counter() < deadline and model.refresh_cnt == refresh_cnt:
+        app.processEvents(QEventLoop.AllEvents, 10)
+    return model.refresh_cnt - refresh_cnt
+
+
+def main(pr_cnts):
+    WatchListStore.get_instance().enabled = False
+    repo_info = RepoInfo.get_instance()
+    repo_info.server_address = "bitbucket.example.com"
+    repo_info.project_name = "PROJECT"
+    repo_info.repo_name = "repository"
+    app = QApplication(sys.argv)
+
+    print("PR CNT".rjust(10) + "REBUILD MS".rjust(14) + "MODEL MS".rjust(12) + "BURST REFRESH CNT".rjust(20))
+    pr_list_manager = PrListManager.get_instance()
+    for pr_cnt in pr_cnts:
+        for pr in pr_list_manager.get_pr_list():
+            pr_list_manager.remove_pr_from_list(pr.key)
+        for index in range(pr_cnt):
+            pr_list_manager.add_pr(PrRecord(str(index), _STATUSES[index % len(_STATUSES)]))
+        pr_list = pr_list_manager.get_pr_list()
+
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(True)
+        rebuild_ms = _measure(app, scroll_area, lambda update_index: (_change_statuses(pr_list, update_index),
+                                                                      _rebuild_labels(scroll_area, pr_list)))
+
+        table_view = QTableView()
+        model = PrListModel(table_view)
+        table_view.setModel(model)
+        model_ms = _measure(app, table_view, lambda update_index: (_change_statuses(pr_list, update_index),
+                                                                   model.refresh()))
+        table_view.show()
+        burst_refresh_cnt = _measure_burst(app, model, pr_list)
+        table_view.hide()
+        print(str(pr_cnt).rjust(10) + ("%.2f" % rebuild_ms).rjust(14) + ("%.2f" % model_ms).rjust(12) +
+              str(burst_refresh_cnt).rjust(20))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or _DEFAULT_PR_CNTS)
@@ -0,0 +1,89 @@
+"""
+Memory benchmark of the watched PR records
+* Builds the watch-list with the slotted *PrRecord* and with the dict backed layout of the former PR item, and reports
+  the traced bytes per watched PR
+* Usage: python -m benchmarks.pr_record_memory [PR count ...], 10k and 100k PRs by default
+"""
+import sys
+import tracemalloc
+from app.bitbucket_rest_interaction import PrStatus
+from app.pr_record import PrRecord
+from app.repo_info import RepoInfo
+
+_DEFAULT_PR_CNTS = (10000, 100000)
+
+
+class _DictBackedPR:
+    """ Layout of the former PR item, keeping the link and the status as strings in the instance dictionary """
+
+    def __init__(self, pr_id, link, status):
+        self.id = pr_id
+        self.link = link
+        self.status = status
+        self.commentCnt = 0
+        self.openTaskCnt = 0
+        self.version = None
+        self.updatedDate = None
+        self.lastActivityId = None
+
+
+def _fill_record(pr, index):
+    pr.comment_cnt = index % 17
+    pr.open_task_cnt = index % 3
+    pr.head_commit = format(index, '040x')
+    pr.version = index % 11
+    pr.last_activity_id = index * 7
+    pr.last_polled = 1700000000.0 + index
+    return pr
+
+
+def _build_records(pr_cnt):
+    return [_fill_record(PrRecord(str(index), PrStatus(index % len(PrStatus) + 1)), index)
+            for index in range(pr_cnt)]
+
+
+def _build_dict_backed(pr_cnt):
+    pr_list = []
+    for index in range(pr_cnt):
+        pr_id = str(index)
+        pr = _DictBackedPR(pr_id, _get_legacy_link(pr_id), PrStatus(index % len(PrStatus) + 1).name)
+        pr.commentCnt = index % 17
+        pr.openTaskCnt = index % 3
+        pr.version = index % 11
+        pr.updatedDate = 1700000000000 + index
+        pr.lastActivityId = index * 7
+        pr_list.append(pr)
+    return pr_list
+
+
+def _get_legacy_link(pr_id):
+    repo_info = RepoInfo.get_instance()
+    return 'https://' + repo_info.server_address + '/git/projects/' + repo_info.project_name + \
+           '/repos/' + repo_info.repo_name + '/pull-requests/PR-' + pr_id
+
+
+def _measure(build, pr_cnt):
+    tracemalloc.start()
+    pr_list = build(pr_cnt)
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del pr_list
+    return traced_bytes / pr_cnt
+
+
+def main(pr_cnts):
+    repo_info = RepoInfo.get_instance()
+    repo_info.server_address = "bitbucket.example.com"
+    repo_info.project_name = "PROJECT"
+    repo_info.repo_name = "repository"
+
+    print("PR CNT".rjust(10) + "DICT BACKED B/PR".rjust(20) + "PR RECORD B/PR".rjust(20) + "SAVING".rjust(10))
+    for pr_cnt in pr_cnts:
+        dict_backed = _measure(_build_dict_backed, pr_cnt)
+        record = _measure(_build_records, pr_cnt)
+        print(str(pr_cnt).rjust(10) + ("%.1f" % dict_backed).rjust(20) + ("%.1f" % record).rjust(20) +
+              ("%.1f%%" % (100 * (1 - record / dict_backed))).rjust(10))
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or _DEFAULT_PR_CNTS)
@@ -0,0 +1,56 @@
+"""
+CPU usage check of the timed message boxes, runs on the offscreen platform of Qt
+* Opens timed message boxes sharing the countdown ticker, runs the event loop while they count down, and reports the
+  CPU time of the process against the wall time
+* Former countdown thread of each box spun while waiting for the GUI, and kept a core busy while the box was open
+* Exits with a non-zero code, if the CPU usage is above the limit, so it can be used as a regression check
+* Usage: python -m benchmarks.timeout_msg_box_cpu [box count] [seconds], 5 boxes for 5 seconds by default
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from app.timeout_msg_box import CountdownTicker, TimeoutMsgBox
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+
+_DEFAULT_BOX_CNT = 5
+_DEFAULT_DURATION = 5
+_MAX_CPU_PERCENT = 5.0
+
+
+def main(box_cnt, duration):
+    app = QApplication(sys.argv)
+    # Boxes outlive the measurement, so they are still counting down when it ends
+    msg_boxes = [TimeoutMsgBox(None, "Box " + str(index), duration + 5, True, []) for index in range(box_cnt)]
+    for msg_box in msg_boxes:
+        msg_box.show()
+    app.processEvents()
+
+    event_loop = QEventLoop()
+    QTimer.singleShot(int(duration * 1000), event_loop.quit)
+    start_cpu_time = time.process_time()
+    start_time = time.perf_counter()
+    event_loop.exec_()
+    cpu_percent = (time.process_time() - start_cpu_time) * 100 / (time.perf_counter() - start_time)
+
+    print("BOX CNT".rjust(10) + "SUBSCRIBED".rjust(12) + "CPU %".rjust(10))
+    print(str(box_cnt).rjust(10) + str(CountdownTicker.get_instance().subscriber_cnt).rjust(12) +
+          ("%.2f" % cpu_percent).rjust(10))
+    for msg_box in msg_boxes:
+        msg_box.close()
+    app.processEvents()
+    if CountdownTicker.get_instance().subscriber_cnt:
+        print("Closed boxes are still subscribed to the ticker!")
+        return 1
+    if cpu_percent > _MAX_CPU_PERCENT:
+        print("CPU usage is above " + str(_MAX_CPU_PERCENT) + "%!")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else _DEFAULT_BOX_CNT,
+                  float(sys.argv[2]) if len(sys.argv) > 2 else _DEFAULT_DURATION))
@@ -0,0 +1,106 @@
+"""
+Tests of the webhook receiver, recorded payloads of webhook_payloads are posted to a local receiver
+* Usage: python -m unittest discover tests
+"""
+import http.client
+import os
+import unittest
+from app import constants_def as constants
+from app.bitbucket_rest_interaction import PrStatus
+from app.pr_list_manager import PrListManager
+from app.pr_record import PrRecord
+from app.repo_info import RepoRef
+from app.watch_list_store import WatchListStore
+from app.webhook_receiver import WebhookReceiver, sign_payload, HEADER_EVENT_KEY, HEADER_SIGNATURE, \
+    HEADER_CONTENT_LENGTH, HTTP_NO_CONTENT, HTTP_UNAUTHORIZED, HTTP_PAYLOAD_TOO_LARGE
+
+_PAYLOADS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "webhook_payloads")
+_SECRET = "webhook-secret"
+_REPO_REF = RepoRef("bitbucket.example.com", "PROJECT", "repository")
+_HEAD_COMMIT = "9f2c4d1e8b7a6c5d4e3f2a1b0c9d8e7f6a5b4c3d"
+
+
+def read_payload(file_name):
+    with open(os.path.join(_PAYLOADS_DIR, file_name), "rb") as payload_file:
+        return payload_file.read()
+
+
+class PollerStub:
+    """
+    Stand-in of *PrPoller*, records the polls requested by the receiver
+    """
+
+    def __init__(self):
+        self.poll_requests = []
+        self.reconciliation_interval = 0
+
+    def request_poll(self, pr_key, status=None):
+        self.poll_requests.append((pr_key, status))
+
+    def set_reconciliation_interval(self, reconciliation_interval):
+        self.reconciliation_interval = reconciliation_interval
+
+
+class WebhookReceiverTest(unittest.TestCase):
+
+    def setUp(self):
+        WatchListStore.get_instance().enabled = False
+        self.pr = PrRecord("12", PrStatus.IN_PROGRESS, _REPO_REF)
+        self.pr.head_commit = _HEAD_COMMIT
+        self.other_pr = PrRecord("13", PrStatus.IN_PROGRESS, _REPO_REF)
+        PrListManager.get_instance().add_pr(self.pr)
+        PrListManager.get_instance().add_pr(self.other_pr)
+        self.poller = PollerStub()
+        self.receiver = WebhookReceiver(self.poller, _SECRET, 0, host="127.0.0.1")
+        self.receiver.start()
+
+    def tearDown(self):
+        self.receiver.stop()
+        PrListManager.get_instance().remove_pr_from_list(self.pr.key)
+        PrListManager.get_instance().remove_pr_from_list(self.other_pr.key)
+
+    def post(self, event_key, body, signature=None, content_length=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.receiver.port, timeout=10)
+        try:
+            conn.putrequest("POST", "/")
+            conn.putheader(HEADER_EVENT_KEY, event_key)
+            conn.putheader(HEADER_SIGNATURE, signature or sign_payload(_SECRET, body))
+            conn.putheader(HEADER_CONTENT_LENGTH, str(len(body) if content_length is None else content_length))
+            conn.endheaders(body)
+            return conn.getresponse().status
+        finally:
+            conn.close()
+
+    def test_reconciliation_interval_is_set_while_running(self):
+        self.assertEqual(self.poller.reconciliation_interval, constants.WEBHOOK_RECONCILIATION_INTERVAL)
+
+    def test_merged_pr_is_polled_with_merged_status(self):
+        status = self.post("pr:merged", read_payload("pr_merged.json"))
+        self.assertEqual(status, HTTP_NO_CONTENT)
+        self.assertEqual(self.poller.poll_requests, [(self.pr.key, PrStatus.MERGED)])
+
+    def test_commented_pr_is_polled(self):
+        status = self.post("pr:comment:added", read_payload("pr_comment_added.json"))
+        self.assertEqual(status, HTTP_NO_CONTENT)
+        self.assertEqual(self.poller.poll_requests, [(self.pr.key, None)])
+
+    def test_pr_of_build_commit_is_polled(self):
+        status = self.post("repo:commit_status_updated", read_payload("build_status.json"))
+        self.assertEqual(status, HTTP_NO_CONTENT)
+        self.assertEqual(self.poller.poll_requests, [(self.pr.key, None)])
+
+    def test_invalid_signature_is_rejected(self):
+        body = read_payload("pr_merged.json")
+        status = self.post("pr:merged", body, signature=sign_payload("other-secret", body))
+        self.assertEqual(status, HTTP_UNAUTHORIZED)
+        self.assertEqual(self.poller.poll_requests, [])
+
+    def test_oversized_body_is_rejected(self):
+        # Body is rejected by its length, before it is read
+        status = self.post("pr:merged", b"", content_length=constants.WEBHOOK_MAX_BODY_BYTES + 1)
+        self.assertEqual(status, HTTP_PAYLOAD_TOO_LARGE)
+        self.assertEqual(self.poller.poll_requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()